@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.accounts'
\ No newline at end of file
+    name = 'apps.accounts'
+
+    def ready(self):
+        from . import signals  # noqa: F401
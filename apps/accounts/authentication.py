@@ -1,9 +1,7 @@
 from rest_framework import authentication
 from rest_framework import exceptions
-from django.contrib.auth import get_user_model
-from django.core.cache import cache
+from . import token_cache
 
-User = get_user_model()
 
 class TokenAuthentication(authentication.BaseAuthentication):
     def authenticate(self, request):
@@ -17,16 +15,14 @@ class TokenAuthentication(authentication.BaseAuthentication):
         
         token = auth_header.replace('Bearer ', '')
         
-        # Get user_id from cache (token storage)
-        user_id = cache.get(f'auth_token:{token}')
+        # Resolve token -> user via the in-process LRU, then the shared cache
+        user = token_cache.get_user(token)
         
-        if not user_id:
+        if user is None:
             raise exceptions.AuthenticationFailed('Invalid or expired token')
         
-        try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
-            raise exceptions.AuthenticationFailed('User not found')
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User account is disabled')
         
         return (user, token)
     
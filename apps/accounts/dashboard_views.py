@@ -2,6 +2,8 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from .stats import get_stats
+from apps.videos.admin_stats import get_dashboard_stats
 
 
 @api_view(['GET'])
@@ -9,41 +11,41 @@ from rest_framework import status
 def dashboard_stats_view(request):
     """
     Get dashboard statistics based on user role
-    TODO: Implement after models are created
+    Served from the per-user stats row (one read)
     """
     user = request.user
     
     if user.role == 'founder':
-        # TODO: Get founder statistics
+        stats = get_stats(user.id)
         return Response({
-            'totalViews': 0,
-            'interestedCount': 0,
-            'maybeCount': 0,
-            'activeMatches': 0,
-            'pendingMatches': 0,
-            'videoCount': 0,
+            'totalViews': stats.total_views,
+            'interestedCount': stats.interested_count,
+            'maybeCount': stats.maybe_count,
+            'activeMatches': stats.active_matches,
+            'pendingMatches': stats.pending_matches,
+            'videoCount': stats.video_count,
         })
     
     elif user.role == 'investor':
-        # TODO: Get investor statistics
+        stats = get_stats(user.id)
         return Response({
-            'signalsSent': 0,
-            'interestedCount': 0,
-            'maybeCount': 0,
-            'passCount': 0,
-            'activeMatches': 0,
-            'pendingMatches': 0,
+            'signalsSent': stats.interested_count + stats.maybe_count + stats.pass_count,
+            'interestedCount': stats.interested_count,
+            'maybeCount': stats.maybe_count,
+            'passCount': stats.pass_count,
+            'activeMatches': stats.active_matches,
+            'pendingMatches': stats.pending_matches,
         })
     
     elif user.role == 'admin':
-        # TODO: Get admin statistics
+        stats = get_dashboard_stats()
         return Response({
-            'totalUsers': 0,
-            'totalFounders': 0,
-            'totalInvestors': 0,
-            'totalVideos': 0,
-            'activeVideos': 0,
-            'pendingReports': 0,
+            'totalUsers': stats['total_users'],
+            'totalFounders': stats['total_founders'],
+            'totalInvestors': stats['total_investors'],
+            'totalVideos': stats['total_videos'],
+            'activeVideos': stats['active_videos'],
+            'pendingReports': stats['pending_reports'],
         })
     
-    return Response({'message': 'Invalid role'}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+    return Response({'message': 'Invalid role'}, status=status.HTTP_400_BAD_REQUEST)
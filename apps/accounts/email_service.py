@@ -1,158 +1,182 @@
-from django.core.mail import send_mail
+from functools import lru_cache
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.conf import settings
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from django.template import TemplateDoesNotExist
+from django.template.loader import select_template
+from django.utils import timezone, translation
+from config.jobs import JobQueue
+from .models import OutboundEmail
+
+outbox = JobQueue(OutboundEmail, 'EMAIL_OUTBOX', running_status='sending', done_status='sent', finished_field='sent_at')
+
+
+def _locale_candidates(locale):
+    """'pt-br' -> ['pt-br', 'pt'] so regional variants fall back to the language"""
+    locale = (locale or translation.get_language() or settings.LANGUAGE_CODE).lower()
+    candidates = [locale]
+    if '-' in locale:
+        candidates.append(locale.split('-')[0])
+    return candidates
+
+
+@lru_cache(maxsize=256)
+def _compiled_email_template(template_name, extension, locale):
+    names = [f'emails/{candidate}/{template_name}.{extension}' for candidate in _locale_candidates(locale)]
+    names.append(f'emails/{template_name}.{extension}')
+    try:
+        return select_template(names)
+    except TemplateDoesNotExist:
+        return None
+
+
+def get_email_template(template_name, extension, locale=None, required=True):
+    """
+    Compiled email template for a locale, falling back to the default
+    (English) variant. Compiled templates are memoized per process;
+    DEBUG skips the memo so template edits show up immediately.
+    """
+    if settings.DEBUG:
+        _compiled_email_template.cache_clear()
+
+    # 'subject.txt' lives next to the body as <name>_subject.txt
+    if extension == 'subject.txt':
+        template_name, extension = f'{template_name}_subject', 'txt'
+
+    template = _compiled_email_template(template_name, extension, _locale_candidates(locale)[0])
+    if template is None and required:
+        raise TemplateDoesNotExist(f'emails/{template_name}.{extension}')
+    return template
 
 
 class EmailService:
     """Service for sending emails via Brevo"""
     
     @staticmethod
-    def send_verification_email(user, otp_code):
-        """Send OTP verification email"""
-        subject = 'Verify Your ikonetU Account'
-        
-        html_message = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }}
-                .content {{ background: #f9fafb; padding: 30px; border-radius: 0 0 10px 10px; }}
-                .otp-box {{ background: white; border: 2px solid #667eea; border-radius: 8px; padding: 20px; text-align: center; margin: 20px 0; }}
-                .otp-code {{ font-size: 32px; font-weight: bold; color: #667eea; letter-spacing: 8px; }}
-                .footer {{ text-align: center; color: #6b7280; font-size: 12px; margin-top: 20px; }}
-                .button {{ display: inline-block; background: #667eea; color: white; padding: 12px 30px; text-decoration: none; border-radius: 6px; margin: 20px 0; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>Welcome to ikonetU!</h1>
-                </div>
-                <div class="content">
-                    <h2>Hi {user.name},</h2>
-                    <p>Thank you for signing up! Please verify your email address to get started.</p>
-                    
-                    <div class="otp-box">
-                        <p style="margin: 0; color: #6b7280;">Your verification code is:</p>
-                        <div class="otp-code">{otp_code}</div>
-                        <p style="margin: 10px 0 0 0; color: #6b7280; font-size: 14px;">This code expires in 15 minutes</p>
-                    </div>
-                    
-                    <p>Enter this code in the app to verify your account and start connecting with founders and investors!</p>
-                    
-                    <p style="color: #6b7280; font-size: 14px;">If you didn't create this account, please ignore this email.</p>
-                </div>
-                <div class="footer">
-                    <p>© 2026 ikonetU. All rights reserved.</p>
-                </div>
-            </div>
-        </body>
-        </html>
+    def queue_email(subject, message, recipient_list, html_message=None, from_email=None):
         """
-        
-        plain_message = f"""
-        Welcome to ikonetU!
-        
-        Hi {user.name},
-        
-        Thank you for signing up! Please verify your email address to get started.
-        
-        Your verification code is: {otp_code}
-        
-        This code expires in 15 minutes.
-        
-        Enter this code in the app to verify your account.
-        
-        If you didn't create this account, please ignore this email.
-        
-        © 2026 ikonetU. All rights reserved.
+        Add an email to the outbox instead of talking SMTP in the request.
+        Delivered by `manage.py send_queued_emails`.
         """
-        
-        send_mail(
+        return OutboundEmail.objects.create(
             subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
+            body=message,
+            html_body=html_message or '',
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            recipients=list(recipient_list),
         )
     
     @staticmethod
-    def send_password_reset_email(user, reset_token):
-        """Send password reset email"""
-        reset_url = f"{settings.FRONTEND_URL}/reset-password?token={reset_token}"
-        
-        subject = 'Reset Your ikonetU Password'
-        
-        html_message = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }}
-                .content {{ background: #f9fafb; padding: 30px; border-radius: 0 0 10px 10px; }}
-                .button {{ display: inline-block; background: #667eea; color: white; padding: 12px 30px; text-decoration: none; border-radius: 6px; margin: 20px 0; }}
-                .footer {{ text-align: center; color: #6b7280; font-size: 12px; margin-top: 20px; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>Password Reset Request</h1>
-                </div>
-                <div class="content">
-                    <h2>Hi {user.name},</h2>
-                    <p>We received a request to reset your password for your ikonetU account.</p>
-                    
-                    <p>Click the button below to reset your password:</p>
-                    
-                    <div style="text-align: center;">
-                        <a href="{reset_url}" class="button">Reset Password</a>
-                    </div>
-                    
-                    <p style="color: #6b7280; font-size: 14px;">Or copy and paste this link into your browser:</p>
-                    <p style="word-break: break-all; color: #667eea; font-size: 12px;">{reset_url}</p>
-                    
-                    <p style="margin-top: 20px; color: #6b7280; font-size: 14px;">This link expires in 15 minutes.</p>
-                    
-                    <p style="color: #ef4444; font-size: 14px;">If you didn't request this password reset, please ignore this email or contact support if you're concerned.</p>
-                </div>
-                <div class="footer">
-                    <p>© 2026 ikonetU. All rights reserved.</p>
-                </div>
-            </div>
-        </body>
-        </html>
+    def deliver_queued(batch_size=None):
         """
-        
-        plain_message = f"""
-        Password Reset Request
-        
-        Hi {user.name},
-        
-        We received a request to reset your password for your ikonetU account.
-        
-        Click this link to reset your password:
-        {reset_url}
-        
-        This link expires in 15 minutes.
-        
-        If you didn't request this password reset, please ignore this email.
-        
-        © 2026 ikonetU. All rights reserved.
+        Send one batch of due emails over a single SMTP connection.
+        Returns (sent, failed) counts.
         """
-        
-        send_mail(
+        emails = outbox.claim(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+        if not emails:
+            return 0, 0
+        
+        connection = get_connection(fail_silently=False)
+        
+        try:
+            connection.open()
+        except Exception as e:
+            # Can't reach the relay at all - reschedule the whole batch
+            for email in emails:
+                outbox.record_failure(email, e)
+            return 0, len(emails)
+        
+        try:
+            return outbox.run_claimed(emails, lambda email: EmailService._send(email, connection))
+        finally:
+            connection.close()
+    
+    @staticmethod
+    def _send(email, connection):
+        message = EmailMultiAlternatives(
+            subject=email.subject,
+            body=email.body,
+            from_email=email.from_email,
+            to=email.recipients,
+            connection=connection,
+        )
+        if email.html_body:
+            message.attach_alternative(email.html_body, 'text/html')
+        message.send()
+    
+    @staticmethod
+    def render(template_name, context, locale=None):
+        """Render (subject, text, html) for one message"""
+        return EmailService.render_bulk(template_name, [context], locale)[0]
+    
+    @staticmethod
+    def render_bulk(template_name, contexts, locale=None):
+        """
+        Render many personalized messages from the same compiled templates.
+        Returns a list of (subject, text, html) tuples; html is '' when the
+        email has no HTML part.
+        """
+        subject_template = get_email_template(template_name, 'subject.txt', locale)
+        text_template = get_email_template(template_name, 'txt', locale)
+        html_template = get_email_template(template_name, 'html', locale, required=False)
+        defaults = {
+            'year': timezone.now().year,
+            'expires_minutes': settings.OTP_EXPIRATION_MINUTES,
+        }
+        
+        rendered = []
+        for context in contexts:
+            context = {**defaults, **context}
+            rendered.append((
+                ' '.join(subject_template.render(context).split()),
+                text_template.render(context).strip(),
+                html_template.render(context) if html_template else '',
+            ))
+        return rendered
+    
+    @staticmethod
+    def queue_template(template_name, recipient_list, context, locale=None):
+        """Render a template and add it to the outbox"""
+        subject, text, html = EmailService.render(template_name, context, locale)
+        return EmailService.queue_email(
             subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
\ No newline at end of file
+            message=text,
+            recipient_list=recipient_list,
+            html_message=html,
+        )
+    
+    @staticmethod
+    def queue_bulk(template_name, messages, locale=None):
+        """
+        Render and enqueue many messages in one pass (e.g. digests).
+        messages: iterable of (recipient_email, context) pairs.
+        """
+        messages = list(messages)
+        rendered = EmailService.render_bulk(template_name, [context for _, context in messages], locale)
+        return OutboundEmail.objects.bulk_create([
+            OutboundEmail(
+                subject=subject,
+                body=text,
+                html_body=html,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                recipients=[recipient],
+            )
+            for (recipient, _), (subject, text, html) in zip(messages, rendered)
+        ])
+    
+    @staticmethod
+    def send_verification_email(user, otp_code, locale=None):
+        """Send OTP verification email"""
+        EmailService.queue_template('verification', [user.email], {
+            'name': user.name,
+            'otp_code': otp_code,
+        }, locale)
+    
+    @staticmethod
+    def send_password_reset_email(user, reset_token, locale=None):
+        """Send password reset email"""
+        reset_url = f"{settings.FRONTEND_URL}/reset-password?token={reset_token}"
+        
+        EmailService.queue_template('password_reset', [user.email], {
+            'name': user.name,
+            'reset_url': reset_url,
+        }, locale)
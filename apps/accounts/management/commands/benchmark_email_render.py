@@ -0,0 +1,41 @@
+import time
+from django.core.management.base import BaseCommand
+from apps.accounts.email_service import EmailService
+
+
+class Command(BaseCommand):
+    help = 'Measure email template rendering throughput (single renders vs render_bulk)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=2000)
+        parser.add_argument('--template', default='verification')
+        parser.add_argument('--locale', default=None)
+
+    def handle(self, *args, **options):
+        count = options['count']
+        contexts = [
+            {
+                'name': f'User {i}',
+                'otp_code': f'{i % 1000000:06d}',
+                'reset_url': f'https://example.com/reset-password?token={i}',
+            }
+            for i in range(count)
+        ]
+
+        # Warm the compiled template memo so both runs measure rendering only
+        EmailService.render(options['template'], contexts[0], options['locale'])
+
+        start = time.perf_counter()
+        for context in contexts:
+            EmailService.render(options['template'], context, options['locale'])
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        EmailService.render_bulk(options['template'], contexts, options['locale'])
+        bulk = time.perf_counter() - start
+
+        self.stdout.write(f'Rendered {count} x "{options["template"]}"')
+        self.stdout.write(f'  render():      {single:.3f}s  ({count / single:.0f} msg/s)')
+        self.stdout.write(self.style.SUCCESS(
+            f'  render_bulk(): {bulk:.3f}s  ({count / bulk:.0f} msg/s)'
+        ))
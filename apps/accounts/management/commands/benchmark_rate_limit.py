@@ -0,0 +1,36 @@
+import statistics
+import time
+import uuid
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from apps.accounts import rate_limit
+
+
+class Command(BaseCommand):
+    help = 'Measure per-request overhead of the rate limiter against the configured ratelimit cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5000)
+        parser.add_argument('--policy', default='search')
+        parser.add_argument('--clients', type=int, default=100, help='Distinct client identifiers to rotate through')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        policy = options['policy']
+        clients = [f'bench-{uuid.uuid4().hex[:8]}' for _ in range(options['clients'])]
+
+        backend = type(caches['ratelimit']).__name__
+        self.stdout.write(f'Backend: {backend}, policy: {policy}, iterations: {iterations}')
+
+        timings = []
+        for i in range(iterations):
+            start = time.perf_counter()
+            rate_limit.check(policy, clients[i % len(clients)])
+            timings.append((time.perf_counter() - start) * 1_000_000)
+
+        timings.sort()
+        p50 = timings[len(timings) // 2]
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        self.stdout.write(self.style.SUCCESS(
+            f'mean {statistics.mean(timings):.1f}us  p50 {p50:.1f}us  p99 {p99:.1f}us  max {timings[-1]:.1f}us'
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from apps.accounts import stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute every user\'s dashboard stats from the raw tables (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        written, drifted = stats.reconcile(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Reconciled stats for {written} users ({drifted} had drifted)'
+        ))
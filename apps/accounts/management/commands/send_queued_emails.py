@@ -0,0 +1,10 @@
+from config.jobs import WorkerCommand
+from apps.accounts.email_service import EmailService
+
+
+class Command(WorkerCommand):
+    help = 'Deliver emails from the outbox (runs as a long-lived worker unless --once is given)'
+    progress_message = 'Sent {done}, failed {failed}'
+
+    def process_batch(self, batch_size):
+        return EmailService.deliver_queued(batch_size)
@@ -1,59 +1,41 @@
-import time
-from django.core.cache import cache
 from django.http import JsonResponse
 from django.conf import settings
+from asgiref.sync import sync_to_async
+from channels.security.websocket import WebsocketDenier
+from . import rate_limit
 
 
 class RateLimitMiddleware:
     """
-    Rate limiting middleware for authentication endpoints
+    Rate limiting middleware for the routes listed in RATE_LIMIT_ROUTES
     """
     def __init__(self, get_response):
         self.get_response = get_response
-        self.rate_limit_paths = [
-            '/api/auth/register',
-            '/api/auth/login',
-        ]
 
     def __call__(self, request):
         if not settings.RATE_LIMIT_ENABLE:
             return self.get_response(request)
 
-        if request.path in self.rate_limit_paths:
-            ip_address = self.get_client_ip(request)
-            cache_key = f'rate_limit:{ip_address}'
-            
-            rate_data = cache.get(cache_key)
-            now = time.time()
-            
-            if rate_data is None:
-                cache.set(
-                    cache_key,
-                    {'count': 1, 'reset_time': now + settings.RATE_LIMIT_WINDOW},
-                    settings.RATE_LIMIT_WINDOW
-                )
-            else:
-                if now > rate_data['reset_time']:
-                    cache.set(
-                        cache_key,
-                        {'count': 1, 'reset_time': now + settings.RATE_LIMIT_WINDOW},
-                        settings.RATE_LIMIT_WINDOW
-                    )
-                elif rate_data['count'] >= settings.RATE_LIMIT_MAX_REQUESTS:
-                    retry_after = int(rate_data['reset_time'] - now)
-                    return JsonResponse(
-                        {
-                            'message': 'Too many requests. Please try again later.',
-                            'retryAfter': retry_after
-                        },
-                        status=429,
-                        headers={'Retry-After': str(retry_after)}
-                    )
-                else:
-                    rate_data['count'] += 1
-                    cache.set(cache_key, rate_data, settings.RATE_LIMIT_WINDOW)
+        policy = rate_limit.policy_for_path(request.path)
+        if policy is None:
+            return self.get_response(request)
+
+        result = rate_limit.check(policy, self.get_client_ip(request))
+
+        if not result.allowed:
+            return JsonResponse(
+                {
+                    'message': 'Too many requests. Please try again later.',
+                    'retryAfter': result.reset
+                },
+                status=429,
+                headers=result.headers
+            )
 
-        return self.get_response(request)
+        response = self.get_response(request)
+        for header, value in result.headers.items():
+            response[header] = value
+        return response
 
     def get_client_ip(self, request):
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -61,4 +43,33 @@ class RateLimitMiddleware:
             ip = x_forwarded_for.split(',')[0]
         else:
             ip = request.META.get('REMOTE_ADDR')
-        return ip
\ No newline at end of file
+        return ip
+
+
+class WebsocketRateLimitMiddleware:
+    """
+    ASGI middleware applying the 'ws_connect' policy to WebSocket handshakes
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'websocket' and settings.RATE_LIMIT_ENABLE:
+            result = await self.check(scope)
+            if not result.allowed:
+                # Reject the handshake before routing to a consumer
+                denier = WebsocketDenier()
+                return await denier(scope, receive, send)
+
+        return await self.app(scope, receive, send)
+
+    async def check(self, scope):
+        return await sync_to_async(rate_limit.check)('ws_connect', self.get_client_ip(scope))
+
+    def get_client_ip(self, scope):
+        headers = dict(scope.get('headers', []))
+        x_forwarded_for = headers.get(b'x-forwarded-for')
+        if x_forwarded_for:
+            return x_forwarded_for.decode().split(',')[0]
+        client = scope.get('client')
+        return client[0] if client else None
@@ -41,6 +41,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=255)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='founder')
     avatar_url = models.URLField(max_length=500, null=True, blank=True)
+    avatar_variants = models.JSONField(default=dict, blank=True)  # Size variants, see apps/images/derivatives.py
     onboarding_complete = models.BooleanField(default=False)
     email_verified = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
@@ -54,6 +55,11 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     class Meta:
         db_table = 'users'
+        indexes = [
+            # Admin users listing (keyset on created_at, optional role filter)
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['role', 'created_at']),
+        ]
 
     def __str__(self):
         return self.email
@@ -119,4 +125,64 @@ class PasswordReset(models.Model):
             self.token = self.generate_token()
         if not self.expires_at:
             self.expires_at = timezone.now() + timedelta(minutes=15)
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+class OutboundEmail(models.Model):
+    """Email outbox - rows are delivered by the send_queued_emails worker"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True, default='')
+    from_email = models.CharField(max_length=255)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'email_outbox'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
+
+
+class UserStats(models.Model):
+    """
+    Denormalised per-user dashboard counters, kept up to date by model
+    signals (apps/accounts/stats.py) and reconciled nightly by
+    `manage.py reconcile_user_stats`.
+
+    Signal counts are received-by-type for founders and sent-by-type for
+    investors.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    video_count = models.IntegerField(default=0)
+    total_views = models.IntegerField(default=0)
+    total_likes = models.IntegerField(default=0)
+    interested_count = models.IntegerField(default=0)
+    maybe_count = models.IntegerField(default=0)
+    pass_count = models.IntegerField(default=0)
+    active_matches = models.IntegerField(default=0)
+    pending_matches = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'user_stats'
+
+    def __str__(self):
+        return f"Stats for {self.user_id}"
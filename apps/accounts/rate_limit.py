@@ -0,0 +1,112 @@
+import math
+import re
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+
+# Sliding-window counter: INCR the current fixed window and read the previous
+# one in a single atomic script, so each check is exactly one Redis round trip.
+SLIDING_WINDOW_LUA = """
+local current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+local previous = tonumber(redis.call('GET', KEYS[2])) or 0
+return {current, previous}
+"""
+
+_compiled_routes = None
+
+
+class RateLimitResult:
+    """Outcome of a single rate limit check"""
+
+    def __init__(self, policy, limit, window, remaining, reset, allowed):
+        self.policy = policy
+        self.limit = limit
+        self.window = window
+        self.remaining = remaining
+        self.reset = reset
+        self.allowed = allowed
+
+    @property
+    def headers(self):
+        """IETF RateLimit-* response headers"""
+        headers = {
+            'RateLimit-Limit': str(self.limit),
+            'RateLimit-Remaining': str(self.remaining),
+            'RateLimit-Reset': str(self.reset),
+            'RateLimit-Policy': f'{self.limit};w={self.window}',
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(self.reset)
+        return headers
+
+
+def policy_for_path(path):
+    """Return the policy name configured for a request path, or None"""
+    global _compiled_routes
+    if _compiled_routes is None:
+        _compiled_routes = [(re.compile(pattern), policy) for pattern, policy in settings.RATE_LIMIT_ROUTES]
+
+    for pattern, policy in _compiled_routes:
+        if pattern.match(path):
+            return policy
+    return None
+
+
+def _hit_redis(cache, current_key, previous_key, window):
+    client = cache._cache.get_client(current_key, write=True)
+    script = client.register_script(SLIDING_WINDOW_LUA)
+    current, previous = script(
+        keys=[cache.make_and_validate_key(current_key), cache.make_and_validate_key(previous_key)],
+        args=[window * 2],
+    )
+    return int(current), int(previous)
+
+
+def _hit_generic(cache, current_key, previous_key, window):
+    # LocMem/file/db backends: add + incr are atomic per backend, and these
+    # backends are in-process so the extra calls are cheap
+    cache.add(current_key, 0, timeout=window * 2)
+    current = cache.incr(current_key)
+    previous = cache.get(previous_key, 0)
+    return current, previous
+
+
+def check(policy, identifier, now=None):
+    """
+    Count a hit against `policy` for `identifier` (usually the client IP)
+    and decide whether it is allowed.
+    """
+    config = settings.RATE_LIMIT_POLICIES[policy]
+    limit = config['limit']
+    window = config['window']
+
+    now = time.time() if now is None else now
+    window_index = int(now // window)
+    elapsed = now - window_index * window
+
+    current_key = f'rate_limit:{policy}:{identifier}:{window_index}'
+    previous_key = f'rate_limit:{policy}:{identifier}:{window_index - 1}'
+
+    cache = caches['ratelimit']
+    if isinstance(cache, RedisCache):
+        current, previous = _hit_redis(cache, current_key, previous_key, window)
+    else:
+        current, previous = _hit_generic(cache, current_key, previous_key, window)
+
+    # Weight the previous window by how much of it still overlaps the
+    # sliding window ending now
+    estimated = previous * ((window - elapsed) / window) + current
+    allowed = estimated <= limit
+
+    return RateLimitResult(
+        policy=policy,
+        limit=limit,
+        window=window,
+        remaining=max(0, int(limit - estimated)),
+        reset=max(1, math.ceil(window - elapsed)),
+        allowed=allowed,
+    )
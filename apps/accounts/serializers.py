@@ -1,14 +1,20 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from .models import User
+from apps.images.derivatives import srcset
 
 
 class UserSerializer(serializers.ModelSerializer):
+    avatar_srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = User
-        fields = ['id', 'email', 'name', 'role', 'avatar_url', 'onboarding_complete', 'email_verified', 'created_at']
+        fields = ['id', 'email', 'name', 'role', 'avatar_url', 'avatar_srcset', 'onboarding_complete', 'email_verified', 'created_at']
         read_only_fields = ['id', 'created_at']
 
+    def get_avatar_srcset(self, obj):
+        return srcset(obj.avatar_variants, obj.avatar_url)
+
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=6)
@@ -0,0 +1,106 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from apps.videos.models import Video, VideoLike, VideoView
+from apps.signals.models import Signal
+from apps.matches.models import Match
+from .models import User
+from . import stats, token_cache
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop auth cache snapshots whenever a user changes (incl. admin deactivation)"""
+    token_cache.invalidate_user(instance.id)
+
+
+# Per-user stats (UserStats) ----------------------------------------------
+
+@receiver(post_save, sender=Video)
+def count_video_created(sender, instance, created, **kwargs):
+    if created:
+        stats.adjust(instance.founder_id, video_count=1)
+
+
+@receiver(post_delete, sender=Video)
+def count_video_deleted(sender, instance, **kwargs):
+    stats.adjust(instance.founder_id, video_count=-1)
+
+
+def _founder_of(instance):
+    """Founder of a view/like's video (None if the video is already gone)"""
+    try:
+        return instance.video.founder_id
+    except Video.DoesNotExist:
+        return None
+
+
+# Views are only ever removed by video/user cascades; those are left to
+# the nightly reconciliation
+@receiver(post_save, sender=VideoView)
+def count_view_created(sender, instance, created, **kwargs):
+    if created:
+        stats.adjust(_founder_of(instance), total_views=1)
+
+
+@receiver(post_save, sender=VideoLike)
+def count_like_created(sender, instance, created, **kwargs):
+    if created:
+        stats.adjust(_founder_of(instance), total_likes=1)
+
+
+@receiver(post_delete, sender=VideoLike)
+def count_like_deleted(sender, instance, **kwargs):
+    stats.adjust(_founder_of(instance), total_likes=-1)
+
+
+@receiver(pre_save, sender=Signal)
+@receiver(pre_save, sender=Match)
+def remember_previous_state(sender, instance, **kwargs):
+    """Stash the stored type/is_active so post_save can move the count"""
+    instance._previous_state = None
+    if not instance._state.adding:
+        field = 'type' if sender is Signal else 'is_active'
+        instance._previous_state = sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+
+
+def _adjust_signal(signal, signal_type, delta):
+    field = stats.SIGNAL_FIELDS[signal_type]
+    stats.adjust(signal.investor_id, **{field: delta})
+    stats.adjust(signal.founder_id, **{field: delta})
+
+
+@receiver(post_save, sender=Signal)
+def count_signal_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    if created or previous is None:
+        _adjust_signal(instance, instance.type, 1)
+    elif previous != instance.type:
+        _adjust_signal(instance, previous, -1)
+        _adjust_signal(instance, instance.type, 1)
+
+
+@receiver(post_delete, sender=Signal)
+def count_signal_deleted(sender, instance, **kwargs):
+    _adjust_signal(instance, instance.type, -1)
+
+
+def _adjust_match(match, is_active, delta):
+    field = stats.match_field(is_active)
+    stats.adjust(match.investor_id, **{field: delta})
+    stats.adjust(match.founder_id, **{field: delta})
+
+
+@receiver(post_save, sender=Match)
+def count_match_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    if created or previous is None:
+        _adjust_match(instance, instance.is_active, 1)
+    elif previous != instance.is_active:
+        _adjust_match(instance, previous, -1)
+        _adjust_match(instance, instance.is_active, 1)
+
+
+@receiver(post_delete, sender=Match)
+def count_match_deleted(sender, instance, **kwargs):
+    _adjust_match(instance, instance.is_active, -1)
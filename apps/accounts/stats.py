@@ -0,0 +1,133 @@
+"""
+Incrementally maintained per-user stats (UserStats).
+
+Events adjust the counters with F() UPDATEs; a user without a row gets
+one computed from the raw tables the first time it is read, and the
+nightly reconciliation rewrites every row from grouped aggregates.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from .models import User, UserStats
+
+COUNTER_FIELDS = [
+    'video_count', 'total_views', 'total_likes',
+    'interested_count', 'maybe_count', 'pass_count',
+    'active_matches', 'pending_matches',
+]
+
+SIGNAL_FIELDS = {
+    'interested': 'interested_count',
+    'maybe': 'maybe_count',
+    'pass': 'pass_count',
+}
+
+
+def match_field(is_active):
+    return 'active_matches' if is_active else 'pending_matches'
+
+
+def adjust(user_id, **deltas):
+    """Apply counter deltas to a user's stats row (no-op if it doesn't exist yet)"""
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if changes and user_id is not None:
+        UserStats.objects.filter(user_id=user_id).update(**changes)
+
+
+def compute(user_id):
+    """Count a single user's stats from the raw tables"""
+    from apps.videos.models import Video, VideoLike, VideoView
+    from apps.signals.models import Signal
+    from apps.matches.models import Match
+
+    user = User.objects.only('role').get(id=user_id)
+    signals = Signal.objects.filter(**{'founder_id' if user.role == 'founder' else 'investor_id': user_id})
+    signal_counts = dict(signals.values_list('type').annotate(n=Count('id')).order_by())
+
+    matches = Match.objects.filter(Q(founder_id=user_id) | Q(investor_id=user_id)).aggregate(
+        active=Count('id', filter=Q(is_active=True)),
+        pending=Count('id', filter=Q(is_active=False)),
+    )
+
+    return {
+        'video_count': Video.objects.filter(founder_id=user_id).count(),
+        'total_views': VideoView.objects.filter(video__founder_id=user_id).count(),
+        'total_likes': VideoLike.objects.filter(video__founder_id=user_id).count(),
+        'interested_count': signal_counts.get('interested', 0),
+        'maybe_count': signal_counts.get('maybe', 0),
+        'pass_count': signal_counts.get('pass', 0),
+        'active_matches': matches['active'],
+        'pending_matches': matches['pending'],
+    }
+
+
+def get_stats(user_id):
+    """Return the user's UserStats row, building it on first access"""
+    stats = UserStats.objects.filter(user_id=user_id).first()
+    if stats is not None:
+        return stats
+
+    try:
+        with transaction.atomic():
+            return UserStats.objects.create(user_id=user_id, **compute(user_id))
+    except IntegrityError:
+        # Built concurrently by another request
+        return UserStats.objects.get(user_id=user_id)
+
+
+def compute_all():
+    """{user_id: {field: value}} for every user, from grouped aggregates"""
+    from apps.videos.models import Video, VideoLike, VideoView
+    from apps.signals.models import Signal
+    from apps.matches.models import Match
+
+    roles = dict(User.objects.values_list('id', 'role'))
+    stats = {user_id: dict.fromkeys(COUNTER_FIELDS, 0) for user_id in roles}
+
+    def fill(rows, key, field):
+        for row in rows:
+            stats[row[key]][field] += row['n']
+
+    fill(Video.objects.values('founder_id').annotate(n=Count('id')).order_by(), 'founder_id', 'video_count')
+    fill(VideoView.objects.values('video__founder_id').annotate(n=Count('id')).order_by(), 'video__founder_id', 'total_views')
+    fill(VideoLike.objects.values('video__founder_id').annotate(n=Count('id')).order_by(), 'video__founder_id', 'total_likes')
+
+    for side in ['founder_id', 'investor_id']:
+        for row in Signal.objects.values(side, 'type').annotate(n=Count('id')).order_by():
+            # Founders count received signals, investors count sent ones
+            if (roles[row[side]] == 'founder') == (side == 'founder_id'):
+                stats[row[side]][SIGNAL_FIELDS[row['type']]] += row['n']
+
+        rows = Match.objects.values(side, 'is_active').annotate(n=Count('id')).order_by()
+        for row in rows:
+            stats[row[side]][match_field(row['is_active'])] += row['n']
+
+    return stats
+
+
+def reconcile(batch_size=1000):
+    """
+    Rewrite every user's stats from the raw tables.
+    Returns (rows written, rows that had drifted).
+    """
+    expected = compute_all()
+    current = {
+        row['user_id']: row
+        for row in UserStats.objects.values('user_id', *COUNTER_FIELDS)
+    }
+
+    drifted = 0
+    rows = []
+    for user_id, values in expected.items():
+        existing = current.get(user_id)
+        if existing is not None and any(existing[f] != values[f] for f in COUNTER_FIELDS):
+            drifted += 1
+        rows.append(UserStats(user_id=user_id, **values))
+
+    UserStats.objects.bulk_create(
+        rows,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=COUNTER_FIELDS,
+    )
+    return len(rows), drifted
@@ -0,0 +1,68 @@
+import importlib.util
+import fakeredis
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory
+from .authentication import TokenAuthentication
+from .models import User
+from . import token_cache
+
+
+def _worker_token_cache():
+    """
+    A separate copy of the token_cache module with its own LRU and its own
+    connection to the auth cache - what another worker process would have.
+    """
+    spec = importlib.util.find_spec(token_cache.__name__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.cache = caches.create_connection('auth')
+    return module
+
+
+class SharedTokenCacheTests(TestCase):
+    def setUp(self):
+        # Both "workers" talk to one (fake) Redis, each through its own client
+        server = fakeredis.FakeServer()
+        auth_cache = {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': 'redis://localhost:6379/0',
+            'KEY_PREFIX': 'ikonetu:auth',
+            'OPTIONS': {'connection_class': fakeredis.FakeConnection, 'server': server},
+        }
+        settings_override = override_settings(CACHES={**settings.CACHES, 'auth': auth_cache})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='founder@example.com', password='pw-12345', name='Founder')
+        token_cache.local_cache.clear()
+        self.addCleanup(token_cache.local_cache.clear)
+        self.other_worker = _worker_token_cache()
+
+    def _authenticate(self, token):
+        request = APIRequestFactory().get('/api/auth/me', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return TokenAuthentication().authenticate(request)
+
+    def test_token_issued_by_one_worker_is_accepted_by_another(self):
+        self.other_worker.store_token('token-a', self.user)
+
+        with self.assertNumQueries(0):
+            user, token = self._authenticate('token-a')
+
+        self.assertEqual(user.id, self.user.id)
+        self.assertEqual(token, 'token-a')
+
+    def test_revoked_token_is_rejected_everywhere(self):
+        self.other_worker.store_token('token-b', self.user)
+        self.other_worker.revoke_token('token-b')
+
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate('token-b')
+
+        # ...and the other way round
+        token_cache.store_token('token-c', self.user)
+        token_cache.revoke_token('token-c')
+
+        self.assertIsNone(self.other_worker.get_user('token-c'))
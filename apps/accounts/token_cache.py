@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from config.caches import auth_cache as cache
+
+User = get_user_model()
+
+AUTH_TOKEN_TIMEOUT = 604800  # 7 days
+
+
+def _token_key(token):
+    return f'auth_token:{token}'
+
+
+def _user_key(user_id):
+    return f'auth_user:{user_id}'
+
+
+class _LocalLRU:
+    """
+    Small per-process LRU mapping token -> user snapshot.
+    Entries expire after a short TTL so revocations made by other
+    processes are picked up quickly.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._data.get(token)
+            if entry is None:
+                return None
+            expires_at, snapshot = entry
+            if expires_at < time.monotonic():
+                del self._data[token]
+                return None
+            self._data.move_to_end(token)
+            return snapshot
+
+    def set(self, token, snapshot):
+        with self._lock:
+            self._data[token] = (time.monotonic() + self.ttl, snapshot)
+            self._data.move_to_end(token)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, token):
+        with self._lock:
+            self._data.pop(token, None)
+
+    def delete_user(self, user_id):
+        user_id = str(user_id)
+        with self._lock:
+            stale = [t for t, (_, snap) in self._data.items() if str(snap['id']) == user_id]
+            for token in stale:
+                del self._data[token]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = _LocalLRU(
+    max_size=getattr(settings, 'AUTH_TOKEN_LRU_SIZE', 1024),
+    ttl=getattr(settings, 'AUTH_TOKEN_LRU_TTL', 30),
+)
+
+
+# Never cached: the hash stays out of Redis, and a user rebuilt from a
+# snapshot leaves it deferred, so a stale copy can't write it back
+_EXCLUDED_FIELDS = ('password',)
+
+
+def _snapshot(user):
+    """
+    Concrete field values minus the password hash. The snapshot can be up
+    to AUTH_TOKEN_LRU_TTL stale on other processes, so views must save
+    cached users with update_fields.
+    """
+    return {
+        f.attname: getattr(user, f.attname)
+        for f in User._meta.concrete_fields
+        if f.attname not in _EXCLUDED_FIELDS
+    }
+
+
+def _from_snapshot(snapshot):
+    """Build a fresh User instance per request - snapshots are never shared"""
+    return User.from_db('default', list(snapshot.keys()), list(snapshot.values()))
+
+
+def store_token(token, user):
+    """Issue a token for user and warm both cache levels"""
+    snapshot = _snapshot(user)
+    cache.set_many({
+        _token_key(token): user.id,
+        _user_key(user.id): snapshot,
+    }, timeout=AUTH_TOKEN_TIMEOUT)
+    local_cache.set(token, snapshot)
+
+
+def get_user(token):
+    """
+    Resolve a token to a User.
+    Local LRU hit: no I/O. Shared cache hit: no DB query.
+    Returns None for unknown/expired tokens or deleted users.
+    """
+    snapshot = local_cache.get(token)
+
+    if snapshot is None:
+        user_id = cache.get(_token_key(token))
+        if not user_id:
+            return None
+
+        snapshot = cache.get(_user_key(user_id))
+        if snapshot is None:
+            try:
+                user = User.objects.get(id=user_id)
+            except User.DoesNotExist:
+                return None
+            snapshot = _snapshot(user)
+            cache.set(_user_key(user_id), snapshot, timeout=AUTH_TOKEN_TIMEOUT)
+
+        local_cache.set(token, snapshot)
+
+    return _from_snapshot(snapshot)
+
+
+def revoke_token(token):
+    """Remove a token from both cache levels (logout)"""
+    cache.delete(_token_key(token))
+    local_cache.delete(token)
+
+
+def invalidate_user(user_id):
+    """Drop cached snapshots for a user after it changes (save, deactivation)"""
+    cache.delete(_user_key(user_id))
+    local_cache.delete_user(user_id)
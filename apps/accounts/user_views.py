@@ -11,6 +11,6 @@ def onboarding_complete_view(request):
     """
     user = request.user
     user.onboarding_complete = True
-    user.save()
+    user.save(update_fields=['onboarding_complete'])
     
     return Response({'success': True})
\ No newline at end of file
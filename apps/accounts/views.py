@@ -3,7 +3,6 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from django.contrib.auth import authenticate
-from django.core.cache import cache
 from django.utils import timezone
 from apps.videos.models import Video, VideoLike, VideoView
 from apps.profiles.models import FounderProfile, InvestorProfile
@@ -11,6 +10,7 @@ from apps.profiles.serializers import FounderProfileSerializer, InvestorProfileS
 from .serializers import RegisterSerializer, UserSerializer
 from .models import User, EmailVerification
 from .email_service import EmailService
+from . import token_cache
 
 from django.http import FileResponse, Http404
 from django.conf import settings
@@ -90,7 +90,7 @@ def login_view(request):
     
     # Generate token and store in cache
     token = generate_token()
-    cache.set(f'auth_token:{token}', user.id, timeout=604800)  # 7 days
+    token_cache.store_token(token, user)
     
     user_serializer = UserSerializer(user)
     return Response({
@@ -108,7 +108,7 @@ def logout_view(request):
     # Remove token from cache
     token = request.headers.get('Authorization', '').replace('Bearer ', '')
     if token:
-        cache.delete(f'auth_token:{token}')
+        token_cache.revoke_token(token)
     
     return Response({'message': 'Logged out successfully'})
 
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.analytics import rollups
+
+
+class Command(BaseCommand):
+    help = 'Build analytics rollups for historical data, one chunk at a time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='First day to process (YYYY-MM-DD, UTC)')
+        parser.add_argument('--days', type=int, default=90, help='Days back from today when --since is not given')
+        parser.add_argument('--chunk-days', type=int, default=1, help='Days recomputed per transaction')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        if options['since']:
+            try:
+                start = datetime.strptime(options['since'], '%Y-%m-%d').replace(tzinfo=dt_timezone.utc)
+            except ValueError:
+                raise CommandError('--since must be YYYY-MM-DD')
+        else:
+            start = rollups.floor_day(now) - timedelta(days=options['days'])
+
+        chunk = timedelta(days=max(1, options['chunk_days']))
+        total = 0
+
+        while start < now:
+            end = min(start + chunk, now)
+            total += rollups.rollup_range(start, end)
+            self.stdout.write(f'{start:%Y-%m-%d} done ({total} hourly buckets so far)')
+            start = end
+
+        self.stdout.write(self.style.SUCCESS(f'Backfill complete: {total} hourly buckets'))
@@ -0,0 +1,17 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.analytics import rollups
+
+
+class Command(BaseCommand):
+    help = 'Refresh analytics rollups for the most recent hours (run every few minutes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=2, help='How many trailing hours to recompute')
+
+    def handle(self, *args, **options):
+        end = timezone.now()
+        start = end - timedelta(hours=options['hours'])
+        buckets = rollups.rollup_range(start, end)
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {buckets} hourly buckets since {start:%Y-%m-%d %H:00}'))
@@ -0,0 +1,50 @@
+import uuid
+from django.db import models
+
+# scope_id used for platform-wide buckets
+PLATFORM_ID = uuid.UUID(int=0)
+
+
+class AnalyticsBucket(models.Model):
+    """
+    Event count for one metric, one scope (a video, a founder or the whole
+    platform) and one hour or day. Written by apps/analytics/rollups.py;
+    time-series endpoints read only from here.
+    """
+    GRANULARITY_CHOICES = [
+        ('hour', 'Hourly'),
+        ('day', 'Daily'),
+    ]
+
+    SCOPE_CHOICES = [
+        ('video', 'Video'),
+        ('founder', 'Founder'),
+        ('platform', 'Platform'),
+    ]
+
+    METRIC_CHOICES = [
+        ('views', 'Video Views'),
+        ('likes', 'Video Likes'),
+        ('signals_interested', 'Interested Signals'),
+        ('signals_maybe', 'Maybe Signals'),
+        ('signals_pass', 'Pass Signals'),
+        ('matches', 'Matches'),
+    ]
+
+    granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES)
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES)
+    scope_id = models.UUIDField(default=PLATFORM_ID)
+    metric = models.CharField(max_length=30, choices=METRIC_CHOICES)
+    bucket_start = models.DateTimeField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'analytics_buckets'
+        unique_together = ('granularity', 'scope', 'scope_id', 'metric', 'bucket_start')
+        indexes = [
+            # Rollup rewrites delete by time range
+            models.Index(fields=['granularity', 'bucket_start']),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.scope}:{self.scope_id} {self.granularity} {self.bucket_start:%Y-%m-%d %H:00} = {self.count}"
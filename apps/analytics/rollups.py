@@ -0,0 +1,133 @@
+"""
+Hourly and daily rollups of video views/likes, signals and matches.
+
+Rollups are recomputed per time range from the raw tables: hourly buckets
+come from one GROUP BY per source, daily buckets are sums of the hourly
+ones. Each range is rewritten in a single transaction (delete + insert),
+so re-running a range is always safe - the recent job and the backfill
+share the same code.
+"""
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from apps.videos.models import VideoLike, VideoView
+from apps.signals.models import Signal
+from apps.matches.models import Match
+from .models import AnalyticsBucket, PLATFORM_ID
+
+
+def _sources():
+    """(metric, queryset, video field, founder field) for every raw event table"""
+    sources = [
+        ('views', VideoView.objects.all(), 'video_id', 'video__founder_id'),
+        ('likes', VideoLike.objects.all(), 'video_id', 'video__founder_id'),
+        ('matches', Match.objects.all(), None, 'founder_id'),
+    ]
+    for signal_type, _ in Signal.SIGNAL_CHOICES:
+        sources.append((f'signals_{signal_type}', Signal.objects.filter(type=signal_type), 'video_id', 'founder_id'))
+    return sources
+
+
+def floor_hour(value):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def floor_day(value):
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def hourly_counts(start, end):
+    """{(scope, scope_id, metric, bucket_start): count} for events in [start, end)"""
+    counts = defaultdict(int)
+
+    for metric, queryset, video_field, founder_field in _sources():
+        group_by = [f for f in (video_field, founder_field) if f]
+        rows = (
+            queryset.filter(created_at__gte=start, created_at__lt=end)
+            .annotate(bucket=TruncHour('created_at', tzinfo=dt_timezone.utc))
+            .values('bucket', *group_by)
+            .annotate(n=Count('id'))
+            .order_by()
+        )
+        for row in rows:
+            bucket, n = row['bucket'], row['n']
+            if video_field:
+                counts[('video', row[video_field], metric, bucket)] += n
+            counts[('founder', row[founder_field], metric, bucket)] += n
+            counts[('platform', PLATFORM_ID, metric, bucket)] += n
+
+    return counts
+
+
+def _rewrite(granularity, start, end, counts):
+    AnalyticsBucket.objects.filter(
+        granularity=granularity,
+        bucket_start__gte=start,
+        bucket_start__lt=end
+    ).delete()
+    AnalyticsBucket.objects.bulk_create([
+        AnalyticsBucket(
+            granularity=granularity,
+            scope=scope,
+            scope_id=scope_id,
+            metric=metric,
+            bucket_start=bucket_start,
+            count=n,
+        )
+        for (scope, scope_id, metric, bucket_start), n in counts.items()
+    ], batch_size=1000)
+
+
+def rollup_range(start, end):
+    """
+    Recompute hourly buckets for [start, end) and daily buckets for every
+    day the range touches. Returns the number of hourly buckets written.
+    """
+    start, end = floor_hour(start), floor_hour(end - timedelta(microseconds=1)) + timedelta(hours=1)
+    day_start, day_end = floor_day(start), floor_day(end - timedelta(microseconds=1)) + timedelta(days=1)
+
+    hourly = hourly_counts(start, end)
+
+    with transaction.atomic():
+        _rewrite('hour', start, end, hourly)
+
+        # Days are sums of their (now current) hours, including hours
+        # outside this range that an earlier run already wrote
+        rows = (
+            AnalyticsBucket.objects.filter(granularity='hour', bucket_start__gte=day_start, bucket_start__lt=day_end)
+            .annotate(day=TruncDay('bucket_start', tzinfo=dt_timezone.utc))
+            .values('scope', 'scope_id', 'metric', 'day')
+            .annotate(n=Sum('count'))
+            .order_by()
+        )
+        daily = {(row['scope'], row['scope_id'], row['metric'], row['day']): row['n'] for row in rows}
+        _rewrite('day', day_start, day_end, daily)
+
+    return len(hourly)
+
+
+def time_series(scope, scope_id, metric, granularity, start, end):
+    """Zero-filled [(bucket_start, count)] for [start, end) from the rollups"""
+    step = timedelta(hours=1) if granularity == 'hour' else timedelta(days=1)
+    floor = floor_hour if granularity == 'hour' else floor_day
+    start = floor(start)
+
+    stored = dict(
+        AnalyticsBucket.objects.filter(
+            granularity=granularity,
+            scope=scope,
+            scope_id=scope_id,
+            metric=metric,
+            bucket_start__gte=start,
+            bucket_start__lt=end,
+        ).values_list('bucket_start', 'count')
+    )
+
+    series = []
+    bucket = start
+    while bucket < end:
+        series.append((bucket, stored.get(bucket, 0)))
+        bucket += step
+    return series
@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('me/', views.my_series_view, name='analytics-me'),
+    path('videos/<uuid:video_id>/', views.video_series_view, name='analytics-video'),
+    path('platform/', views.platform_series_view, name='analytics-platform'),
+]
@@ -0,0 +1,82 @@
+from datetime import timedelta
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+from django.utils import timezone
+from .models import AnalyticsBucket, PLATFORM_ID
+from .rollups import time_series
+from apps.videos.models import Video
+
+METRICS = [metric for metric, _ in AnalyticsBucket.METRIC_CHOICES]
+
+# Longest window per granularity (keeps responses bounded)
+MAX_SPAN = {
+    'hour': timedelta(days=14),
+    'day': timedelta(days=365),
+}
+
+
+def _series_response(request, scope, scope_id):
+    """
+    ?metric= (views, likes, signals_*, matches), ?granularity=hour|day,
+    ?days= window ending now (default 30).
+    """
+    metric = request.GET.get('metric', 'views')
+    granularity = request.GET.get('granularity', 'day')
+
+    if metric not in METRICS:
+        return Response({'message': f'metric must be one of {", ".join(METRICS)}'}, status=status.HTTP_400_BAD_REQUEST)
+    if granularity not in MAX_SPAN:
+        return Response({'message': 'granularity must be hour or day'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        span = timedelta(days=int(request.GET.get('days', 30)))
+    except ValueError:
+        return Response({'message': 'days must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+    span = max(timedelta(days=1), min(span, MAX_SPAN[granularity]))
+
+    end = timezone.now()
+    series = time_series(scope, scope_id, metric, granularity, end - span, end)
+
+    return Response({
+        'metric': metric,
+        'granularity': granularity,
+        'series': [{'bucket': bucket.isoformat(), 'count': count} for bucket, count in series],
+        'total': sum(count for _, count in series),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def video_series_view(request, video_id):
+    """Time series for one video (its founder or admins)"""
+    try:
+        video = Video.objects.only('founder_id').get(id=video_id)
+    except Video.DoesNotExist:
+        return Response({'message': 'Video not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if video.founder_id != request.user.id and request.user.role != 'admin':
+        return Response({'message': 'Not allowed'}, status=status.HTTP_403_FORBIDDEN)
+
+    return _series_response(request, 'video', video.id)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def my_series_view(request):
+    """Time series across all of the current founder's videos"""
+    if request.user.role != 'founder':
+        return Response({'message': 'Only founders have analytics'}, status=status.HTTP_403_FORBIDDEN)
+
+    return _series_response(request, 'founder', request.user.id)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def platform_series_view(request):
+    """Platform-wide time series (admin only)"""
+    if request.user.role != 'admin':
+        return Response({'message': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
+
+    return _series_response(request, 'platform', PLATFORM_ID)
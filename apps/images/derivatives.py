@@ -0,0 +1,162 @@
+"""
+Size variants for avatars and video thumbnails.
+
+Every uploaded avatar and every video poster is queued here. The
+process_image_derivatives worker renders IMAGE_DERIVATIVE_SIZES (longest
+side, never upscaled) as WebP and JPEG and stores them under
+`images/<sha256 of the source>/<size>.<ext>`. The keys are
+content-addressed, so they never change content: they are served with an
+immutable Cache-Control (config.storage.MediaStorage), and re-uploading
+the same image rewrites the same keys.
+
+The variant list is written onto the owning row (`User.avatar_variants`,
+`Video.thumbnail_variants`) together with the URL it was derived from.
+`srcset()` ignores variants whose source isn't the current image, so a
+replaced avatar never shows the old picture while its new variants are
+still queued.
+"""
+import hashlib
+from io import BytesIO
+from django.conf import settings
+from PIL import Image
+from apps.accounts import token_cache
+from config.jobs import JobQueue
+from config.storage import absolute_url, get_store, storage_key
+from .imaging import ImageTooLarge, open_image
+from .models import ImageDerivativeJob
+
+# Bump when sizes or encoder settings change so variants get new keys
+DERIVATIVE_VERSION = 1
+
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+
+class DerivativeError(Exception):
+    """The source can't be turned into variants (retrying won't help)"""
+
+
+def _targets():
+    """kind -> (model, image URL field, variants field)"""
+    from apps.accounts.models import User
+    from apps.videos.models import Video
+
+    return {
+        'avatar': (User, 'avatar_url', 'avatar_variants'),
+        'thumbnail': (Video, 'thumbnail_url', 'thumbnail_variants'),
+    }
+
+
+def render(data):
+    """[(size, format, width, height, encoded bytes)] for one source image"""
+    sizes = sorted(settings.IMAGE_DERIVATIVE_SIZES, reverse=True)
+
+    try:
+        img = open_image(data, sizes[0], settings.IMAGE_MAX_PIXELS)
+    except (OSError, ImageTooLarge, Image.DecompressionBombError) as e:
+        raise DerivativeError(f'Unreadable image: {e}')
+
+    rendered = []
+    # Largest first, each size resized from the previous one
+    for size in sizes:
+        img.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        for fmt, (pil_format, options) in FORMATS.items():
+            output = BytesIO()
+            img.save(output, format=pil_format, **options)
+            rendered.append((size, fmt, img.width, img.height, output.getvalue()))
+    return rendered
+
+
+def variant_key(digest, size, fmt):
+    return f"images/{digest}/{size}.{fmt}"
+
+
+def generate(kind, source_url):
+    """Render and store the variants of one image; returns the variants dict"""
+    key = storage_key(source_url)
+    if key is None:
+        raise DerivativeError(f'Not a media URL: {source_url}')
+
+    store = get_store()
+    data = store.read(key)
+    digest = hashlib.sha256(f'v{DERIVATIVE_VERSION}:'.encode() + data).hexdigest()[:32]
+
+    variants = []
+    for size, fmt, width, height, body in render(data):
+        name = variant_key(digest, size, fmt)
+        # Same digest, same bytes: rewriting is one PUT, cheaper than
+        # checking first and then writing anyway for new images
+        store.put_bytes(name, body, f'image/{fmt}')
+        variants.append({
+            'size': size,
+            'format': fmt,
+            'width': width,
+            'height': height,
+            'url': absolute_url(name, source_url),
+        })
+
+    return {'source': source_url, 'variants': variants}
+
+
+def srcset(variants, current_url):
+    """
+    {'webp': 'url 64w, ...', 'jpeg': '...'} for a <picture>/srcset, or
+    None until variants for the current image exist.
+    """
+    if not current_url or not variants or variants.get('source') != current_url:
+        return None
+
+    result = {}
+    for fmt in FORMATS:
+        by_width = {}
+        for variant in variants.get('variants', []):
+            if variant['format'] == fmt:
+                # Small sources give several sizes the same width
+                by_width.setdefault(variant['width'], variant['url'])
+        result[fmt] = ', '.join(f'{url} {width}w' for width, url in sorted(by_width.items()))
+    return result
+
+
+def enqueue(kind, object_id, source_url):
+    """Queue variants for an image we store; other URLs are left alone"""
+    if storage_key(source_url) is None:
+        return None
+    return ImageDerivativeJob.objects.create(kind=kind, object_id=object_id, source_url=source_url)
+
+
+def enqueue_missing():
+    """Queue every avatar/thumbnail without current variants. Returns the count."""
+    jobs = []
+    for kind, (model, url_field, variants_field) in _targets().items():
+        rows = model.objects.exclude(**{f'{url_field}__isnull': True}).exclude(**{url_field: ''})
+        for object_id, url, variants in rows.values_list('id', url_field, variants_field).iterator():
+            if (variants or {}).get('source') != url and storage_key(url) is not None:
+                jobs.append(ImageDerivativeJob(kind=kind, object_id=object_id, source_url=url))
+    ImageDerivativeJob.objects.bulk_create(jobs, batch_size=1000)
+    return len(jobs)
+
+
+queue = JobQueue(ImageDerivativeJob, 'IMAGE_DERIVATIVE', permanent_errors=(DerivativeError,))
+
+
+def _process_job(job):
+    model, url_field, variants_field = _targets()[job.kind]
+    current = model.objects.filter(id=job.object_id, **{url_field: job.source_url})
+    if not current.exists():
+        return 'skipped'
+
+    variants = generate(job.kind, job.source_url)
+    queue.heartbeat(job)
+
+    # Only if the image is still the one we rendered
+    updated = current.update(**{variants_field: variants})
+    if updated and job.kind == 'avatar':
+        # update() skips post_save; cached users would keep the old variants
+        token_cache.invalidate_user(job.object_id)
+
+
+def process_queued(batch_size=20):
+    """Run one batch of due jobs. Returns (done, failed) counts."""
+    return queue.process(batch_size, _process_job, lambda job: f"Image derivatives failed for {job.kind} {job.object_id}")
@@ -0,0 +1,52 @@
+"""
+Pillow operations that may run in a worker process (apps/images/pool.py).
+
+Nothing here imports Django: pool workers are spawned fresh and only
+import this module, and arguments/results cross the process boundary as
+plain bytes and ints.
+"""
+from io import BytesIO
+from PIL import Image, ImageOps
+
+
+class ImageTooLarge(ValueError):
+    """Pixel count over the limit - refuse before decoding (decompression bombs)"""
+
+
+def flatten(img):
+    """RGB on a white background (JPEG has no alpha)"""
+    if img.mode in ('RGBA', 'LA', 'P'):
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+        return background
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+
+def open_image(data, box, max_pixels):
+    """
+    Decode just enough of an image to produce something at least `box`
+    px on each side: the header is checked against max_pixels first, and
+    JPEGs are decoded at 1/2, 1/4 or 1/8 scale via draft() when that is
+    still big enough.
+    """
+    img = Image.open(BytesIO(data))
+    width, height = img.size
+    if width * height > max_pixels:
+        raise ImageTooLarge(f'Image is {width}x{height}; the limit is {max_pixels} pixels')
+
+    img.draft('RGB', (box, box))
+    return flatten(ImageOps.exif_transpose(img))
+
+
+def render_avatar(data, size, max_pixels):
+    """Uploaded image bytes -> JPEG bytes fitted within size x size"""
+    img = open_image(data, size, max_pixels)
+    img.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+    output = BytesIO()
+    img.save(output, format='JPEG', quality=90, optimize=True)
+    return output.getvalue()
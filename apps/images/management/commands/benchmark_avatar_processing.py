@@ -0,0 +1,88 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image
+from apps.images import pool
+from apps.images.imaging import render_avatar
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    cuts = statistics.quantiles(samples, n=100) if len(samples) > 1 else samples * 99
+    return samples[len(samples) // 2], cuts[98]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure avatar processing latency under concurrent uploads, on the '
+        'request thread vs in the image process pool, plus how long other '
+        '(non-image) requests on the same worker stall meanwhile'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uploads', type=int, default=48)
+        parser.add_argument('--concurrency', type=int, default=8, help='Simultaneous uploads (server threads)')
+        parser.add_argument('--width', type=int, default=4032)
+        parser.add_argument('--height', type=int, default=3024)
+
+    def _sample(self, width, height):
+        """A phone-sized JPEG that doesn't compress to nothing"""
+        img = Image.effect_noise((width, height), 64).convert('RGB')
+        output = BytesIO()
+        img.save(output, format='JPEG', quality=90)
+        return output.getvalue()
+
+    def _run(self, process, data, uploads, concurrency):
+        """(upload latencies, other-request latencies) in ms"""
+        upload_ms, other_ms = [], []
+        done = threading.Event()
+
+        def other_requests():
+            # Stand-in for cheap requests sharing the worker: a little pure
+            # Python that needs the GIL, timed end to end
+            while not done.is_set():
+                start = time.perf_counter()
+                sum(i * i for i in range(20000))
+                other_ms.append((time.perf_counter() - start) * 1000)
+                time.sleep(0.002)
+
+        def upload(_):
+            start = time.perf_counter()
+            process(render_avatar, data, 400, settings.IMAGE_MAX_PIXELS)
+            upload_ms.append((time.perf_counter() - start) * 1000)
+
+        probe = threading.Thread(target=other_requests)
+        probe.start()
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(upload, range(uploads)))
+        done.set()
+        probe.join()
+        return upload_ms, other_ms
+
+    def handle(self, *args, **options):
+        data = self._sample(options['width'], options['height'])
+        self.stdout.write(
+            f"{options['uploads']} uploads of a {options['width']}x{options['height']} JPEG "
+            f"({len(data) // 1024} KB), {options['concurrency']} at a time, "
+            f"{settings.IMAGE_POOL_WORKERS} pool workers"
+        )
+
+        # Warm the pool so process start-up isn't counted
+        pool.run(render_avatar, data, 400, settings.IMAGE_MAX_PIXELS)
+
+        modes = [
+            ('request thread', lambda fn, *a: fn(*a)),
+            ('process pool', pool.run),
+        ]
+        for label, process in modes:
+            upload_ms, other_ms = self._run(process, data, options['uploads'], options['concurrency'])
+            upload_p50, upload_p99 = _percentiles(upload_ms)
+            other_p50, other_p99 = _percentiles(other_ms)
+            self.stdout.write(
+                f'  {label:15} upload p50 {upload_p50:7.1f} ms  p99 {upload_p99:7.1f} ms  |  '
+                f'other requests p50 {other_p50:6.1f} ms  p99 {other_p99:6.1f} ms'
+            )
@@ -0,0 +1,20 @@
+from config.jobs import WorkerCommand
+from apps.images import derivatives
+
+
+class Command(WorkerCommand):
+    help = 'Render avatar/thumbnail size variants (runs as a long-lived worker unless --once is given)'
+    default_batch_size = 20
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--backfill', action='store_true',
+                            help='First queue every avatar/thumbnail that has no current variants')
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            self.stdout.write(f'Queued {derivatives.enqueue_missing()} images')
+        super().handle(*args, **options)
+
+    def process_batch(self, batch_size):
+        return derivatives.process_queued(batch_size)
@@ -0,0 +1,45 @@
+import uuid
+from django.db import models
+from django.utils import timezone
+
+
+class ImageDerivativeJob(models.Model):
+    """
+    Resize queue - each row derives the WebP/JPEG size variants of one
+    avatar or video thumbnail (apps/images/derivatives.py), run by the
+    process_image_derivatives worker.
+    """
+    KIND_CHOICES = [
+        ('avatar', 'Avatar'),
+        ('thumbnail', 'Video thumbnail'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+        ('skipped', 'Skipped'),  # Image replaced before the job ran
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.UUIDField()  # User for avatars, Video for thumbnails
+    source_url = models.URLField(max_length=500)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'image_derivative_jobs'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} ({self.status})"
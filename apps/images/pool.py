@@ -0,0 +1,77 @@
+"""
+Bounded process pool for CPU-heavy image work done inside a request.
+
+Decoding and resizing hold the GIL, so doing them on the request thread
+stalls every other request on the same worker. `run()` hands the call to
+a small ProcessPoolExecutor and waits for the result. The request still
+gets its answer, but the waiting thread releases the GIL.
+
+At most IMAGE_POOL_WORKERS + IMAGE_POOL_QUEUE calls are in flight
+(including ones whose caller gave up after IMAGE_POOL_TIMEOUT); past
+that, `run()` raises PoolBusy rather than queueing without bound.
+IMAGE_POOL_WORKERS=0 runs calls inline (development, single-threaded
+servers).
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+
+
+class PoolBusy(Exception):
+    """Every worker and queue slot is taken"""
+
+
+_executor = None
+_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(1, settings.IMAGE_POOL_WORKERS + settings.IMAGE_POOL_QUEUE))
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                # spawn, not fork: forking a threaded server can copy held locks
+                _executor = ProcessPoolExecutor(
+                    max_workers=settings.IMAGE_POOL_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+    return _executor
+
+
+def _reset_executor(broken):
+    global _executor
+    with _lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def run(fn, *args):
+    """Call fn(*args) in the pool and return its result (fn must be picklable)"""
+    if settings.IMAGE_POOL_WORKERS <= 0:
+        return fn(*args)
+
+    if not _slots.acquire(timeout=settings.IMAGE_POOL_WAIT):
+        raise PoolBusy('Image processing is busy, please retry')
+    try:
+        executor = _get_executor()
+        future = executor.submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    # Free the slot when the job ends, not when we stop waiting: a call
+    # that timed out keeps its worker busy and still counts against the bound
+    future.add_done_callback(lambda _: _slots.release())
+
+    try:
+        return future.result(timeout=settings.IMAGE_POOL_TIMEOUT)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed) - start a fresh pool next time
+        _reset_executor(executor)
+        raise
+    except FuturesTimeoutError:
+        future.cancel()  # Only helps if it hasn't started yet
+        raise
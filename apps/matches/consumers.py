@@ -1,11 +1,46 @@
 import json
+from dataclasses import dataclass
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.db.models import Q
 from django.utils import timezone
-from django.core.cache import cache
 from .models import Match, Message
+from . import presence
 from apps.accounts.models import User
 from apps.notifications.services import NotificationService
+from apps.notifications import counters
+
+
+@dataclass(frozen=True)
+class MatchSnapshot:
+    """
+    Read-only view of a match taken when a chat socket connects.
+    Holds the participants so per-message work doesn't hit the DB again.
+    """
+    match: Match
+    investor_id: str
+    founder_id: str
+    investor_name: str
+    founder_name: str
+
+    @classmethod
+    def from_match(cls, match):
+        return cls(
+            match=match,
+            investor_id=str(match.investor_id),
+            founder_id=str(match.founder_id),
+            investor_name=match.investor.name,
+            founder_name=match.founder.name,
+        )
+
+    def has_participant(self, user_id):
+        return str(user_id) in (self.investor_id, self.founder_id)
+
+    def other_user_id(self, user_id):
+        return self.founder_id if str(user_id) == self.investor_id else self.investor_id
+
+    def name_of(self, user_id):
+        return self.investor_name if str(user_id) == self.investor_id else self.founder_name
 
 
 class ChatConsumer(AsyncWebsocketConsumer):
@@ -20,17 +55,20 @@ class ChatConsumer(AsyncWebsocketConsumer):
         self.match_id = self.scope['url_route']['kwargs']['match_id']
         self.room_group_name = f'chat_{self.match_id}'
         self.user = self.scope['user']
+        self.in_chat = False
 
         if not self.user.is_authenticated:
             await self.close()
             return
 
-        match_data = await self.verify_match_access()
-        if not match_data:
+        # Snapshot is kept for the life of the connection and only dropped
+        # when a match_status_update arrives for this match
+        self.match_snapshot = await self.verify_match_access()
+        if not self.match_snapshot:
             await self.close()
             return
         
-        self.other_user_id = match_data['other_user_id']
+        self.other_user_id = self.match_snapshot.other_user_id(self.user.id)
 
         await self.channel_layer.group_add(
             self.room_group_name,
@@ -39,6 +77,11 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
         await self.accept()
 
+        # While this socket is open the user sees new messages live, so
+        # message notifications for this match are suppressed
+        presence.enter_chat(self.match_id, self.user.id)
+        self.in_chat = True
+
         # Mark messages as delivered and broadcast status updates
         delivered_ids = await self.mark_messages_delivered()
         
@@ -54,6 +97,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection"""
+        if self.in_chat:
+            presence.leave_chat(self.match_id, self.user.id)
+
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
@@ -70,10 +116,17 @@ class ChatConsumer(AsyncWebsocketConsumer):
             if not content or len(content) > 5000:
                 return
 
+            # Snapshot was invalidated (match accepted/unmatched) - re-verify once
+            if self.match_snapshot is None:
+                self.match_snapshot = await self.verify_match_access()
+                if not self.match_snapshot:
+                    await self.close()
+                    return
+
             message = await self.save_message(content)
             
             # Check if other user is online to determine initial status
-            is_other_user_online = cache.get(f'user_online_global_{self.other_user_id}', False)
+            is_other_user_online = presence.is_online(self.other_user_id)
             initial_status = 'delivered' if is_other_user_online else 'sent'
             
             # Update message status if delivered
@@ -144,6 +197,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 )
         
         elif message_type == 'ping':
+            presence.refresh_chat(self.match_id, self.user.id)
             await self.send(text_data=json.dumps({
                 'type': 'pong'
             }))
@@ -178,52 +232,63 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 'is_typing': event['is_typing'],
             }))
 
+    async def match_status_update(self, event):
+        """Drop the cached match snapshot when the match is accepted or unmatched"""
+        if event['match_id'] != str(self.match_id):
+            return
+
+        self.match_snapshot = None
+
+        if not event['is_active']:
+            await self.send(text_data=json.dumps({
+                'type': 'match_status_update',
+                'match_id': event['match_id'],
+                'is_active': False,
+            }))
+            await self.close()
+
     @database_sync_to_async
     def create_message_notification_async(self, message):
         """Create notification for new message - async and non-blocking"""
-        from apps.matches.models import Match
-        
+        snapshot = self.match_snapshot
+        if snapshot is None:
+            return
+
         try:
-            match = Match.objects.select_related('investor', 'founder').get(id=self.match_id)
             # This runs in a thread pool, won't block WebSocket
-            NotificationService.create_message_notification(message, match)
+            NotificationService.create_message_notification(message, snapshot.match)
         except Exception as e:
             # Log but don't fail the message delivery
             print(f"Failed to create notification: {e}")
 
     @database_sync_to_async
     def verify_match_access(self):
-        """Verify user has access to this match and return other user's ID"""
+        """Verify user has access to this match and return a MatchSnapshot"""
         try:
-            match = Match.objects.get(
+            match = Match.objects.select_related('investor', 'founder').get(
                 id=self.match_id,
                 is_active=True
             )
-            is_investor = match.investor_id == self.user.id
-            is_founder = match.founder_id == self.user.id
-            
-            if not (is_investor or is_founder):
-                return None
-            
-            other_user_id = match.founder_id if is_investor else match.investor_id
-            
-            return {
-                'valid': True,
-                'other_user_id': other_user_id
-            }
         except Match.DoesNotExist:
             return None
 
+        snapshot = MatchSnapshot.from_match(match)
+        if not snapshot.has_participant(self.user.id):
+            return None
+
+        return snapshot
+
     @database_sync_to_async
     def save_message(self, content):
         """Save message to database"""
-        match = Match.objects.get(id=self.match_id)
+        # Access was verified on connect - no need to re-fetch the Match row
         message = Message.objects.create(
-            match=match,
+            match_id=self.match_id,
             sender=self.user,
             content=content,
             status='sent'
         )
+        counters.adjust(counters.MESSAGES, self.other_user_id, 1)
         return message
 
     @database_sync_to_async
@@ -260,14 +325,14 @@ class ChatConsumer(AsyncWebsocketConsumer):
     @database_sync_to_async
     def mark_message_read(self, message_id):
         """Mark message as read"""
-        try:
-            message = Message.objects.get(id=message_id)
-            if message.sender_id != self.user.id:
-                message.status = 'read'
-                message.read_at = timezone.now()
-                message.save(update_fields=['status', 'read_at'])
-        except Message.DoesNotExist:
-            pass
+        updated = Message.objects.filter(
+            id=message_id,
+            status__in=['sent', 'delivered']
+        ).exclude(sender=self.user).update(
+            status='read',
+            read_at=timezone.now()
+        )
+        counters.adjust(counters.MESSAGES, self.user.id, -updated)
 
     @database_sync_to_async
     def mark_all_messages_read(self):
@@ -279,10 +344,11 @@ class ChatConsumer(AsyncWebsocketConsumer):
         
         message_ids = list(messages.values_list('id', flat=True))
         
-        messages.update(
+        updated = messages.update(
             status='read',
             read_at=timezone.now()
         )
+        counters.adjust(counters.MESSAGES, self.user.id, -updated)
         
         return message_ids
 
@@ -327,9 +393,12 @@ class PresenceConsumer(AsyncWebsocketConsumer):
         await self.accept()
 
         # Set global online status (no timeout - must be explicitly cleared)
-        cache.set(f'user_online_global_{self.user_id}', True, timeout=None)
+        presence.set_online(self.user_id)
 
-        match_ids = await self.get_user_matches()
+        # {match_id: other_user_id} for the life of the connection, replaced
+        # (never mutated) by match_status_update when a match is accepted/unmatched
+        self.match_snapshot = await self.get_user_matches()
+        match_ids = list(self.match_snapshot)
 
         # Join presence groups for all matches
         for match_id in match_ids:
@@ -350,7 +419,7 @@ class PresenceConsumer(AsyncWebsocketConsumer):
             )
 
         # Mark all undelivered messages to this user as delivered
-        delivered_message_ids = await self.mark_all_undelivered_messages()
+        delivered_message_ids = await self.mark_all_undelivered_messages(match_ids)
         
         # Broadcast delivery status to both chat rooms AND presence groups
         for match_id, message_ids in delivered_message_ids.items():
@@ -385,9 +454,9 @@ class PresenceConsumer(AsyncWebsocketConsumer):
             return
 
         # Clear global online status
-        cache.delete(f'user_online_global_{user_id}')
+        presence.set_offline(user_id)
 
-        match_ids = await self.get_user_matches()
+        match_ids = list(getattr(self, 'match_snapshot', {}))
 
         # Broadcast offline
         for match_id in match_ids:
@@ -480,12 +549,9 @@ class PresenceConsumer(AsyncWebsocketConsumer):
 
     async def send_initial_statuses(self, match_ids):
         """Send initial online status of all matched users"""
-        other_user_ids = await self.get_other_users_from_matches(match_ids)
+        other_user_ids = [self.match_snapshot[match_id] for match_id in match_ids]
         
-        statuses = {}
-        for user_id in other_user_ids:
-            is_online = cache.get(f'user_online_global_{user_id}', False)
-            statuses[user_id] = is_online
+        statuses = presence.get_online_statuses(other_user_ids)
 
         await self.send(text_data=json.dumps({
             'type': 'initial_statuses',
@@ -493,77 +559,74 @@ class PresenceConsumer(AsyncWebsocketConsumer):
         }))
 
     async def match_status_update(self, event):
-        """Send match status update notification"""
+        """Send match status update notification and refresh the match snapshot"""
+        match_id = event['match_id']
+        snapshot = dict(self.match_snapshot)
+
+        if event['is_active'] and match_id not in snapshot:
+            if event.get('investor_id') == self.user_id:
+                other_user_id = event.get('founder_id')
+            else:
+                other_user_id = event.get('investor_id')
+
+            if other_user_id:
+                snapshot[match_id] = other_user_id
+                await self.channel_layer.group_add(
+                    f'match_presence_{match_id}',
+                    self.channel_name
+                )
+        elif not event['is_active'] and match_id in snapshot:
+            del snapshot[match_id]
+            await self.channel_layer.group_discard(
+                f'match_presence_{match_id}',
+                self.channel_name
+            )
+
+        self.match_snapshot = snapshot
+
         await self.send(text_data=json.dumps({
             'type': 'match_status_update',
-            'match_id': event['match_id'],
+            'match_id': match_id,
             'is_active': event['is_active'],
         }))
 
     @database_sync_to_async
     def get_user_matches(self):
-        """Get all match IDs for the current user"""
+        """Get {match_id: other_user_id} for all active matches of the current user"""
         from apps.matches.models import Match
         
         matches = Match.objects.filter(
+            Q(investor_id=self.user.id) | Q(founder_id=self.user.id),
             is_active=True
-        ).filter(
-            investor_id=self.user.id
-        ) | Match.objects.filter(
-            is_active=True,
-            founder_id=self.user.id
-        )
+        ).values_list('id', 'investor_id', 'founder_id')
         
-        return [str(m.id) for m in matches]
+        return {
+            str(match_id): str(founder_id) if str(investor_id) == self.user_id else str(investor_id)
+            for match_id, investor_id, founder_id in matches
+        }
 
     @database_sync_to_async
-    def get_other_users_from_matches(self, match_ids):
-        """Get all other user IDs from matches"""
-        from apps.matches.models import Match
-        
-        matches = Match.objects.filter(id__in=match_ids)
-        other_user_ids = []
-        
-        for match in matches:
-            if str(match.investor_id) == self.user_id:
-                other_user_ids.append(str(match.founder_id))
-            else:
-                other_user_ids.append(str(match.investor_id))
-        
-        return other_user_ids
-
-    @database_sync_to_async
-    def mark_all_undelivered_messages(self):
+    def mark_all_undelivered_messages(self, match_ids):
         """Mark all undelivered messages to this user as delivered across all matches"""
-        from apps.matches.models import Match, Message
+        from apps.matches.models import Message
         
-        # Get all matches for this user
-        matches = Match.objects.filter(
-            is_active=True
-        ).filter(
-            investor_id=self.user.id
-        ) | Match.objects.filter(
-            is_active=True,
-            founder_id=self.user.id
-        )
+        # Get all 'sent' messages in these matches that are NOT from this user
+        messages = Message.objects.filter(
+            match_id__in=match_ids,
+            status='sent'
+        ).exclude(sender_id=self.user.id)
         
         result = {}
+        for message_id, match_id in messages.values_list('id', 'match_id'):
+            result.setdefault(str(match_id), []).append(message_id)
         
-        for match in matches:
-            # Get all 'sent' messages in this match that are NOT from this user
-            messages = Message.objects.filter(
-                match_id=match.id,
-                status='sent'
-            ).exclude(sender_id=self.user.id)
-            
-            message_ids = list(messages.values_list('id', flat=True))
-            
-            if message_ids:
-                # Update to delivered
-                messages.update(
-                    status='delivered',
-                    delivered_at=timezone.now()
-                )
-                result[str(match.id)] = message_ids
+        if result:
+            # Update to delivered
+            Message.objects.filter(
+                id__in=[mid for ids in result.values() for mid in ids]
+            ).update(
+                status='delivered',
+                delivered_at=timezone.now()
+            )
         
         return result
\ No newline at end of file
@@ -5,6 +5,7 @@ from rest_framework import status
 from django.db.models import Q
 from django.utils import timezone
 from .models import Match, Message
+from apps.notifications import counters
 
 
 @api_view(['GET'])
@@ -105,6 +106,8 @@ def send_message_view(request, match_id):
         content=content,
         status='sent'
     )
+    other_user_id = match.founder_id if user.id == match.investor_id else match.investor_id
+    counters.adjust(counters.MESSAGES, other_user_id, 1)
     
     return Response({
         'id': str(message.id),
@@ -152,6 +155,7 @@ def mark_messages_read_view(request, match_id):
         status='read',
         read_at=timezone.now()
     )
+    counters.adjust(counters.MESSAGES, user.id, -updated_count)
     
     return Response({
         'marked_read': updated_count,
@@ -217,20 +221,8 @@ def mark_messages_delivered_view(request, match_id):
 def unread_count_view(request):
     """
     Get total unread message count across all matches
-    Used for: Badge notifications
+    Used for: Badge notifications (also pushed over the notification socket)
     """
-    user = request.user
-    
-    # Get user's matches
-    if user.role == 'investor':
-        matches = Match.objects.filter(investor=user, is_active=True)
-    else:
-        matches = Match.objects.filter(founder=user, is_active=True)
-    
-    # Count unread messages
-    unread_count = Message.objects.filter(
-        match__in=matches,
-        status__in=['sent', 'delivered']
-    ).exclude(sender=user).count()
+    unread_count = counters.get_counts(request.user.id)[counters.MESSAGES]
     
     return Response({'unread_count': unread_count})
\ No newline at end of file
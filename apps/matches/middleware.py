@@ -1,27 +1,20 @@
 from channels.db import database_sync_to_async
 from channels.middleware import BaseMiddleware
 from django.contrib.auth.models import AnonymousUser
-from django.core.cache import cache
 from urllib.parse import parse_qs
-from apps.accounts.models import User
+from apps.accounts import token_cache
 
 @database_sync_to_async
 def get_user_from_token(token_string):
     """
     Get user from cache-based token (matches your TokenAuthentication)
     """
-    try:
-        # Get user_id from cache using the same key format
-        user_id = cache.get(f'auth_token:{token_string}')
-        
-        if not user_id:
-            return AnonymousUser()
-        
-        # Get the user
-        user = User.objects.get(id=user_id)
-        return user
-    except User.DoesNotExist:
+    user = token_cache.get_user(token_string)
+    
+    if user is None or not user.is_active:
         return AnonymousUser()
+    
+    return user
 
 class TokenAuthMiddleware(BaseMiddleware):
     async def __call__(self, scope, receive, send):
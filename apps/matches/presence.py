@@ -0,0 +1,64 @@
+from django.conf import settings
+from config.caches import presence_cache
+
+
+def _online_key(user_id):
+    return f'user_online_global_{user_id}'
+
+
+def set_online(user_id):
+    """Mark user online (no timeout - must be explicitly cleared)"""
+    presence_cache.set(_online_key(user_id), True, timeout=None)
+
+
+def set_offline(user_id):
+    presence_cache.delete(_online_key(user_id))
+
+
+def is_online(user_id):
+    return presence_cache.get(_online_key(user_id), False)
+
+
+def get_online_statuses(user_ids):
+    """{user_id: is_online} for many users in a single cache round trip"""
+    keys = {_online_key(user_id): str(user_id) for user_id in user_ids}
+    found = presence_cache.get_many(list(keys))
+    return {user_id: bool(found.get(key, False)) for key, user_id in keys.items()}
+
+
+def _chat_key(match_id, user_id):
+    return f'chat_viewers:{match_id}:{user_id}'
+
+
+def enter_chat(match_id, user_id):
+    """
+    Count an open chat socket for user in match (several tabs may be open).
+    Expires unless refreshed, so a crashed worker can't suppress
+    notifications forever.
+    """
+    key = _chat_key(match_id, user_id)
+    presence_cache.add(key, 0, timeout=settings.CHAT_PRESENCE_TIMEOUT)
+    try:
+        presence_cache.incr(key)
+    except ValueError:
+        # Expired between add and incr
+        presence_cache.set(key, 1, timeout=settings.CHAT_PRESENCE_TIMEOUT)
+    presence_cache.touch(key, settings.CHAT_PRESENCE_TIMEOUT)
+
+
+def refresh_chat(match_id, user_id):
+    presence_cache.touch(_chat_key(match_id, user_id), settings.CHAT_PRESENCE_TIMEOUT)
+
+
+def leave_chat(match_id, user_id):
+    key = _chat_key(match_id, user_id)
+    try:
+        if presence_cache.decr(key) <= 0:
+            presence_cache.delete(key)
+    except ValueError:
+        pass
+
+
+def is_in_chat(match_id, user_id):
+    """True while user has the chat for this match open"""
+    return presence_cache.get(_chat_key(match_id, user_id), 0) > 0
@@ -8,7 +8,10 @@ from apps.accounts.models import User
 from apps.profiles.models import FounderProfile, InvestorProfile
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
-from django.core.cache import cache
+from . import presence
+from apps.notifications import counters
+from apps.notifications.dispatcher import dispatcher
+from apps.images.derivatives import srcset
 
 
 @api_view(['GET'])
@@ -89,6 +92,7 @@ def my_matches_view(request):
                 'id': str(other_user.id),
                 'name': other_user.name,
                 'avatar_url': other_user.avatar_url,
+                'avatar_srcset': srcset(other_user.avatar_variants, other_user.avatar_url),
                 'role': other_user.role,
             },
             'other_profile': profile_data,
@@ -156,6 +160,7 @@ def match_detail_view(request, match_id):
             'id': str(other_user.id),
             'name': other_user.name,
             'avatar_url': other_user.avatar_url,
+            'avatar_srcset': srcset(other_user.avatar_variants, other_user.avatar_url),
             'role': other_user.role,
         },
         'other_profile': profile_data,
@@ -177,6 +182,24 @@ def unmatch_view(request, match_id):
     
     match.is_active = False
     match.save()
+
+    # Messages in inactive matches no longer count as unread
+    for participant_id in [match.investor_id, match.founder_id]:
+        counters.reset(counters.MESSAGES, participant_id)
+
+    event = {
+        'type': 'match_status_update',
+        'match_id': str(match.id),
+        'is_active': False,
+        'investor_id': str(match.investor_id),
+        'founder_id': str(match.founder_id),
+    }
+
+    # Invalidate cached match snapshots held by open chat and presence
+    # sockets - after commit, and off the request thread
+    dispatcher.publish_on_commit(f'chat_{match.id}', event)
+    for user_id in [event['investor_id'], event['founder_id']]:
+        dispatcher.publish_on_commit(f'user_presence_{user_id}', event)
     
     return Response({'message': 'Unmatched successfully'})
 
@@ -204,6 +227,9 @@ def accept_match_view(request, match_id):
     match.is_active = True
     match.save()
 
+    for participant_id in [match.investor_id, match.founder_id]:
+        counters.reset(counters.MESSAGES, participant_id)
+
     channel_layer = get_channel_layer()
     investor_id = str(match.investor_id)
     founder_id = str(match.founder_id)
@@ -216,13 +242,16 @@ def accept_match_view(request, match_id):
                 'type': 'match_status_update',
                 'match_id': str(match.id),
                 'is_active': True,
+                'investor_id': investor_id,
+                'founder_id': founder_id,
             }
         )
     
     # ALSO send the initial online status of each user to the other
     # Check if each user is online
-    investor_online = cache.get(f'user_online_global_{investor_id}', False)
-    founder_online = cache.get(f'user_online_global_{founder_id}', False)
+    statuses = presence.get_online_statuses([investor_id, founder_id])
+    investor_online = statuses[investor_id]
+    founder_online = statuses[founder_id]
     
     # Send investor's status to founder
     if founder_online:
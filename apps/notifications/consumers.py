@@ -1,8 +1,18 @@
+import uuid
+from datetime import datetime
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.db.models import Q
+from .models import Notification
+from .services import NotificationService
+from . import counters
 
 
 class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    # Past this many missed notifications the client is told to refetch
+    # the list instead of receiving a long replay
+    REPLAY_LIMIT = 100
+
     async def connect(self):
         if self.scope['user'].is_authenticated:
             self.user_id = str(self.scope['user'].id)
@@ -14,6 +24,12 @@ class NotificationConsumer(AsyncJsonWebsocketConsumer):
             )
             
             await self.accept()
+
+            # Initial badge state; later changes are pushed as unread_counts
+            await self.send_json({
+                'type': 'unread_counts',
+                'counts': await self.get_unread_counts(),
+            })
         else:
             await self.close()
     
@@ -23,10 +39,83 @@ class NotificationConsumer(AsyncJsonWebsocketConsumer):
                 self.group_name,
                 self.channel_name
             )
+
+    async def receive_json(self, content):
+        if content.get('type') == 'resume':
+            await self.replay(content.get('since'), content.get('last_id'))
+
+    async def replay(self, since, last_id):
+        """
+        Send notifications created after the client's cursor, oldest first.
+
+        The cursor is the created_at (`since`) and/or id (`last_id`) of the
+        newest notification the client already has. Events pushed while
+        the replay runs may arrive twice - clients replace by id.
+        """
+        notifications = await self.get_notifications_after(since, last_id)
+        if notifications is None:
+            await self.send_json({'type': 'replay_reset', 'reason': 'invalid_cursor'})
+            return
+        if len(notifications) > self.REPLAY_LIMIT:
+            await self.send_json({'type': 'replay_reset', 'reason': 'too_many'})
+            return
+
+        for notification in notifications:
+            await self.send_json({
+                'type': 'notification',
+                'notification': notification,
+            })
+
+        await self.send_json({'type': 'replay_complete', 'count': len(notifications)})
     
     async def notification_message(self, event):
         """Receive notification from channel layer and send to WebSocket"""
         await self.send_json({
             'type': 'notification',
             'notification': event['notification']
-        })
\ No newline at end of file
+        })
+
+    async def unread_counts(self, event):
+        """Push updated unread notification/message counters"""
+        await self.send_json({
+            'type': 'unread_counts',
+            'counts': event['counts'],
+        })
+
+    @database_sync_to_async
+    def get_unread_counts(self):
+        return counters.get_counts(self.user_id)
+
+    @database_sync_to_async
+    def get_notifications_after(self, since, last_id):
+        """
+        Payloads for notifications newer than the cursor (at most
+        REPLAY_LIMIT + 1), or None if the cursor can't be resolved.
+        """
+        notifications = Notification.objects.filter(recipient_id=self.user_id)
+
+        try:
+            since = datetime.fromisoformat(since) if since else None
+            last_id = uuid.UUID(str(last_id)) if last_id else None
+        except (TypeError, ValueError):
+            # Malformed cursor from the client (e.g. a number for `since`)
+            return None
+
+        if since is None and last_id is not None:
+            # Only an id - look up its position (gone once archived/deleted)
+            since = notifications.filter(id=last_id).values_list('created_at', flat=True).first()
+            if since is None:
+                return None
+
+        if since is None:
+            return None
+
+        if last_id is not None:
+            notifications = notifications.filter(
+                Q(created_at__gt=since) | Q(created_at=since, id__gt=last_id)
+            )
+        else:
+            notifications = notifications.filter(created_at__gt=since)
+
+        rows = notifications.order_by('created_at', 'id')[:self.REPLAY_LIMIT + 1]
+        return [NotificationService.to_payload(n) for n in rows]
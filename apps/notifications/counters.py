@@ -0,0 +1,160 @@
+"""
+Per-user unread counters (notifications and chat messages).
+
+Counters live in the shared 'counters' cache and are adjusted in place as
+notifications/messages are created or read, then pushed to the user's
+NotificationConsumer so clients don't need to poll. A missing key is
+rebuilt from the DB on the next read, so a cache flush only costs one
+COUNT per user; `rebuild_unread_counters` refills everything at once.
+Counters expire after UNREAD_COUNTER_TTL: an adjustment that lands while
+a counter is being rebuilt is lost, and expiry bounds how long that drift
+lasts.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from config.caches import counter_cache as cache
+from .dispatcher import dispatcher
+
+NOTIFICATIONS = 'notifications'
+MESSAGES = 'messages'
+KINDS = (NOTIFICATIONS, MESSAGES)
+
+UNREAD_MESSAGE_STATUSES = ['sent', 'delivered']
+
+
+def _key(kind, user_id):
+    return f'unread_{kind}:{user_id}'
+
+
+def count_unread_notifications(user_id):
+    from .models import Notification
+
+    return Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+
+
+def count_unread_messages(user_id):
+    from apps.matches.models import Message
+
+    return Message.objects.filter(
+        Q(match__investor_id=user_id) | Q(match__founder_id=user_id),
+        match__is_active=True,
+        status__in=UNREAD_MESSAGE_STATUSES
+    ).exclude(sender_id=user_id).count()
+
+
+_COUNTERS = {
+    NOTIFICATIONS: count_unread_notifications,
+    MESSAGES: count_unread_messages,
+}
+
+
+def get_counts(user_id):
+    """Return {'notifications': n, 'messages': m}, rebuilding missing counters"""
+    keys = {kind: _key(kind, user_id) for kind in KINDS}
+    cached = cache.get_many(keys.values())
+
+    counts = {}
+    for kind, key in keys.items():
+        if key in cached:
+            counts[kind] = cached[key]
+        else:
+            count = _COUNTERS[kind](user_id)
+            # add(): don't overwrite a counter a concurrent rebuild (or
+            # adjustment) already stored
+            if cache.add(key, count, timeout=settings.UNREAD_COUNTER_TTL):
+                counts[kind] = count
+            else:
+                counts[kind] = cache.get(key, count)
+    return counts
+
+
+def _apply(kind, user_id, delta):
+    """Adjust a cached counter; returns False if it wasn't cached"""
+    key = _key(kind, user_id)
+    try:
+        value = cache.incr(key, delta)
+    except ValueError:
+        # Not cached - the next read rebuilds it from the DB
+        return False
+    if value < 0:
+        # Drifted (e.g. a flush raced with a read) - rebuild on next read
+        cache.delete(key)
+    return True
+
+
+def adjust(kind, user_id, delta):
+    """
+    Add `delta` to a user's counter once the current transaction commits
+    and push the new counts to their sockets.
+    """
+    if not delta:
+        return
+
+    def apply():
+        # Connected clients always have warm counters (read on connect), so
+        # a missing key means nobody is listening - skip the push rather
+        # than rebuild it from the DB
+        if _apply(kind, user_id, delta):
+            push(user_id)
+
+    transaction.on_commit(apply)
+
+
+def reset(kind, user_id, value=None):
+    """
+    Set a counter outright after commit (`value=None` recomputes it from
+    the DB) - for bulk changes where the delta isn't known.
+    """
+    def apply():
+        if value is None:
+            cache.delete(_key(kind, user_id))
+        else:
+            cache.set(_key(kind, user_id), value, timeout=settings.UNREAD_COUNTER_TTL)
+        push(user_id)
+
+    transaction.on_commit(apply)
+
+
+def push(user_id):
+    dispatcher.publish(
+        f"user_{user_id}",
+        {
+            'type': 'unread_counts',
+            'counts': get_counts(user_id),
+        }
+    )
+
+
+def rebuild_all():
+    """
+    Recompute every user's counters from the DB with grouped queries.
+    Returns the number of users written.
+    """
+    from apps.accounts.models import User
+    from apps.matches.models import Message
+    from .models import Notification
+
+    counts = {
+        str(user_id): {NOTIFICATIONS: 0, MESSAGES: 0}
+        for user_id in User.objects.values_list('id', flat=True)
+    }
+
+    for row in Notification.objects.filter(is_read=False).values('recipient_id').annotate(n=Count('id')):
+        counts[str(row['recipient_id'])][NOTIFICATIONS] = row['n']
+
+    unread = Message.objects.filter(match__is_active=True, status__in=UNREAD_MESSAGE_STATUSES)
+    # A message is unread for whichever participant didn't send it
+    for recipient_field, sender_field in [('match__investor_id', 'match__founder_id'),
+                                          ('match__founder_id', 'match__investor_id')]:
+        rows = unread.filter(sender_id=F(sender_field)).values(recipient_field).annotate(n=Count('id'))
+        for row in rows:
+            counts[str(row[recipient_field])][MESSAGES] += row['n']
+
+    cache.set_many({
+        _key(kind, user_id): user_counts[kind]
+        for user_id, user_counts in counts.items()
+        for kind in KINDS
+    }, timeout=settings.UNREAD_COUNTER_TTL)
+
+    return len(counts)
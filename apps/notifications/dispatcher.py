@@ -0,0 +1,100 @@
+import asyncio
+import queue
+import threading
+from asgiref.sync import async_to_sync
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from django.conf import settings
+from django.db import transaction
+
+
+class RealtimeDispatcher:
+    """
+    Fans out channel-layer events from a background thread so request
+    threads never wait on Redis.
+
+    Events are queued after the surrounding DB transaction commits and a
+    worker thread drains them in batches, sending each batch concurrently.
+    If the queue is full the event is dropped - the Notification row is
+    already committed and clients pick it up on their next fetch.
+    """
+
+    def __init__(self, batch_size, max_queue_size):
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def publish_on_commit(self, group, event):
+        """Queue an event to be sent once the current transaction commits"""
+        transaction.on_commit(lambda: self.publish(group, event))
+
+    def publish(self, group, event):
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+
+        # The in-memory layer is process-local and its queues belong to the
+        # server's event loop, so there is nothing to offload - send inline
+        if isinstance(channel_layer, InMemoryChannelLayer):
+            self._send_inline(channel_layer, group, event)
+            return
+
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((group, event))
+        except queue.Full:
+            print(f"Realtime dispatch queue full, dropping event for {group}")
+
+    def _send_inline(self, channel_layer, group, event):
+        try:
+            async_to_sync(channel_layer.group_send)(group, event)
+        except Exception as e:
+            print(f"Failed to send real-time event: {e}")
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name='realtime-dispatcher',
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]  # block until there is work
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        channel_layer = get_channel_layer()
+
+        while True:
+            batch = self._next_batch()
+            try:
+                loop.run_until_complete(self._send_batch(channel_layer, batch))
+            except Exception as e:
+                print(f"Realtime dispatch batch failed: {e}")
+
+    async def _send_batch(self, channel_layer, batch):
+        results = await asyncio.gather(
+            *[channel_layer.group_send(group, event) for group, event in batch],
+            return_exceptions=True
+        )
+        for (group, _), result in zip(batch, results):
+            if isinstance(result, Exception):
+                print(f"Failed to send real-time event to {group}: {result}")
+
+
+dispatcher = RealtimeDispatcher(
+    batch_size=getattr(settings, 'REALTIME_DISPATCH_BATCH_SIZE', 100),
+    max_queue_size=getattr(settings, 'REALTIME_DISPATCH_QUEUE_SIZE', 10000),
+)
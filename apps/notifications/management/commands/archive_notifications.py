@@ -0,0 +1,50 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.notifications import retention
+
+
+class Command(BaseCommand):
+    help = 'Archive old read notifications and enforce the per-user notification cap'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.NOTIFICATION_RETENTION_DAYS,
+                            help='Archive read notifications older than this many days')
+        parser.add_argument('--max-per-user', type=int, default=settings.NOTIFICATION_MAX_PER_USER,
+                            help='Delete live notifications beyond the newest N per user (0 disables)')
+        parser.add_argument('--batch-size', type=int, default=settings.NOTIFICATION_ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--sleep', type=float, default=0.0, help='Seconds to pause between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        batch_size = options['batch_size']
+        max_per_user = options['max_per_user']
+
+        if options['dry_run']:
+            self.stdout.write(f"Would archive {retention.archivable(cutoff).count()} read notifications older than {cutoff:%Y-%m-%d}")
+            if max_per_user:
+                for user_id, total in retention.users_over_cap(max_per_user):
+                    self.stdout.write(f'Would delete {total - max_per_user} notifications for user {user_id}')
+            return
+
+        archived = 0
+        while True:
+            moved = retention.archive_batch(cutoff, batch_size)
+            if not moved:
+                break
+            archived += moved
+            self.stdout.write(f'Archived {archived} so far')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        deleted = 0
+        if max_per_user:
+            for user_id, _ in retention.users_over_cap(max_per_user):
+                deleted += retention.enforce_cap(user_id, max_per_user, batch_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {archived} notifications, deleted {deleted} over the per-user cap'
+        ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from apps.notifications import counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute cached unread notification/message counters from the database (e.g. after a cache flush)'
+
+    def handle(self, *args, **options):
+        users = counters.rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt unread counters for {users} users'))
@@ -26,6 +26,10 @@ class Notification(models.Model):
     # Action URL (where to navigate when clicked)
     action_url = models.CharField(max_length=255, null=True, blank=True)
     
+    # Number of events folded into this notification (chat bursts are
+    # coalesced into one "N new messages" row per match)
+    count = models.PositiveIntegerField(default=1)
+    
     # Status
     is_read = models.BooleanField(default=False)
     read_at = models.DateTimeField(null=True, blank=True)
@@ -38,6 +42,7 @@ class Notification(models.Model):
         indexes = [
             models.Index(fields=['recipient', '-created_at']),
             models.Index(fields=['recipient', 'is_read']),
+            models.Index(fields=['recipient', 'related_match_id', 'is_read']),
         ]
     
     def __str__(self):
@@ -48,4 +53,47 @@ class Notification(models.Model):
             from django.utils import timezone
             self.is_read = True
             self.read_at = timezone.now()
-            self.save()
\ No newline at end of file
+            self.save()
+
+class ArchivedNotification(models.Model):
+    """
+    Read notifications moved out of the live table by the
+    archive_notifications job. Same columns as Notification, so the list
+    API can serve both (?archived=true).
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_notifications')
+    notification_type = models.CharField(max_length=20, choices=Notification.NOTIFICATION_TYPES)
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    
+    related_user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='archived_notifications_triggered')
+    related_match_id = models.UUIDField(null=True, blank=True)
+    related_message_id = models.UUIDField(null=True, blank=True)
+    related_video_id = models.UUIDField(null=True, blank=True)
+    
+    action_url = models.CharField(max_length=255, null=True, blank=True)
+    count = models.PositiveIntegerField(default=1)
+    is_read = models.BooleanField(default=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+    
+    # Original creation time, not the archive time
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'notifications_archive'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.notification_type} for {self.recipient.name} (archived)"
+    
+    @classmethod
+    def from_notification(cls, notification):
+        return cls(**{
+            field.attname: getattr(notification, field.attname)
+            for field in Notification._meta.concrete_fields
+        })
@@ -0,0 +1,84 @@
+"""
+Retention for the notifications table.
+
+Old read notifications are moved to notifications_archive and anything
+beyond a per-user cap is deleted. Every step works in short, bounded
+transactions so the live table is never locked for long.
+"""
+from django.db import transaction
+from django.db.models import Count, Q
+from .models import ArchivedNotification, Notification
+from . import counters
+
+
+def archivable(cutoff):
+    return Notification.objects.filter(is_read=True, created_at__lt=cutoff)
+
+
+def archive_batch(cutoff, batch_size):
+    """Move up to batch_size read notifications older than cutoff. Returns rows moved."""
+    with transaction.atomic():
+        # skip_locked: rows being updated by requests are left for the next run
+        batch = list(
+            archivable(cutoff)
+            .select_for_update(skip_locked=True)
+            .order_by('created_at')[:batch_size]
+        )
+        if not batch:
+            return 0
+
+        ArchivedNotification.objects.bulk_create(
+            [ArchivedNotification.from_notification(n) for n in batch],
+            ignore_conflicts=True
+        )
+        Notification.objects.filter(id__in=[n.id for n in batch]).delete()
+
+    return len(batch)
+
+
+def users_over_cap(max_per_user):
+    """Yield (recipient_id, total) for users with more than max_per_user notifications"""
+    rows = (
+        Notification.objects.values('recipient_id')
+        .annotate(total=Count('id'))
+        .filter(total__gt=max_per_user)
+        .order_by()
+    )
+    for row in rows.iterator():
+        yield row['recipient_id'], row['total']
+
+
+def beyond_cap(user_id, max_per_user):
+    """Queryset of a user's notifications older than their newest max_per_user"""
+    notifications = Notification.objects.filter(recipient_id=user_id)
+    boundary = (
+        notifications.order_by('-created_at', '-id')
+        .values_list('created_at', 'id')[max_per_user:max_per_user + 1]
+    )
+    boundary = list(boundary)
+    if not boundary:
+        return notifications.none()
+
+    created_at, notification_id = boundary[0]
+    return notifications.filter(
+        Q(created_at__lt=created_at) | Q(created_at=created_at, id__lte=notification_id)
+    )
+
+
+def enforce_cap(user_id, max_per_user, batch_size):
+    """Delete a user's notifications beyond the cap in batches. Returns rows deleted."""
+    stale = beyond_cap(user_id, max_per_user)
+    deleted = 0
+
+    while True:
+        ids = list(stale.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            deleted += Notification.objects.filter(id__in=ids).delete()[0]
+
+    if deleted:
+        # Unread rows may have been dropped
+        counters.reset(counters.NOTIFICATIONS, user_id)
+
+    return deleted
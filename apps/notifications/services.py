@@ -1,6 +1,10 @@
+from collections import Counter
+from django.db import transaction
+from django.utils import timezone
 from .models import Notification
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from .dispatcher import dispatcher
+from . import counters
+from apps.matches import presence
 
 
 class NotificationService:
@@ -22,27 +26,58 @@ class NotificationService:
         
         # Send real-time notification to founder
         NotificationService._send_realtime(match.founder.id, founder_notification)
+        counters.adjust(counters.NOTIFICATIONS, match.founder.id, 1)
         
         return founder_notification
     
     @staticmethod
     def create_message_notification(message, match):
-        """Create notification for new message"""
+        """
+        Create or update the notification for a new message.
+
+        Chat bursts are coalesced into one unread notification per match
+        ("3 new messages from X") that is updated in place, and nothing is
+        created while the recipient has that chat open.
+        """
         # Determine recipient (the person who didn't send the message)
-        recipient = match.founder if message.sender == match.investor else match.investor
-        
-        notification = Notification.objects.create(
-            recipient=recipient,
-            notification_type='message',
-            title=f'New message from {message.sender.name}',
-            message=message.content[:100],  # Preview
-            related_user=message.sender,
-            related_match_id=match.id,
-            related_message_id=message.id,
-            action_url=f'/messages'
-        )
-        
-        # Send real-time notification
+        recipient = match.founder if message.sender_id == match.investor_id else match.investor
+
+        # The recipient is looking at the conversation - no notification needed
+        if presence.is_in_chat(match.id, recipient.id):
+            return None
+
+        with transaction.atomic():
+            notification = Notification.objects.select_for_update().filter(
+                recipient=recipient,
+                notification_type='message',
+                related_match_id=match.id,
+                is_read=False
+            ).first()
+
+            if notification is None:
+                notification = Notification.objects.create(
+                    recipient=recipient,
+                    notification_type='message',
+                    title=f'New message from {message.sender.name}',
+                    message=message.content[:100],  # Preview
+                    related_user=message.sender,
+                    related_match_id=match.id,
+                    related_message_id=message.id,
+                    action_url=f'/messages'
+                )
+                counters.adjust(counters.NOTIFICATIONS, recipient.id, 1)
+            else:
+                notification.count += 1
+                notification.title = f'{notification.count} new messages from {message.sender.name}'
+                notification.message = message.content[:100]  # Latest preview
+                notification.related_message_id = message.id
+                # Bump so the rolling notification stays at the top of the list
+                notification.created_at = timezone.now()
+                notification.save(update_fields=[
+                    'count', 'title', 'message', 'related_message_id', 'created_at'
+                ])
+
+        # Send real-time notification (clients replace by id)
         NotificationService._send_realtime(recipient.id, notification)
         
         return notification
@@ -50,6 +85,33 @@ class NotificationService:
     @staticmethod
     def create_video_status_notification(video, status):
         """Create notification for video approval/rejection"""
+        notification = NotificationService._video_status_notification(video, status)
+        notification.save()
+        
+        # Send real-time notification
+        NotificationService._send_realtime(video.founder_id, notification)
+        counters.adjust(counters.NOTIFICATIONS, video.founder_id, 1)
+        
+        return notification
+    
+    @staticmethod
+    def create_video_status_notifications(videos, status):
+        """Bulk variant for moderation batches - one INSERT for all founders"""
+        notifications = Notification.objects.bulk_create([
+            NotificationService._video_status_notification(video, status)
+            for video in videos
+        ])
+        
+        for notification in notifications:
+            NotificationService._send_realtime(notification.recipient_id, notification)
+        for founder_id, added in Counter(n.recipient_id for n in notifications).items():
+            counters.adjust(counters.NOTIFICATIONS, founder_id, added)
+        
+        return notifications
+    
+    @staticmethod
+    def _video_status_notification(video, status):
+        """Unsaved approval/rejection notification for a video"""
         notification_type = 'video_approved' if status == 'active' else 'video_rejected'
         
         if status == 'active':
@@ -59,40 +121,40 @@ class NotificationService:
             title = 'Video Requires Changes'
             message = 'Your pitch video needs some adjustments. Please check the feedback.'
         
-        notification = Notification.objects.create(
-            recipient=video.founder,
+        return Notification(
+            recipient_id=video.founder_id,
             notification_type=notification_type,
             title=title,
             message=message,
             related_video_id=video.id,
             action_url='/profile'
         )
-        
-        # Send real-time notification
-        NotificationService._send_realtime(video.founder.id, notification)
-        
-        return notification
     
     @staticmethod
     def _send_realtime(user_id, notification):
-        """Send real-time notification via WebSocket"""
-        channel_layer = get_channel_layer()
-        if channel_layer:
-            try:
-                async_to_sync(channel_layer.group_send)(
-                    f"user_{user_id}",
-                    {
-                        'type': 'notification_message',
-                        'notification': {
-                            'id': str(notification.id),
-                            'type': notification.notification_type,
-                            'title': notification.title,
-                            'message': notification.message,
-                            'action_url': notification.action_url,
-                            'is_read': notification.is_read,
-                            'created_at': notification.created_at.isoformat(),
-                        }
-                    }
-                )
-            except Exception as e:
-                print(f"Failed to send real-time notification: {e}")
\ No newline at end of file
+        """
+        Send real-time notification via WebSocket.
+        Published after the surrounding transaction commits, from a
+        background dispatcher - callers never wait on the channel layer.
+        """
+        dispatcher.publish_on_commit(
+            f"user_{user_id}",
+            {
+                'type': 'notification_message',
+                'notification': NotificationService.to_payload(notification),
+            }
+        )
+    
+    @staticmethod
+    def to_payload(notification):
+        """WebSocket payload for a notification (live pushes and replay)"""
+        return {
+            'id': str(notification.id),
+            'type': notification.notification_type,
+            'title': notification.title,
+            'message': notification.message,
+            'count': notification.count,
+            'action_url': notification.action_url,
+            'is_read': notification.is_read,
+            'created_at': notification.created_at.isoformat(),
+        }
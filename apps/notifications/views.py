@@ -1,49 +1,87 @@
+import uuid
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.utils import timezone
-from .models import Notification
+from .models import ArchivedNotification, Notification
+from . import counters
 from rest_framework.permissions import AllowAny
-from django.core.mail import send_mail
-from django.conf import settings
+from apps.accounts.email_service import EmailService
+from config.pagination import keyset_page, paginated_response
+
+
+NOTIFICATION_PAGE_SIZE = 50
+MAX_NOTIFICATION_PAGE_SIZE = 100
+MAX_BULK_MARK_READ = 500
+
+# Payload fields -> (model fields needed, serializer)
+NOTIFICATION_FIELDS = {
+    'id': (['id'], lambda n: str(n.id)),
+    'type': (['notification_type'], lambda n: n.notification_type),
+    'title': (['title'], lambda n: n.title),
+    'message': (['message'], lambda n: n.message),
+    'count': (['count'], lambda n: n.count),
+    'related_user': (['related_user__id', 'related_user__name', 'related_user__avatar_url'], lambda n: {
+        'id': str(n.related_user.id),
+        'name': n.related_user.name,
+        'avatar_url': n.related_user.avatar_url,
+    } if n.related_user else None),
+    'action_url': (['action_url'], lambda n: n.action_url),
+    'is_read': (['is_read'], lambda n: n.is_read),
+    'read_at': (['read_at'], lambda n: n.read_at.isoformat() if n.read_at else None),
+    'created_at': (['created_at'], lambda n: n.created_at.isoformat()),
+}
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def notifications_list_view(request):
-    """Get all notifications for current user"""
-    notifications = Notification.objects.filter(
-        recipient=request.user
-    ).select_related('related_user')[:50]
+    """
+    Get notifications for current user, newest first.
+
+    Keyset-paginated on (created_at, id): pass the X-Next-Cursor response
+    header back as ?cursor= for the next page. ?limit= sets the page size
+    and ?fields=id,title,is_read returns a compact payload.
+    ?archived=true pages through notifications moved to the archive.
+    """
+    fields = list(NOTIFICATION_FIELDS)
+    if request.GET.get('fields'):
+        fields = [f for f in request.GET['fields'].split(',') if f in NOTIFICATION_FIELDS]
+        if not fields:
+            return Response({'error': 'No valid fields requested'}, status=status.HTTP_400_BAD_REQUEST)
     
-    data = [{
-        'id': str(n.id),
-        'type': n.notification_type,
-        'title': n.title,
-        'message': n.message,
-        'related_user': {
-            'id': str(n.related_user.id),
-            'name': n.related_user.name,
-            'avatar_url': n.related_user.avatar_url,
-        } if n.related_user else None,
-        'action_url': n.action_url,
-        'is_read': n.is_read,
-        'read_at': n.read_at.isoformat() if n.read_at else None,
-        'created_at': n.created_at.isoformat(),
-    } for n in notifications]
+    model = ArchivedNotification if request.GET.get('archived') in ('1', 'true') else Notification
+    notifications = model.objects.filter(recipient=request.user)
     
-    return Response(data)
+    # Only join users when the payload needs them
+    if 'related_user' in fields:
+        notifications = notifications.select_related('related_user')
+    # created_at/id are always loaded for the cursor
+    notifications = notifications.only(
+        'id', 'created_at', *[model_field for f in fields for model_field in NOTIFICATION_FIELDS[f][0]]
+    )
+    
+    try:
+        page, next_cursor = keyset_page(
+            notifications, request, NOTIFICATION_PAGE_SIZE, MAX_NOTIFICATION_PAGE_SIZE
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    data = [
+        {f: NOTIFICATION_FIELDS[f][1](n) for f in fields}
+        for n in page
+    ]
+    
+    return paginated_response(Response(data), next_cursor)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def unread_count_view(request):
-    """Get unread notification count"""
-    count = Notification.objects.filter(
-        recipient=request.user,
-        is_read=False
-    ).count()
+    """Get unread notification count (served from the cached counter)"""
+    count = counters.get_counts(request.user.id)[counters.NOTIFICATIONS]
     
     return Response({'count': count})
 
@@ -52,18 +90,49 @@ def unread_count_view(request):
 @permission_classes([IsAuthenticated])
 def mark_notification_read_view(request, notification_id):
     """Mark a notification as read"""
-    try:
-        notification = Notification.objects.get(
-            id=notification_id,
-            recipient=request.user
-        )
-        notification.mark_as_read()
-        return Response({'success': True})
-    except Notification.DoesNotExist:
+    updated = Notification.objects.filter(
+        id=notification_id,
+        recipient=request.user,
+        is_read=False
+    ).update(is_read=True, read_at=timezone.now())
+    
+    if updated:
+        counters.adjust(counters.NOTIFICATIONS, request.user.id, -updated)
+    elif not Notification.objects.filter(id=notification_id, recipient=request.user).exists():
         return Response(
             {'error': 'Notification not found'},
             status=status.HTTP_404_NOT_FOUND
         )
+    
+    return Response({'success': True})
+
+
+@api_view(['PUT'])
+@permission_classes([IsAuthenticated])
+def mark_notifications_read_view(request):
+    """Mark a list of notifications as read in one UPDATE ({"ids": [...]})"""
+    ids = request.data.get('ids')
+    if not isinstance(ids, list) or not ids:
+        return Response({'error': 'ids must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(ids) > MAX_BULK_MARK_READ:
+        return Response(
+            {'error': f'At most {MAX_BULK_MARK_READ} ids per request'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        ids = [uuid.UUID(str(i)) for i in ids]
+    except ValueError:
+        return Response({'error': 'Invalid notification id'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    updated = Notification.objects.filter(
+        id__in=ids,
+        recipient=request.user,
+        is_read=False
+    ).update(is_read=True, read_at=timezone.now())
+    counters.adjust(counters.NOTIFICATIONS, request.user.id, -updated)
+    
+    return Response({'success': True, 'marked_read': updated})
 
 
 @api_view(['PUT'])
@@ -74,6 +143,7 @@ def mark_all_read_view(request):
         recipient=request.user,
         is_read=False
     ).update(is_read=True, read_at=timezone.now())
+    counters.reset(counters.NOTIFICATIONS, request.user.id, 0)
     
     return Response({'success': True})
 
@@ -88,6 +158,8 @@ def delete_notification_view(request, notification_id):
             recipient=request.user
         )
         notification.delete()
+        if not notification.is_read:
+            counters.adjust(counters.NOTIFICATIONS, request.user.id, -1)
         return Response({'success': True})
     except Notification.DoesNotExist:
         return Response(
@@ -101,6 +173,7 @@ def delete_notification_view(request, notification_id):
 def clear_all_notifications_view(request):
     """Clear all notifications"""
     Notification.objects.filter(recipient=request.user).delete()
+    counters.reset(counters.NOTIFICATIONS, request.user.id, 0)
     return Response({'success': True})
 
 
@@ -109,32 +182,16 @@ def clear_all_notifications_view(request):
 def judge_application(request):
     data = request.data
 
-    message = f"""
-New Judge Application
-
-Full Name: {data.get('full_name')}
-Email: {data.get('email')}
-LinkedIn: {data.get('linkedin')}
-Role & Company: {data.get('role')}
-Industry: {data.get('industry')}
-Experience: {data.get('experience')}
-
-Motivation:
-{data.get('motivation')}
-
-Perspective:
-{data.get('perspective')}
-
-Invested Before:
-{data.get('invested')}
-"""
-
-    send_mail(
-        subject="New Judge Application | IkonetU",
-        message=message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=["customer.service@ikonetu.com"],
-        fail_silently=False,
+    EmailService.queue_template(
+        'judge_application',
+        ["customer.service@ikonetu.com"],
+        {
+            field: data.get(field)
+            for field in [
+                'full_name', 'email', 'linkedin', 'role', 'industry',
+                'experience', 'motivation', 'perspective', 'invested',
+            ]
+        }
     )
 
     return Response({"success": True})
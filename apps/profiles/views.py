@@ -4,17 +4,21 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework import status
 from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
-from django.db.models import Count, Q
-from PIL import Image
-from io import BytesIO
+from django.conf import settings
 import uuid
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 
 from .models import FounderProfile, InvestorProfile
 from .serializers import FounderProfileSerializer, InvestorProfileSerializer
 from apps.accounts.serializers import UserSerializer
-from apps.videos.models import Video, VideoView, VideoLike
-from apps.matches.models import Match
+from apps.accounts.stats import get_stats
+from apps.images import derivatives
+from apps.images import pool as image_pool
+from apps.images.imaging import ImageTooLarge, render_avatar
+from config.storage import get_store, storage_key
+
+# Longest side of the stored avatar (variants are derived from it)
+AVATAR_SIZE = 400
 
 
 @api_view(['GET', 'PUT'])
@@ -85,66 +89,44 @@ def upload_avatar(request):
         )
     
     try:
-        # Open and process image
-        img = Image.open(avatar_file)
-        
-        # Convert to RGB if necessary
-        if img.mode in ('RGBA', 'LA', 'P'):
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'P':
-                img = img.convert('RGBA')
-            background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-            img = background
-        
-        # Resize to 400x400 (square)
-        img.thumbnail((400, 400), Image.Resampling.LANCZOS)
-        
-        # Save to BytesIO
-        output = BytesIO()
-        img.save(output, format='JPEG', quality=90, optimize=True)
-        output.seek(0)
+        # Decode/resize in the image pool so the GIL-bound work doesn't
+        # stall other requests on this worker; we still wait for the
+        # result so the response can return the new URL
+        avatar_bytes = image_pool.run(
+            render_avatar, avatar_file.read(), AVATAR_SIZE, settings.IMAGE_MAX_PIXELS
+        )
+    except ImageTooLarge as e:
+        return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except image_pool.PoolBusy as e:
+        return Response({'message': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    except FuturesTimeoutError:
+        return Response(
+            {'message': 'Image processing timed out, please retry'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    except Exception as e:
+        return Response(
+            {'message': f'Failed to process image: {str(e)}'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
+    try:
         # Generate unique filename
         filename = f"avatars/{request.user.id}/{uuid.uuid4()}.jpg"
         
-        # Save new avatar
-        avatar_bytes = output.read()
-        new_path = default_storage.save(filename, ContentFile(avatar_bytes))
-
-        try:
-            # Verify the upload actually landed - same storage backend as
-            # video uploads, so it's exposed to the same silent-failure risk
-            # (R2 + newer boto3 checksum headers can drop/truncate uploads
-            # without raising). Don't trust a clean .save() return alone.
-            if not default_storage.exists(new_path):
-                raise IOError(
-                    f"Upload verification failed: '{new_path}' not found in "
-                    f"storage after save() reported success"
-                )
-            if default_storage.size(new_path) != len(avatar_bytes):
-                raise IOError(
-                    "Upload verification failed: stored avatar size doesn't "
-                    "match expected size (upload was likely truncated)"
-                )
-        except Exception:
-            # New file is bad - clean it up and bail before touching the
-            # old avatar, so a failed upload never leaves the user with
-            # no avatar at all.
-            try:
-                if default_storage.exists(new_path):
-                    default_storage.delete(new_path)
-            except Exception:
-                pass
-            raise
+        # Save new avatar. put_bytes verifies the upload from the
+        # PutObject response (Content-MD5 + ETag) and removes the object
+        # itself if it doesn't match - same silent-truncation risk as
+        # video uploads (R2 + newer boto3 checksum headers). On failure we
+        # bail before touching the old avatar, so a failed upload never
+        # leaves the user with no avatar at all.
+        new_path = get_store().put_bytes(filename, avatar_bytes, 'image/jpeg').key
 
         # Only delete the old avatar once the new one is confirmed good.
-        if request.user.avatar_url:
+        old_path = storage_key(request.user.avatar_url)
+        if old_path and old_path != new_path:
             try:
-                from urllib.parse import urlparse
-                parsed = urlparse(request.user.avatar_url)
-                old_path = parsed.path.split('/media/')[-1] if '/media/' in parsed.path else parsed.path.lstrip('/')
-                if old_path and old_path != new_path and default_storage.exists(old_path):
-                    default_storage.delete(old_path)
+                get_store().delete(old_path)
             except Exception:
                 pass  # If deletion fails, continue - not worth failing the request over
 
@@ -153,7 +135,8 @@ def upload_avatar(request):
         
         # Update user avatar_url
         request.user.avatar_url = avatar_url
-        request.user.save()
+        request.user.save(update_fields=['avatar_url'])
+        derivatives.enqueue('avatar', request.user.id, avatar_url)
         
         return Response({
             'message': 'Avatar uploaded successfully',
@@ -170,62 +153,31 @@ def upload_avatar(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def profile_stats_view(request):
-    """Get profile statistics for current user"""
+    """Get profile statistics for current user (from the per-user stats row)"""
     user = request.user
+    stats = get_stats(user.id)
+    
+    # All matches, accepted or still pending
+    total_matches = stats.active_matches + stats.pending_matches
     
     if user.role == 'founder':
-        # Get all videos for this founder
-        videos = Video.objects.filter(founder=user)
-        
-        # Total views across all videos
-        total_views = VideoView.objects.filter(video__founder=user).count()
-        
-        # Total likes across all videos
-        total_likes = VideoLike.objects.filter(video__founder=user).count()
-        
-        # Get matches
-        matches = Match.objects.filter(
-            Q(founder=user) | Q(investor=user)
-        )
-        
-        # Active matches (accepted by investor)
-        active_matches = matches.filter(is_active=True).count()
-        
-        # Interested count (all matches including pending)
-        interested_count = matches.count()
-        
-        # Video count
-        video_count = videos.count()
-        
         # Response rate calculation
         response_rate = 0
-        if interested_count > 0:
-            response_rate = round((active_matches / interested_count) * 100)
+        if total_matches > 0:
+            response_rate = round((stats.active_matches / total_matches) * 100)
         
         return Response({
-            'totalViews': total_views,
-            'totalLikes': total_likes,
-            'activeMatches': active_matches,
-            'interestedCount': interested_count,
-            'videoCount': video_count,
+            'totalViews': stats.total_views,
+            'totalLikes': stats.total_likes,
+            'activeMatches': stats.active_matches,
+            'interestedCount': total_matches,
+            'videoCount': stats.video_count,
             'responseRate': response_rate
         })
     
     else:  # investor
-        # Get matches where user is investor
-        matches = Match.objects.filter(investor=user)
-        
-        # Active matches
-        active_matches = matches.filter(is_active=True).count()
-        
-        # Total matches (including pending)
-        total_matches = matches.count()
-        
-        # Interested founders (total matches)
-        interested_count = total_matches
-        
         return Response({
-            'activeMatches': active_matches,
-            'interestedCount': interested_count,
+            'activeMatches': stats.active_matches,
+            'interestedCount': total_matches,
             'totalMatches': total_matches
-        })
\ No newline at end of file
+        })
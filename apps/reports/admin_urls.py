@@ -3,6 +3,7 @@ from . import admin_views
 
 urlpatterns = [
     path('reports/', admin_views.admin_reports_view, name='admin-reports'),
+    path('reports/bulk-update/', admin_views.admin_bulk_update_reports_view, name='admin-bulk-update-reports'),
     path('reports/<uuid:report_id>/', admin_views.admin_update_report_view, name='admin-update-report'),
     path('reports/<uuid:report_id>/delete/', admin_views.admin_delete_report_view, name='admin-delete-report'),
 ]
\ No newline at end of file
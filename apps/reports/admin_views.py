@@ -1,10 +1,17 @@
+import uuid
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from django.db import transaction
 from django.utils import timezone
 from .models import Report
 from .serializers import ReportDetailSerializer
+from apps.videos.admin_stats import invalidate_dashboard_stats
+
+
+REPORT_STATUSES = ['pending', 'reviewed', 'resolved', 'dismissed']
+MAX_BULK_REPORTS = 500
 
 
 def require_admin(view_func):
@@ -43,7 +50,7 @@ def admin_update_report_view(request, report_id):
         report = Report.objects.get(id=report_id)
         new_status = request.data.get('status')
         
-        if new_status not in ['pending', 'reviewed', 'resolved', 'dismissed']:
+        if new_status not in REPORT_STATUSES:
             return Response(
                 {'message': 'Invalid status'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -57,6 +64,7 @@ def admin_update_report_view(request, report_id):
             report.resolved_at = timezone.now()
         
         report.save()
+        invalidate_dashboard_stats()
         
         return Response(ReportDetailSerializer(report).data)
         
@@ -64,6 +72,56 @@ def admin_update_report_view(request, report_id):
         return Response({'message': 'Report not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@require_admin
+def admin_bulk_update_reports_view(request):
+    """
+    Set the status of many reports at once.
+    Body: {"status": "...", "ids": [...]} (up to 500 ids).
+    Returns a result per id: updated or not_found.
+    """
+    new_status = request.data.get('status')
+    if new_status not in REPORT_STATUSES:
+        return Response(
+            {'message': 'Invalid status'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    ids = request.data.get('ids')
+    if not isinstance(ids, list) or not ids or len(ids) > MAX_BULK_REPORTS:
+        return Response(
+            {'message': f'ids must be a list of 1-{MAX_BULK_REPORTS} report ids'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        ids = list(dict.fromkeys(uuid.UUID(str(i)) for i in ids))
+    except ValueError:
+        return Response({'message': 'Invalid id'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    changes = {'status': new_status}
+    # Mark as resolved if status is resolved or dismissed
+    if new_status in ['resolved', 'dismissed']:
+        changes['resolved_by'] = request.user
+        changes['resolved_at'] = timezone.now()
+    
+    with transaction.atomic():
+        found = set(Report.objects.filter(id__in=ids).values_list('id', flat=True))
+        updated = Report.objects.filter(id__in=found).update(**changes)
+    
+    if updated:
+        invalidate_dashboard_stats()
+    
+    return Response({
+        'status': new_status,
+        'updated': updated,
+        'results': [
+            {'id': str(report_id), 'result': 'updated' if report_id in found else 'not_found'}
+            for report_id in ids
+        ],
+    })
+
+
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 @require_admin
@@ -72,6 +130,7 @@ def admin_delete_report_view(request, report_id):
     try:
         report = Report.objects.get(id=report_id)
         report.delete()
+        invalidate_dashboard_stats()
         return Response({'message': 'Report deleted successfully'})
     except Report.DoesNotExist:
         return Response({'message': 'Report not found'}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
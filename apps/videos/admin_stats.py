@@ -0,0 +1,62 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+from .models import Video
+from apps.accounts.models import User
+from apps.reports.models import Report
+
+DASHBOARD_STATS_KEY = 'admin_dashboard_stats'
+
+
+def compute_dashboard_stats():
+    """Dashboard counters with one conditional aggregate per table"""
+    now = timezone.now()
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    today_end = today_start + timedelta(days=1)
+    today = Q(created_at__gte=today_start, created_at__lt=today_end)
+
+    users = User.objects.aggregate(
+        total_users=Count('id'),
+        total_founders=Count('id', filter=Q(role='founder')),
+        total_investors=Count('id', filter=Q(role='investor')),
+        today_signups=Count('id', filter=today),
+    )
+
+    videos = Video.objects.aggregate(
+        total_videos=Count('id'),
+        active_videos=Count('id', filter=Q(status='active', is_current=True)),
+        pending_videos=Count('id', filter=Q(status='processing', is_current=True)),
+        today_videos=Count('id', filter=today),
+    )
+
+    reports = Report.objects.aggregate(
+        pending_reports=Count('id', filter=Q(status='pending')),
+    )
+
+    # For matches
+    try:
+        from apps.matches.models import Match
+        matches = Match.objects.filter(is_active=True).aggregate(
+            total_matches=Count('id'),
+            today_matches=Count('id', filter=today),
+        )
+    except ImportError:
+        matches = {'total_matches': 0, 'today_matches': 0}
+
+    return {**users, **videos, **matches, **reports}
+
+
+def get_dashboard_stats():
+    """Cached for ADMIN_STATS_CACHE_TTL seconds so repeated loads are O(1)"""
+    stats = cache.get(DASHBOARD_STATS_KEY)
+    if stats is None:
+        stats = compute_dashboard_stats()
+        cache.set(DASHBOARD_STATS_KEY, stats, timeout=settings.ADMIN_STATS_CACHE_TTL)
+    return stats
+
+
+def invalidate_dashboard_stats():
+    """Drop cached stats after admin actions so moderators see their changes"""
+    cache.delete(DASHBOARD_STATS_KEY)
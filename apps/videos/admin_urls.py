@@ -5,7 +5,10 @@ urlpatterns = [
     path('stats/', admin_views.admin_dashboard_stats_view, name='admin-stats'),
     path('users/', admin_views.admin_users_view, name='admin-users'),
     path('videos/', admin_views.admin_videos_view, name='admin-videos'),
+    path('videos/bulk-moderate/', admin_views.admin_bulk_moderate_videos_view, name='admin-bulk-moderate-videos'),
+    path('videos/next-pending/', admin_views.admin_next_pending_video_view, name='admin-next-pending-video'),
     path('videos/<uuid:video_id>/approve/', admin_views.admin_approve_video_view, name='admin-approve-video'),
     path('videos/<uuid:video_id>/reject/', admin_views.admin_reject_video_view, name='admin-reject-video'),
+    path('storage/metrics/', admin_views.admin_storage_metrics_view, name='admin-storage-metrics'),
     path('users/<uuid:user_id>/delete/', admin_views.admin_delete_user_view, name='admin-delete-user'),
 ]
\ No newline at end of file
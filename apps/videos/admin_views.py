@@ -1,14 +1,48 @@
+import os
+import uuid
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Count, Q
+from django.db.models import F, Func, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.utils import timezone
-from datetime import timedelta
 from .models import Video, VideoView, VideoLike
 from apps.accounts.models import User
-from apps.reports.models import Report
+from apps.matches.models import Match
 from apps.notifications.services import NotificationService
+from .admin_stats import get_dashboard_stats, invalidate_dashboard_stats
+from config.pagination import keyset_page, paginated_response
+from config.storage import metrics as storage_metrics
+
+
+ADMIN_PAGE_SIZE = 50
+MAX_ADMIN_PAGE_SIZE = 200
+MAX_BULK_MODERATION = 500
+
+VIDEO_MODERATION_ACTIONS = {'approve': 'active', 'reject': 'rejected'}
+# Archived/deleted videos are history and can't be re-moderated in bulk
+MODERATABLE_VIDEO_STATUSES = ['processing', 'active', 'rejected']
+
+
+def _count_subquery(queryset):
+    """COUNT(*) of a correlated queryset as an annotation (0 when empty)"""
+    counted = queryset.order_by().annotate(total=Func(F('pk'), function='COUNT')).values('total')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def _parse_ids(ids):
+    """Validate a bulk request's id list (deduplicated, order kept)"""
+    if not isinstance(ids, list) or not ids:
+        raise ValueError('ids must be a non-empty list')
+    if len(ids) > MAX_BULK_MODERATION:
+        raise ValueError(f'At most {MAX_BULK_MODERATION} ids per request')
+    try:
+        return list(dict.fromkeys(uuid.UUID(str(i)) for i in ids))
+    except ValueError:
+        raise ValueError('Invalid id')
 
 
 def require_admin(view_func):
@@ -26,85 +60,78 @@ def require_admin(view_func):
 @permission_classes([IsAuthenticated])
 @require_admin
 def admin_dashboard_stats_view(request):
-    """Get admin dashboard statistics"""
-    from datetime import datetime
-    
-    now = timezone.now()
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    today_end = today_start + timedelta(days=1)
-    
-    # Total counts
-    total_users = User.objects.count()
-    total_founders = User.objects.filter(role='founder').count()
-    total_investors = User.objects.filter(role='investor').count()
-
-    total_videos = Video.objects.count()
-    active_videos = Video.objects.filter(status='active', is_current=True).count()
-    pending_videos = Video.objects.filter(status='processing', is_current=True).count()
-
-    pending_reports = Report.objects.filter(status='pending').count()
-    
-    today_signups = User.objects.filter(created_at__gte=today_start, created_at__lt=today_end).count()
-    today_videos = Video.objects.filter(created_at__gte=today_start, created_at__lt=today_end).count()
-        
-    # For matches
-    try:
-        from apps.matches.models import Match
-        total_matches = Match.objects.filter(is_active=True).count()
-        today_matches = Match.objects.filter(
-            created_at__gte=today_start, 
-            created_at__lt=today_end,
-            is_active=True
-        ).count()
-    except ImportError:
-        total_matches = 0
-        today_matches = 0
+    """Get admin dashboard statistics (aggregated, cached briefly)"""
+    stats = get_dashboard_stats()
 
     return Response({
-        'total_users': total_users,
-        'total_founders': total_founders,
-        'total_investors': total_investors,
-        'total_videos': total_videos,
-        'active_videos': active_videos,
-        'pending_videos': pending_videos,
-        'total_matches': total_matches,
-        'pending_reports': pending_reports,
-        'today_signups': today_signups,
-        'today_videos': today_videos,
-        'today_matches': today_matches,
+        'total_users': stats['total_users'],
+        'total_founders': stats['total_founders'],
+        'total_investors': stats['total_investors'],
+        'total_videos': stats['total_videos'],
+        'active_videos': stats['active_videos'],
+        'pending_videos': stats['pending_videos'],
+        'total_matches': stats['total_matches'],
+        'pending_reports': stats['pending_reports'],
+        'today_signups': stats['today_signups'],
+        'today_videos': stats['today_videos'],
+        'today_matches': stats['today_matches'],
     })
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@require_admin
+def admin_storage_metrics_view(request):
+    """Storage call counts and latencies since this worker process started"""
+    snapshot = storage_metrics.snapshot()
+    if request.GET.get('reset') == 'true':
+        storage_metrics.reset()
+    return Response({'pid': os.getpid(), 'operations': snapshot})
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @require_admin
 def admin_users_view(request):
-    """Get all users with their profiles and stats"""
-    users = User.objects.all().select_related(
+    """
+    Get users with their profiles and stats, newest first.
+
+    Filters: ?role=, ?onboarding=true|false, ?search= (name/email).
+    Keyset-paginated - see config.pagination (?cursor=, ?limit=).
+    Stats are correlated subqueries, so a page costs one query.
+    """
+    users = User.objects.select_related(
         'founder_profile', 'investor_profile'
-    ).order_by('-created_at')
+    ).annotate(
+        video_count=_count_subquery(Video.objects.filter(founder=OuterRef('pk'))),
+        view_count=_count_subquery(VideoView.objects.filter(video__founder=OuterRef('pk'))),
+        match_count=_count_subquery(Match.objects.filter(
+            Q(founder=OuterRef('pk')) | Q(investor=OuterRef('pk')),
+            is_active=True
+        )),
+    )
+    
+    role = request.GET.get('role')
+    if role:
+        users = users.filter(role=role)
+    
+    onboarding = request.GET.get('onboarding')
+    if onboarding in ('true', 'false'):
+        users = users.filter(onboarding_complete=onboarding == 'true')
+    
+    search = request.GET.get('search', '').strip()
+    if search:
+        users = users.filter(Q(name__icontains=search) | Q(email__icontains=search))
     
     try:
-        from apps.matches.models import Match
-        has_match_model = True
-    except ImportError:
-        has_match_model = False
+        page, next_cursor = keyset_page(users, request, ADMIN_PAGE_SIZE, MAX_ADMIN_PAGE_SIZE)
+    except ValueError as e:
+        return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     users_data = []
-    for user in users:
-        # Get user stats based on role
-        if user.role == 'founder':
-            video_count = Video.objects.filter(founder=user).count()
-            view_count = VideoView.objects.filter(video__founder=user).count()
-            match_count = Match.objects.filter(founder=user, is_active=True).count() if has_match_model else 0
-        elif user.role == 'investor':
-            video_count = 0
-            view_count = 0
-            match_count = Match.objects.filter(investor=user, is_active=True).count() if has_match_model else 0
-        else:
-            video_count = 0
-            view_count = 0
-            match_count = 0
+    for user in page:
+        # Videos/views only count for founders, as before
+        is_founder = user.role == 'founder'
         
         user_data = {
             'id': str(user.id),
@@ -115,9 +142,9 @@ def admin_users_view(request):
             'created_at': user.created_at.isoformat(),
             'onboarding_complete': user.onboarding_complete,
             'stats': {
-                'video_count': video_count,
-                'match_count': match_count,
-                'view_count': view_count,
+                'video_count': user.video_count if is_founder else 0,
+                'match_count': user.match_count if user.role in ('founder', 'investor') else 0,
+                'view_count': user.view_count if is_founder else 0,
             },
             'founder_profile': None,
             'investor_profile': None,
@@ -152,59 +179,107 @@ def admin_users_view(request):
         
         users_data.append(user_data)
     
-    return Response(users_data)
+    return paginated_response(Response(users_data), next_cursor)
+
+
+def _moderation_videos():
+    """Videos with founder + profile joined and like/view counts annotated"""
+    return Video.objects.select_related('founder', 'founder__founder_profile').annotate(
+        like_count_annotated=_count_subquery(VideoLike.objects.filter(video=OuterRef('pk'))),
+        view_count_annotated=_count_subquery(VideoView.objects.filter(video=OuterRef('pk'))),
+    )
+
+
+def _filter_video_status(videos, status_filter):
+    """'pending' means current videos awaiting review - served by (status, is_current)"""
+    if status_filter == 'pending':
+        return videos.filter(status='processing', is_current=True)
+    if status_filter and status_filter != 'all':
+        return videos.filter(status=status_filter)
+    return videos
+
+
+def _serialize_admin_video(video):
+    # Get founder's company name
+    company_name = None
+    try:
+        if hasattr(video.founder, 'founder_profile'):
+            company_name = video.founder.founder_profile.company_name
+    except Exception:
+        pass
+    
+    return {
+        'id': str(video.id),
+        'title': video.title,
+        'url': video.url,
+        'thumbnail_url': video.thumbnail_url,
+        'duration': video.duration,
+        'status': video.status,
+        'is_current': video.is_current,
+        'view_count': video.view_count_annotated,
+        'like_count': video.like_count_annotated,
+        'created_at': video.created_at.isoformat(),
+        'founder': {
+            'id': str(video.founder.id),
+            'name': video.founder.name,
+            'email': video.founder.email,
+            'company_name': company_name,
+        }
+    }
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @require_admin
 def admin_videos_view(request):
-    """Get all videos for admin review, sorted by most liked first"""
-    status_filter = request.GET.get('status', None)
+    """
+    Video moderation queue.
 
-    # Annotate with like_count directly in the DB so sorting is a single
-    # query instead of computing likes per-video in a Python loop.
-    videos = Video.objects.select_related('founder').annotate(
-        like_count_annotated=Count('likes')
-    ).order_by('-like_count_annotated', '-created_at')
+    ?status= filters (pending, processing, active, rejected, ... or all).
+    Newest first, or oldest first with ?order=oldest to work a queue.
+    Keyset-paginated - see config.pagination (?cursor=, ?limit=).
+    """
+    videos = _filter_video_status(_moderation_videos(), request.GET.get('status'))
+
+    try:
+        page, next_cursor = keyset_page(
+            videos, request, ADMIN_PAGE_SIZE, MAX_ADMIN_PAGE_SIZE,
+            ascending=request.GET.get('order') == 'oldest'
+        )
+    except ValueError as e:
+        return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    videos_data = [_serialize_admin_video(video) for video in page]
+
+    return paginated_response(Response(videos_data), next_cursor)
 
-    if status_filter and status_filter != 'all':
-        videos = videos.filter(status=status_filter)
 
-    videos_data = []
-    for video in videos:
-        # Get founder's company name
-        company_name = None
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@require_admin
+def admin_next_pending_video_view(request):
+    """
+    Oldest video still awaiting review, so moderators can work one at a
+    time. Pass ?after=<video_id> to skip past a video without deciding it.
+    """
+    videos = _filter_video_status(_moderation_videos(), 'pending')
+
+    after = request.GET.get('after')
+    if after:
         try:
-            if hasattr(video.founder, 'founder_profile'):
-                company_name = video.founder.founder_profile.company_name
-        except Exception:
-            pass
-        
-        # like_count comes from the annotation above (no extra query needed)
-        view_count = VideoView.objects.filter(video=video).count()
-        like_count = video.like_count_annotated
-        
-        videos_data.append({
-            'id': str(video.id),
-            'title': video.title,
-            'url': video.url,
-            'thumbnail_url': video.thumbnail_url,
-            'duration': video.duration,
-            'status': video.status,
-            'is_current': video.is_current,
-            'view_count': view_count,
-            'like_count': like_count,
-            'created_at': video.created_at.isoformat(),
-            'founder': {
-                'id': str(video.founder.id),
-                'name': video.founder.name,
-                'email': video.founder.email,
-                'company_name': company_name,
-            }
-        })
+            current = Video.objects.only('created_at').get(id=after)
+        except (Video.DoesNotExist, ValidationError):
+            return Response({'message': 'Video not found'}, status=status.HTTP_404_NOT_FOUND)
+        videos = videos.filter(
+            Q(created_at__gt=current.created_at) | Q(created_at=current.created_at, id__gt=current.id)
+        )
+
+    video = videos.order_by('created_at', 'id').first()
 
-    return Response(videos_data)
+    return Response({
+        'video': _serialize_admin_video(video) if video else None,
+        'remaining': get_dashboard_stats()['pending_videos'],
+    })
 
 
 @api_view(['PUT'])
@@ -215,9 +290,11 @@ def admin_approve_video_view(request, video_id):
     try:
         video = Video.objects.get(id=video_id)
         video.status = 'active'
-        video.save()
+        # Status-only change - skip Video.save(), which re-archives siblings
+        Video.objects.filter(id=video.id).update(status=video.status, updated_at=timezone.now())
         
         NotificationService.create_video_status_notification(video, 'active')
+        invalidate_dashboard_stats()
         
         return Response({
             'message': 'Video approved',
@@ -235,9 +312,11 @@ def admin_reject_video_view(request, video_id):
     try:
         video = Video.objects.get(id=video_id)
         video.status = 'rejected'
-        video.save()
+        # Status-only change - skip Video.save(), which re-archives siblings
+        Video.objects.filter(id=video.id).update(status=video.status, updated_at=timezone.now())
 
         NotificationService.create_video_status_notification(video, 'rejected')
+        invalidate_dashboard_stats()
 
         return Response({
             'message': 'Video rejected',
@@ -247,6 +326,67 @@ def admin_reject_video_view(request, video_id):
         return Response({'message': 'Video not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@require_admin
+def admin_bulk_moderate_videos_view(request):
+    """
+    Approve or reject many videos at once.
+    Body: {"action": "approve" | "reject", "ids": [...]} (up to 500 ids).
+    Returns a result per id: updated, unchanged, skipped (archived or
+    deleted videos) or not_found.
+    """
+    new_status = VIDEO_MODERATION_ACTIONS.get(request.data.get('action'))
+    if new_status is None:
+        return Response({'message': 'action must be approve or reject'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        ids = _parse_ids(request.data.get('ids'))
+    except ValueError as e:
+        return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    with transaction.atomic():
+        videos = {
+            video.id: video
+            for video in Video.objects.select_for_update().filter(id__in=ids).only('id', 'founder_id', 'status')
+        }
+        to_update = [
+            video for video in videos.values()
+            if video.status in MODERATABLE_VIDEO_STATUSES and video.status != new_status
+        ]
+
+        # One UPDATE for the whole batch; is_current is untouched so there
+        # is nothing for Video.save() to archive
+        Video.objects.filter(id__in=[video.id for video in to_update]).update(
+            status=new_status,
+            updated_at=timezone.now()
+        )
+        NotificationService.create_video_status_notifications(to_update, new_status)
+
+    updated_ids = {video.id for video in to_update}
+    results = []
+    for video_id in ids:
+        video = videos.get(video_id)
+        if video is None:
+            result = 'not_found'
+        elif video_id in updated_ids:
+            result = 'updated'
+        elif video.status == new_status:
+            result = 'unchanged'
+        else:
+            result = 'skipped'
+        results.append({'id': str(video_id), 'result': result})
+
+    if updated_ids:
+        invalidate_dashboard_stats()
+
+    return Response({
+        'status': new_status,
+        'updated': len(updated_ids),
+        'results': results,
+    })
+
+
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 @require_admin
@@ -258,6 +398,7 @@ def admin_delete_user_view(request, user_id):
             return Response({'message': 'Cannot delete admin users'}, status=status.HTTP_403_FORBIDDEN)
         user.is_active = False
         user.save()
+        invalidate_dashboard_stats()
         return Response({'message': 'User deactivated successfully'})
     except User.DoesNotExist:
         return Response({'message': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
@@ -0,0 +1,35 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.videos.models import VideoUpload
+from apps.videos.uploads import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Abort multipart video uploads that were never completed, freeing their stored parts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help='Abort uploads started more than this many hours ago')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be aborted without aborting')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        stale = VideoUpload.objects.filter(status='uploading', created_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f'Would abort {stale.count()} uploads started before {cutoff:%Y-%m-%d %H:%M}')
+            return
+
+        backend = get_backend()
+        aborted = failed = 0
+        for upload in stale.iterator():
+            try:
+                backend.abort(upload.key, upload.upload_id)
+            except Exception as e:
+                print(f"Failed to abort upload {upload.id}: {e}")
+                failed += 1
+                continue
+            VideoUpload.objects.filter(id=upload.id, status='uploading').update(status='aborted', updated_at=timezone.now())
+            aborted += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Aborted {aborted} stale uploads ({failed} failed)'))
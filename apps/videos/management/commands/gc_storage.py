@@ -0,0 +1,60 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from config.storage import get_store
+from apps.videos import storage_gc
+
+
+def _mb(size):
+    return f'{size / (1024 * 1024):.1f} MB'
+
+
+class Command(BaseCommand):
+    help = 'Delete media objects that no video or user references any more'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-days', type=int, default=settings.STORAGE_GC_GRACE_DAYS,
+                            help='Only delete objects (and soft-deleted videos) older than this many days')
+        parser.add_argument('--prefix', action='append', dest='prefixes',
+                            help=f"Prefix to scan (repeatable; default {', '.join(settings.STORAGE_GC_PREFIXES)})")
+        parser.add_argument('--dry-run', action='store_true', help='List what would be deleted without deleting')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['grace_days'])
+        dry_run = options['dry_run']
+        keys, prefixes = storage_gc.referenced(cutoff)
+        self.stdout.write(
+            f'{len(keys)} referenced objects, {len(prefixes)} HLS directories; '
+            f'collecting unreferenced objects older than {cutoff:%Y-%m-%d %H:%M}'
+        )
+
+        store = get_store()
+        total_scanned = total_orphans = total_bytes = total_failed = 0
+        for prefix in options['prefixes'] or settings.STORAGE_GC_PREFIXES:
+            scanned = orphaned = orphaned_bytes = 0
+            for page_scanned, orphans in storage_gc.find_orphans(prefix, cutoff, keys, prefixes):
+                scanned += page_scanned
+                orphaned += len(orphans)
+                orphaned_bytes += sum(obj.size for obj in orphans)
+
+                if dry_run:
+                    for obj in orphans:
+                        self.stdout.write(f'Would delete {obj.key} ({_mb(obj.size)}, {obj.last_modified:%Y-%m-%d})')
+                elif orphans:
+                    failed = store.delete_many(obj.key for obj in orphans)
+                    for key in failed:
+                        print(f"Failed to delete {key}")
+                    total_failed += len(failed)
+
+                self.stdout.write(f'{prefix}: scanned {scanned}, unreferenced {orphaned} ({_mb(orphaned_bytes)})')
+
+            total_scanned += scanned
+            total_orphans += orphaned
+            total_bytes += orphaned_bytes
+
+        verb = 'Would delete' if dry_run else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {total_orphans - total_failed} of {total_scanned} objects ({_mb(total_bytes)}); '
+            f'{total_failed} failed'
+        ))
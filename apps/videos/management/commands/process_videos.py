@@ -0,0 +1,11 @@
+from config.jobs import WorkerCommand
+from apps.videos import processing
+
+
+class Command(WorkerCommand):
+    help = 'Probe, poster and transcode uploaded videos (runs as a long-lived worker unless --once is given)'
+    default_batch_size = 1
+    default_interval = 5.0
+
+    def process_batch(self, batch_size):
+        return processing.process_queued(batch_size)
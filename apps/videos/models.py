@@ -1,5 +1,6 @@
 import uuid
 from django.db import models
+from django.utils import timezone
 from apps.accounts.models import User
 
 
@@ -14,10 +15,15 @@ class Video(models.Model):
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     founder = models.ForeignKey(User, on_delete=models.CASCADE, related_name='videos')
-    url = models.URLField(max_length=500)
+    url = models.URLField(max_length=500)  # Playback file (the transcode once processed)
+    source_url = models.URLField(max_length=500, blank=True, default='')  # Original upload, set by processing
+    stream_url = models.URLField(max_length=500, blank=True, default='')  # HLS master playlist, set by processing
     thumbnail_url = models.URLField(max_length=500, blank=True, default='')
+    thumbnail_variants = models.JSONField(default=dict, blank=True)  # Size variants, see apps/images/derivatives.py
     title = models.CharField(max_length=255, blank=True, default='')
     duration = models.FloatField(null=True, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='processing')
     is_current = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -29,6 +35,8 @@ class Video(models.Model):
         indexes = [
             models.Index(fields=['founder', 'is_current']),
             models.Index(fields=['status', 'is_current']),
+            # Admin moderation queue (status filter + keyset on created_at)
+            models.Index(fields=['status', 'is_current', 'created_at']),
         ]
 
     def __str__(self):
@@ -48,6 +56,70 @@ class Video(models.Model):
         super().save(*args, **kwargs)
 
 
+
+
+class VideoProcessingJob(models.Model):
+    """Processing queue - rows are run by the process_videos worker (apps/videos/processing.py)"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+        ('skipped', 'Skipped'),  # Video deleted before it was processed
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='processing_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'video_processing_jobs'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.video_id} ({self.status})"
+
+class VideoUpload(models.Model):
+    """A direct-to-storage multipart upload; becomes a Video on completion"""
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('completed', 'Completed'),
+        ('aborted', 'Aborted'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    founder = models.ForeignKey(User, on_delete=models.CASCADE, related_name='video_uploads')
+    key = models.CharField(max_length=500)
+    upload_id = models.CharField(max_length=1024)  # Storage's multipart upload id
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    size = models.BigIntegerField()
+    part_size = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    video = models.ForeignKey(Video, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'video_uploads'
+        ordering = ['-created_at']
+        indexes = [
+            # Stale upload cleanup (abort_stale_uploads)
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+
 class VideoLike(models.Model):
     """Track video likes from users"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
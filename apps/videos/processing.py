@@ -0,0 +1,303 @@
+"""
+Post-upload video processing.
+
+Uploads enqueue a VideoProcessingJob in the same transaction that creates
+the Video; `manage.py process_videos` claims jobs (outbox-style, like the
+email worker) and for each one:
+
+  1. downloads the original from storage to a temp dir
+  2. probes the real duration and dimensions with ffmpeg
+  3. extracts a poster frame
+  4. transcodes an H.264/AAC MP4 capped at VIDEO_TRANSCODE_MAX_DIMENSION
+     with the moov atom up front (faststart) so playback starts before
+     the whole file is downloaded
+  5. builds an HLS ladder (VIDEO_HLS_LADDER) in a single ffmpeg pass -
+     one decode, split and scaled per rendition, keyframes aligned to
+     segment boundaries - with the lowest rendition listed first in the
+     master playlist so players start small and step up
+
+and writes the results back to the Video. The original stays in storage
+and is recorded in `Video.source_url`; `Video.stream_url` points at the
+HLS master playlist.
+
+ffmpeg comes from imageio-ffmpeg (bundled binary) unless FFMPEG_BINARY
+is set.
+"""
+import os
+import re
+import subprocess
+import tempfile
+from django.conf import settings
+from django.utils import timezone
+from apps.images import derivatives
+from config.jobs import JobQueue
+from config.storage import absolute_url, get_store, storage_key
+from .models import Video, VideoProcessingJob
+
+
+class ProcessingError(Exception):
+    """ffmpeg couldn't handle the upload"""
+
+
+def ffmpeg_binary():
+    if settings.FFMPEG_BINARY:
+        return settings.FFMPEG_BINARY
+    import imageio_ffmpeg
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def _run(args, timeout=None):
+    result = subprocess.run(
+        [ffmpeg_binary(), '-hide_banner', '-nostdin', *args],
+        capture_output=True,
+        timeout=timeout or settings.VIDEO_PROCESSING_TIMEOUT,
+    )
+    return result.returncode, result.stderr.decode('utf-8', 'replace')
+
+
+def output_key(video, name):
+    """Derived files live next to each other under the video's own prefix"""
+    return f"videos/{video.founder_id}/{video.id}/{name}"
+
+
+_DURATION_RE = re.compile(r'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)')
+_VIDEO_STREAM_RE = re.compile(r'Stream #\S+.*?: Video: .*?(\d{2,5})x(\d{2,5})')
+_ROTATION_RE = re.compile(r'rotat\w* of (-?\d+(?:\.\d+)?) degrees|rotate\s*:\s*(-?\d+)')
+
+
+def probe(path):
+    """
+    {'duration', 'width', 'height', 'has_audio'} read from ffmpeg's stream
+    summary. Width/height are as displayed, i.e. after rotation metadata.
+    """
+    # ffmpeg exits non-zero without an output file; the summary is still printed
+    _, output = _run(['-i', path])
+
+    duration = _DURATION_RE.search(output)
+    stream = _VIDEO_STREAM_RE.search(output)
+    if not duration or not stream:
+        raise ProcessingError('Not a readable video file')
+
+    hours, minutes, seconds = duration.groups()
+    width, height = int(stream.group(1)), int(stream.group(2))
+
+    rotation = _ROTATION_RE.search(output)
+    if rotation:
+        degrees = abs(int(float(rotation.group(1) or rotation.group(2))))
+        if degrees % 180 == 90:
+            width, height = height, width
+
+    return {
+        'duration': int(hours) * 3600 + int(minutes) * 60 + float(seconds),
+        'width': width,
+        'height': height,
+        'has_audio': 'Audio:' in output,
+    }
+
+
+def extract_poster(source, destination, duration):
+    """Grab one frame a little way in (the very first is often black)"""
+    at = min(1.0, duration / 2) if duration else 0
+    code, output = _run([
+        '-ss', f'{at:.2f}', '-i', source,
+        '-frames:v', '1',
+        '-vf', f'scale={settings.VIDEO_POSTER_WIDTH}:-2',
+        '-q:v', '3',
+        '-y', destination,
+    ])
+    if code != 0 or not os.path.exists(destination):
+        raise ProcessingError(f'Poster extraction failed: {output[-500:]}')
+
+
+def transcode(source, destination, has_audio):
+    """H.264/AAC MP4, longest side capped, faststart"""
+    limit = settings.VIDEO_TRANSCODE_MAX_DIMENSION
+    scale = (
+        f"scale='if(gt(iw,ih),min({limit},iw),-2)':'if(gt(iw,ih),-2,min({limit},ih))'"
+    )
+    args = [
+        '-i', source,
+        '-vf', scale,
+        '-c:v', 'libx264', '-preset', 'veryfast', '-crf', str(settings.VIDEO_TRANSCODE_CRF),
+        '-maxrate', settings.VIDEO_TRANSCODE_MAXRATE, '-bufsize', settings.VIDEO_TRANSCODE_BUFSIZE,
+        '-pix_fmt', 'yuv420p',
+    ]
+    args += ['-c:a', 'aac', '-b:a', '128k', '-ac', '2'] if has_audio else ['-an']
+    args += ['-movflags', '+faststart', '-y', destination]
+
+    code, output = _run(args)
+    if code != 0:
+        raise ProcessingError(f'Transcode failed: {output[-500:]}')
+
+
+def hls_renditions(width, height):
+    """
+    Ladder entries that don't upscale the source (always at least the
+    lowest). Rendition sizes are the short side, so portrait videos get
+    the same ladder as landscape ones.
+    """
+    short_side = min(width, height)
+    ladder = sorted(settings.VIDEO_HLS_LADDER)
+    renditions = [rung for rung in ladder if rung[0] <= short_side]
+    return renditions or ladder[:1]
+
+
+def build_hls(source, output_dir, info):
+    """Write master.m3u8 plus <size>p/index.m3u8 + segments into output_dir"""
+    renditions = hls_renditions(info['width'], info['height'])
+    landscape = info['width'] >= info['height']
+    segment = settings.VIDEO_HLS_SEGMENT_SECONDS
+
+    outputs = ''.join(f'[v{i}]' for i in range(len(renditions)))
+    filters = [f'[0:v]split={len(renditions)}{outputs}']
+    args = ['-i', source]
+    stream_map = []
+
+    for i, (size, video_bitrate, audio_bitrate) in enumerate(renditions):
+        scale = f'-2:{size}' if landscape else f'{size}:-2'
+        filters.append(f'[v{i}]scale={scale}[v{i}out]')
+        os.makedirs(os.path.join(output_dir, f'{size}p'), exist_ok=True)
+
+    args += ['-filter_complex', ';'.join(filters)]
+    for i, (size, video_bitrate, audio_bitrate) in enumerate(renditions):
+        args += ['-map', f'[v{i}out]']
+        if info['has_audio']:
+            args += ['-map', '0:a:0']
+        args += [
+            f'-b:v:{i}', video_bitrate,
+            f'-maxrate:v:{i}', video_bitrate,
+            f'-bufsize:v:{i}', video_bitrate,
+        ]
+        if info['has_audio']:
+            args += [f'-b:a:{i}', audio_bitrate]
+            stream_map.append(f'v:{i},a:{i},name:{size}p')
+        else:
+            stream_map.append(f'v:{i},name:{size}p')
+
+    args += [
+        '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p',
+        # Every segment starts on a keyframe so renditions can switch cleanly
+        '-force_key_frames', f'expr:gte(t,n_forced*{segment})', '-sc_threshold', '0',
+    ]
+    if info['has_audio']:
+        args += ['-c:a', 'aac', '-ac', '2']
+    args += [
+        '-f', 'hls',
+        '-hls_time', str(segment),
+        '-hls_playlist_type', 'vod',
+        '-hls_segment_filename', os.path.join(output_dir, '%v', 'seg_%03d.ts'),
+        '-master_pl_name', 'master.m3u8',
+        '-var_stream_map', ' '.join(stream_map),
+        '-y', os.path.join(output_dir, '%v', 'index.m3u8'),
+    ]
+
+    code, output = _run(args)
+    if code != 0 or not os.path.exists(os.path.join(output_dir, 'master.m3u8')):
+        raise ProcessingError(f'HLS packaging failed: {output[-500:]}')
+
+
+def _clear_prefix(prefix):
+    """Delete everything stored under prefix (re-processing)"""
+    store = get_store()
+    for page in store.list(f'{prefix}/'):
+        store.delete_many(obj.key for obj in page)
+
+
+def _save_tree(local_dir, prefix, heartbeat):
+    """
+    Upload a directory under prefix. Playlists reference segments by
+    relative name, so every file must land on exactly its key.
+    """
+    # Never clear a tree another worker's run may be uploading
+    heartbeat()
+    _clear_prefix(prefix)
+    store = get_store()
+    for root, _, files in os.walk(local_dir):
+        for name in files:
+            heartbeat()
+            path = os.path.join(root, name)
+            key = f"{prefix}/{os.path.relpath(path, local_dir).replace(os.sep, '/')}"
+            with open(path, 'rb') as fh:
+                store.put_file(key, fh)
+
+
+def _save(local_path, key):
+    # Re-processing overwrites the previous derivative in place
+    with open(local_path, 'rb') as fh:
+        return get_store().put_file(key, fh).key
+
+
+def process_video(video, heartbeat=lambda: None):
+    """
+    Probe, poster and transcode one video and write the results back.
+    heartbeat() is called between steps; the queue uses it to keep the
+    job's lock and to stop (raise) if another worker has taken it over.
+    """
+    source_url = video.source_url or video.url
+
+    with tempfile.TemporaryDirectory(prefix='video-') as workdir:
+        source_key = storage_key(source_url)
+        if source_key is None:
+            raise ProcessingError(f'Not a media URL: {source_url}')
+
+        source = os.path.join(workdir, 'source')
+        get_store().download(source_key, source)
+
+        heartbeat()
+        info = probe(source)
+
+        heartbeat()
+        poster = os.path.join(workdir, 'poster.jpg')
+        extract_poster(source, poster, info['duration'])
+
+        heartbeat()
+        playback = os.path.join(workdir, 'playback.mp4')
+        transcode(source, playback, info['has_audio'])
+        playback_info = probe(playback)
+
+        stream_key = ''
+        if settings.VIDEO_HLS_LADDER:
+            heartbeat()
+            hls_dir = os.path.join(workdir, 'hls')
+            build_hls(source, hls_dir, info)
+            _save_tree(hls_dir, output_key(video, 'hls'), heartbeat)
+            stream_key = output_key(video, 'hls/master.m3u8')
+
+        heartbeat()
+        poster_key = _save(poster, output_key(video, 'poster.jpg'))
+        playback_key = _save(playback, output_key(video, 'playback.mp4'))
+
+    heartbeat()
+    # update() rather than save(): Video.save() re-runs the "archive the
+    # previous current video" logic, which isn't ours to trigger here
+    Video.objects.filter(id=video.id).update(
+        source_url=source_url,
+        url=absolute_url(playback_key, source_url),
+        stream_url=absolute_url(stream_key, source_url) if stream_key else '',
+        thumbnail_url=absolute_url(poster_key, source_url),
+        duration=round(info['duration'], 2),
+        width=playback_info['width'],
+        height=playback_info['height'],
+        updated_at=timezone.now(),
+    )
+    derivatives.enqueue('thumbnail', video.id, absolute_url(poster_key, source_url))
+
+
+def enqueue(video):
+    """Queue a video for processing (call inside the transaction that created it)"""
+    return VideoProcessingJob.objects.create(video=video)
+
+
+# Unreadable files won't get better on retry
+queue = JobQueue(VideoProcessingJob, 'VIDEO_PROCESSING', permanent_errors=(ProcessingError,), select_related=('video',))
+
+
+def _process_job(job):
+    if job.video.status == 'deleted':
+        return 'skipped'
+    process_video(job.video, lambda: queue.heartbeat(job))
+
+
+def process_queued(batch_size=1):
+    """Run one batch of due jobs. Returns (done, failed) counts."""
+    return queue.process(batch_size, _process_job, lambda job: f"Video processing failed for {job.video_id}")
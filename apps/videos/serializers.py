@@ -2,13 +2,19 @@ from rest_framework import serializers
 from .models import Video, VideoLike, VideoView
 from apps.accounts.models import User
 from apps.profiles.models import FounderProfile
+from apps.images.derivatives import srcset
 
 
 class FounderUserSerializer(serializers.ModelSerializer):
     """Serializer for user info in video feed"""
+    avatar_srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = User
-        fields = ['id', 'name', 'avatar_url']
+        fields = ['id', 'name', 'avatar_url', 'avatar_srcset']
+
+    def get_avatar_srcset(self, obj):
+        return srcset(obj.avatar_variants, obj.avatar_url)
 
 
 class FounderProfileSerializer(serializers.ModelSerializer):
@@ -33,17 +39,21 @@ class FounderWithProfileSerializer(serializers.Serializer):
 
 class VideoSerializer(serializers.ModelSerializer):
     """Basic video serializer"""
+    thumbnail_srcset = serializers.SerializerMethodField()
     like_count = serializers.SerializerMethodField()
     view_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Video
         fields = [
-            'id', 'founder_id', 'url', 'thumbnail_url', 
-            'title', 'duration', 'status', 'like_count', 'view_count',
+            'id', 'founder_id', 'url', 'stream_url', 'thumbnail_url', 'thumbnail_srcset',
+            'title', 'duration', 'width', 'height', 'status', 'like_count', 'view_count',
             'is_current', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'like_count', 'view_count', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'stream_url', 'width', 'height', 'like_count', 'view_count', 'created_at', 'updated_at']
+    
+    def get_thumbnail_srcset(self, obj):
+        return srcset(obj.thumbnail_variants, obj.thumbnail_url)
     
     def get_like_count(self, obj):
         return obj.likes.count()
@@ -55,6 +65,7 @@ class VideoSerializer(serializers.ModelSerializer):
 class VideoWithFounderSerializer(serializers.ModelSerializer):
     """Video serializer with full founder details for feed"""
     founder = serializers.SerializerMethodField()
+    thumbnail_srcset = serializers.SerializerMethodField()
     like_count = serializers.SerializerMethodField()
     view_count = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
@@ -62,8 +73,8 @@ class VideoWithFounderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Video
         fields = [
-            'id', 'founder_id', 'url', 'thumbnail_url',
-            'title', 'duration', 'status', 'like_count', 'view_count', 'is_liked',
+            'id', 'founder_id', 'url', 'stream_url', 'thumbnail_url', 'thumbnail_srcset',
+            'title', 'duration', 'width', 'height', 'status', 'like_count', 'view_count', 'is_liked',
             'is_current', 'created_at', 'founder'
         ]
     
@@ -81,7 +92,8 @@ class VideoWithFounderSerializer(serializers.ModelSerializer):
                 'user': {
                     'id': str(user.id),
                     'name': user.name,
-                    'avatar_url': user.avatar_url
+                    'avatar_url': user.avatar_url,
+                    'avatar_srcset': srcset(user.avatar_variants, user.avatar_url),
                 },
                 'profile': {
                     'company_name': profile.company_name if profile else 'Unknown Company',
@@ -95,6 +107,9 @@ class VideoWithFounderSerializer(serializers.ModelSerializer):
             print(f"Error serializing founder: {e}")
             return None
     
+    def get_thumbnail_srcset(self, obj):
+        return srcset(obj.thumbnail_variants, obj.thumbnail_url)
+    
     def get_like_count(self, obj):
         return obj.likes.count()
     
@@ -0,0 +1,75 @@
+"""
+Garbage collection for media storage.
+
+Soft-deleted videos, replaced avatars and failed cleanups leave objects
+behind that nothing points at. `find_orphans()` pages through
+STORAGE_GC_PREFIXES and yields, page by page, the objects that no row
+references and that are older than the grace period. The grace period
+also covers uploads that have been stored but whose row isn't written
+yet.
+
+Referenced means:
+- any media URL on a Video or User: video, source, poster, avatar and
+  the image variants;
+- everything under a video's HLS directory (the master playlist's
+  prefix);
+- the key of an upload still in progress.
+
+Soft-deleted videos stop counting as references once the deletion (the
+row's updated_at) is older than the grace period.
+"""
+from django.db.models import Q
+from apps.accounts.models import User
+from config.storage import get_store, storage_key
+from .models import Video, VideoUpload
+
+
+def _variant_urls(variants):
+    return [variant.get('url') for variant in (variants or {}).get('variants', [])]
+
+
+def referenced(cutoff):
+    """(keys, prefixes) currently in use; prefixes end with '/'"""
+    keys, prefixes = set(), set()
+
+    def add(url):
+        key = storage_key(url)
+        if key:
+            keys.add(key)
+
+    videos = Video.objects.exclude(Q(status='deleted') & Q(updated_at__lt=cutoff)).values_list(
+        'url', 'source_url', 'stream_url', 'thumbnail_url', 'thumbnail_variants'
+    )
+    for url, source_url, stream_url, thumbnail_url, thumbnail_variants in videos.iterator():
+        for value in (url, source_url, thumbnail_url, *_variant_urls(thumbnail_variants)):
+            add(value)
+        stream_key = storage_key(stream_url)
+        if stream_key:
+            # Playlists reference renditions and segments by relative name
+            prefixes.add(stream_key.rsplit('/', 1)[0] + '/')
+
+    users = User.objects.exclude(avatar_url__isnull=True).values_list('avatar_url', 'avatar_variants')
+    for avatar_url, avatar_variants in users.iterator():
+        for value in (avatar_url, *_variant_urls(avatar_variants)):
+            add(value)
+
+    keys.update(VideoUpload.objects.filter(status='uploading').values_list('key', flat=True))
+    return keys, prefixes
+
+
+def is_referenced(key, keys, prefixes):
+    if key in keys:
+        return True
+    # Check each parent directory: 'a/b/c.ts' -> 'a/', 'a/b/'
+    parts = key.split('/')[:-1]
+    return any('/'.join(parts[:depth]) + '/' in prefixes for depth in range(1, len(parts) + 1))
+
+
+def find_orphans(prefix, cutoff, keys, prefixes):
+    """Yield (objects scanned, orphans) per listing page under prefix"""
+    for page in get_store().list(prefix):
+        orphans = [
+            obj for obj in page
+            if obj.last_modified < cutoff and not is_referenced(obj.key, keys, prefixes)
+        ]
+        yield len(page), orphans
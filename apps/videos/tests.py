@@ -0,0 +1,389 @@
+import hashlib
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.accounts.models import User
+from config.storage import get_store
+from .models import Video, VideoProcessingJob, VideoUpload
+from . import processing, storage_gc
+from .uploads import MIN_PART_SIZE, UploadError, multipart_etag, verify_parts
+
+
+def _top_level_atoms(path):
+    """Names of an MP4's top-level boxes, in file order"""
+    atoms = []
+    with open(path, 'rb') as fh:
+        while True:
+            header = fh.read(8)
+            if len(header) < 8:
+                return atoms
+            size, name = struct.unpack('>I4s', header)
+            if size == 1:
+                size = struct.unpack('>Q', fh.read(8))[0]
+                fh.seek(size - 16, os.SEEK_CUR)
+            else:
+                fh.seek(size - 8, os.SEEK_CUR)
+            atoms.append(name.decode('latin-1'))
+
+
+class VideoProcessingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.workdir = tempfile.mkdtemp(prefix='video-tests-')
+        # A tiny 1.5 s clip with audio, generated rather than checked in
+        cls.clip = os.path.join(cls.workdir, 'clip.mp4')
+        subprocess.run([
+            processing.ffmpeg_binary(), '-hide_banner', '-loglevel', 'error',
+            '-f', 'lavfi', '-i', 'testsrc=size=320x240:rate=24:duration=1.5',
+            '-f', 'lavfi', '-i', 'sine=duration=1.5',
+            '-c:v', 'mpeg4', '-c:a', 'aac', '-shortest', '-y', cls.clip,
+        ], check=True)
+        # ...and a portrait one without an audio track
+        cls.portrait_clip = os.path.join(cls.workdir, 'portrait.mp4')
+        subprocess.run([
+            processing.ffmpeg_binary(), '-hide_banner', '-loglevel', 'error',
+            '-f', 'lavfi', '-i', 'testsrc=size=270x480:rate=24:duration=1.5',
+            '-c:v', 'mpeg4', '-y', cls.portrait_clip,
+        ], check=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.workdir, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.founder = User.objects.create_user(email='founder@example.com', password='pw-12345', name='Founder')
+
+    def test_probe_reads_duration_and_size(self):
+        info = processing.probe(self.clip)
+
+        self.assertAlmostEqual(info['duration'], 1.5, delta=0.1)
+        self.assertEqual((info['width'], info['height']), (320, 240))
+        self.assertTrue(info['has_audio'])
+
+    def test_transcode_puts_moov_before_mdat(self):
+        output = os.path.join(self.workdir, 'playback.mp4')
+        processing.transcode(self.clip, output, has_audio=True)
+
+        atoms = _top_level_atoms(output)
+        self.assertLess(atoms.index('moov'), atoms.index('mdat'))
+        self.assertEqual(processing.probe(output)['width'], 320)
+
+    def _process_upload(self, clip, **overrides):
+        """Store clip as a founder's upload and run one worker batch on it"""
+        media_root = tempfile.mkdtemp(prefix='media-', dir=self.workdir)
+        os.makedirs(os.path.join(media_root, 'videos'))
+        shutil.copy(clip, os.path.join(media_root, 'videos', 'upload.mp4'))
+
+        with override_settings(MEDIA_ROOT=media_root, MEDIA_URL='/media/', **overrides):
+            video = Video.objects.create(founder=self.founder, url='http://testserver/media/videos/upload.mp4')
+            job = processing.enqueue(video)
+            self.assertEqual(processing.process_queued(), (1, 0))
+
+        video.refresh_from_db()
+        job.refresh_from_db()
+        return video, job, media_root
+
+    def test_queued_video_is_processed(self):
+        video, job, media_root = self._process_upload(self.clip)
+
+        self.assertEqual(job.status, 'done')
+        self.assertAlmostEqual(video.duration, 1.5, delta=0.1)
+        self.assertEqual((video.width, video.height), (320, 240))
+        # The original is kept; playback switches to the faststart transcode
+        prefix = f'http://testserver/media/videos/{video.founder_id}/{video.id}'
+        self.assertEqual(video.source_url, 'http://testserver/media/videos/upload.mp4')
+        self.assertEqual(video.url, f'{prefix}/playback.mp4')
+        self.assertEqual(video.thumbnail_url, f'{prefix}/poster.jpg')
+        playback = os.path.join(media_root, 'videos', str(video.founder_id), str(video.id), 'playback.mp4')
+        atoms = _top_level_atoms(playback)
+        self.assertLess(atoms.index('moov'), atoms.index('mdat'))
+        self.assertTrue(os.path.exists(os.path.join(os.path.dirname(playback), 'poster.jpg')))
+
+    def test_hls_renditions_never_upscale(self):
+        ladder = [(480, '1000k', '96k'), (240, '400k', '64k'), (720, '2500k', '128k')]
+        with override_settings(VIDEO_HLS_LADDER=ladder):
+            self.assertEqual([rung[0] for rung in processing.hls_renditions(270, 480)], [240])
+            self.assertEqual([rung[0] for rung in processing.hls_renditions(1280, 720)], [240, 480, 720])
+            # Smaller than every rung: still the lowest one
+            self.assertEqual([rung[0] for rung in processing.hls_renditions(160, 120)], [240])
+
+    def test_portrait_video_without_audio_gets_an_hls_ladder(self):
+        ladder = [(240, '400k', '64k'), (144, '200k', '32k'), (480, '1000k', '96k')]
+        video, job, media_root = self._process_upload(self.portrait_clip, VIDEO_HLS_LADDER=ladder)
+
+        self.assertEqual(job.status, 'done')
+        self.assertEqual((video.width, video.height), (270, 480))
+        prefix = f'videos/{video.founder_id}/{video.id}/hls'
+        self.assertEqual(video.stream_url, f'http://testserver/media/{prefix}/master.m3u8')
+
+        hls_dir = os.path.join(media_root, prefix)
+        # 480p would upscale the 270px-wide source
+        self.assertEqual(sorted(os.listdir(hls_dir)), ['144p', '240p', 'master.m3u8'])
+        for rendition in ('144p', '240p'):
+            files = os.listdir(os.path.join(hls_dir, rendition))
+            self.assertIn('index.m3u8', files)
+            self.assertTrue(any(name.endswith('.ts') for name in files))
+
+        with open(os.path.join(hls_dir, 'master.m3u8')) as fh:
+            master = fh.read().splitlines()
+        variants = [line for line in master if line and not line.startswith('#')]
+        stream_infs = [line for line in master if line.startswith('#EXT-X-STREAM-INF')]
+        # Lowest rendition first, so players start small and step up
+        self.assertEqual(variants, ['144p/index.m3u8', '240p/index.m3u8'])
+        self.assertIn('RESOLUTION=144x256', stream_infs[0])
+        self.assertIn('RESOLUTION=240x426', stream_infs[1])
+        self.assertFalse(any('mp4a' in line for line in stream_infs))
+
+    def test_empty_ladder_skips_hls(self):
+        video, job, media_root = self._process_upload(self.portrait_clip, VIDEO_HLS_LADDER=[])
+
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(video.stream_url, '')
+        self.assertTrue(video.url.endswith('/playback.mp4'))
+        self.assertFalse(os.path.exists(os.path.join(media_root, 'videos', str(video.founder_id), str(video.id), 'hls')))
+
+    def test_garbage_upload_is_marked_failed(self):
+        media_root = os.path.join(self.workdir, 'media')
+        os.makedirs(os.path.join(media_root, 'videos'))
+        with open(os.path.join(media_root, 'videos', 'garbage.mp4'), 'wb') as fh:
+            fh.write(b'not a video' * 100)
+
+        with override_settings(MEDIA_ROOT=media_root, MEDIA_URL='/media/'):
+            video = Video.objects.create(founder=self.founder, url='http://testserver/media/videos/garbage.mp4')
+            job = processing.enqueue(video)
+            done, failed = processing.process_queued()
+
+        job.refresh_from_db()
+        self.assertEqual((done, failed), (0, 1))
+        # Unreadable files aren't retried
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('Not a readable video file', job.last_error)
+        self.assertEqual(VideoProcessingJob.objects.filter(status='pending').count(), 0)
+
+
+class MultipartHelperTests(SimpleTestCase):
+    def test_multipart_etag_matches_s3(self):
+        part_md5s = [hashlib.md5(b'a').hexdigest(), hashlib.md5(b'b').hexdigest()]
+        expected = hashlib.md5(bytes.fromhex(part_md5s[0]) + bytes.fromhex(part_md5s[1])).hexdigest()
+
+        self.assertEqual(multipart_etag([f'"{part_md5s[0]}"', part_md5s[1].upper()]), f'{expected}-2')
+
+    def test_multipart_etag_is_unknown_for_non_md5_parts(self):
+        self.assertIsNone(multipart_etag([hashlib.md5(b'a').hexdigest(), 'not-an-md5']))
+
+    def test_verify_parts(self):
+        upload = SimpleNamespace(size=MIN_PART_SIZE + 10, part_size=MIN_PART_SIZE)
+        stored = [
+            {'part_number': 1, 'etag': 'aa', 'size': MIN_PART_SIZE},
+            {'part_number': 2, 'etag': 'bb', 'size': 10},
+        ]
+        claimed = [{'part_number': 2, 'etag': '"BB"'}, {'part_number': 1, 'etag': 'aa'}]
+
+        self.assertEqual(verify_parts(upload, claimed, stored), ['aa', 'bb'])
+
+        with self.assertRaisesMessage(UploadError, 'Expected parts 1-2'):
+            verify_parts(upload, claimed[:1], stored)
+        with self.assertRaisesMessage(UploadError, 'Part 2 ETag mismatch'):
+            verify_parts(upload, [{'part_number': 1, 'etag': 'aa'}, {'part_number': 2, 'etag': 'cc'}], stored)
+        with self.assertRaisesMessage(UploadError, 'Part 2 was not uploaded'):
+            verify_parts(upload, claimed, stored[:1])
+        with self.assertRaisesMessage(UploadError, 'expected'):
+            verify_parts(upload, claimed, [stored[0], dict(stored[1], size=9)])
+
+
+class LocalMultipartUploadTests(TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix='upload-tests-')
+        self.addCleanup(shutil.rmtree, self.workdir, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=os.path.join(self.workdir, 'media'),
+            MEDIA_URL='/media/',
+            VIDEO_UPLOAD_STAGING_DIR=os.path.join(self.workdir, 'staging'),
+            VIDEO_UPLOAD_PART_SIZE=MIN_PART_SIZE,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.founder = User.objects.create_user(email='founder@example.com', password='pw-12345', name='Founder')
+        self.client = APIClient()
+        self.client.force_authenticate(self.founder)
+        self.data = os.urandom(MIN_PART_SIZE + 1000)
+
+    def _initiate(self):
+        response = self.client.post('/api/videos/uploads/', {
+            'filename': 'pitch.mp4',
+            'size': len(self.data),
+            'content_type': 'video/mp4',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def _put_parts(self, upload):
+        parts, offset = [], 0
+        # Part URLs are signed; no credentials needed
+        anonymous = APIClient()
+        for part in upload['parts']:
+            body = self.data[offset:offset + part['size']]
+            offset += part['size']
+            response = anonymous.put(part['url'], body, content_type='application/octet-stream')
+            self.assertEqual(response.status_code, 200)
+            parts.append({'part_number': part['part_number'], 'etag': response['ETag']})
+        return parts
+
+    def test_initiate_put_parts_complete(self):
+        upload = self._initiate()
+        self.assertEqual([part['size'] for part in upload['parts']], [MIN_PART_SIZE, 1000])
+        parts = self._put_parts(upload)
+
+        response = self.client.post(f"/api/videos/uploads/{upload['id']}/complete/", {
+            'parts': parts,
+            'title': 'Pitch',
+            'duration': '12.5',
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        video = Video.objects.get(id=response.json()['id'])
+        self.assertEqual((video.title, video.duration, video.status), ('Pitch', 12.5, 'processing'))
+        stored = VideoUpload.objects.get(id=upload['id'])
+        self.assertEqual(stored.status, 'completed')
+        with open(os.path.join(self.workdir, 'media', stored.key), 'rb') as fh:
+            self.assertEqual(fh.read(), self.data)
+        self.assertTrue(VideoProcessingJob.objects.filter(video=video).exists())
+
+    def test_part_of_the_wrong_size_is_rejected(self):
+        upload = self._initiate()
+        response = APIClient().put(upload['parts'][1]['url'], b'short', content_type='application/octet-stream')
+        self.assertEqual(response.status_code, 400)
+
+    def test_bad_duration_leaves_the_upload_retryable(self):
+        upload = self._initiate()
+        parts = self._put_parts(upload)
+        url = f"/api/videos/uploads/{upload['id']}/complete/"
+
+        response = self.client.post(url, {'parts': parts, 'duration': 'abc'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(VideoUpload.objects.get(id=upload['id']).status, 'uploading')
+
+        response = self.client.post(url, {'parts': parts}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_failure_after_assembly_deletes_the_object(self):
+        upload = self._initiate()
+        parts = self._put_parts(upload)
+
+        with mock.patch.object(processing, 'enqueue', side_effect=RuntimeError('queue down')):
+            response = self.client.post(f"/api/videos/uploads/{upload['id']}/complete/", {'parts': parts}, format='json')
+
+        self.assertEqual(response.status_code, 500)
+        stored = VideoUpload.objects.get(id=upload['id'])
+        self.assertEqual(stored.status, 'aborted')
+        self.assertFalse(Video.objects.filter(founder=self.founder).exists())
+        self.assertFalse(os.path.exists(os.path.join(self.workdir, 'media', stored.key)))
+
+
+class StorageGcTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp(prefix='gc-tests-')
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_URL='/media/', STORAGE_GC_GRACE_DAYS=7)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.founder = User.objects.create_user(email='founder@example.com', password='pw-12345', name='Founder')
+        self.founder.avatar_url = self._stored('avatars/f/a.jpg')
+        self.founder.avatar_variants = {'source': self.founder.avatar_url, 'variants': [
+            {'url': self._stored('images/avatar/64.webp')},
+        ]}
+        self.founder.save()
+
+        self.video = Video.objects.create(
+            founder=self.founder,
+            url=self._stored('videos/f/v/playback.mp4'),
+            source_url=self._stored('videos/f/upload.mp4'),
+            stream_url=self._stored('videos/f/v/hls/master.m3u8'),
+            thumbnail_url=self._stored('videos/f/v/poster.jpg'),
+            thumbnail_variants={'variants': [{'url': self._stored('images/poster/64.webp')}]},
+        )
+        self._stored('videos/f/v/hls/240p/seg_000.ts')
+        VideoUpload.objects.create(
+            founder=self.founder, key='videos/f/in-progress.mp4', upload_id='u1',
+            filename='pitch.mp4', content_type='video/mp4', size=1, part_size=1,
+        )
+        self._stored('videos/f/in-progress.mp4')
+
+        # Deleted a month ago vs. yesterday
+        self._deleted_video('videos/f/old-deleted.mp4', days=30)
+        self._deleted_video('videos/f/new-deleted.mp4', days=1)
+
+        self._stored('avatars/f/replaced.jpg')
+        self._stored('avatars/f/just-uploaded.jpg', age_days=1)
+
+    def _stored(self, key, age_days=30):
+        """Store an object with a backdated mtime and return its URL"""
+        get_store().put_bytes(key, b'x')
+        mtime = time.time() - age_days * 86400
+        os.utime(os.path.join(self.media_root, key), (mtime, mtime))
+        return f'http://testserver/media/{key}'
+
+    def _deleted_video(self, key, days):
+        video = Video.objects.create(founder=self.founder, url=self._stored(key), status='deleted')
+        Video.objects.filter(id=video.id).update(updated_at=timezone.now() - timedelta(days=days))
+
+    def _remaining(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root).replace(os.sep, '/')
+            for root, _, files in os.walk(self.media_root) for name in files
+        )
+
+    def test_referenced(self):
+        keys, prefixes = storage_gc.referenced(timezone.now() - timedelta(days=7))
+
+        self.assertEqual(keys, {
+            'avatars/f/a.jpg', 'images/avatar/64.webp',
+            'videos/f/v/playback.mp4', 'videos/f/upload.mp4', 'videos/f/v/poster.jpg', 'images/poster/64.webp',
+            'videos/f/in-progress.mp4',
+            # Still inside the grace period
+            'videos/f/new-deleted.mp4',
+        })
+        self.assertEqual(prefixes, {'videos/f/v/hls/'})
+
+    def test_is_referenced_matches_whole_directories(self):
+        prefixes = {'videos/f/v/hls/'}
+
+        self.assertTrue(storage_gc.is_referenced('videos/f/v/hls/240p/seg_000.ts', set(), prefixes))
+        self.assertTrue(storage_gc.is_referenced('videos/f/v/hls/master.m3u8', set(), prefixes))
+        self.assertFalse(storage_gc.is_referenced('videos/f/v/hls-old/master.m3u8', set(), prefixes))
+        self.assertFalse(storage_gc.is_referenced('videos/f/v/poster.jpg', set(), prefixes))
+        self.assertTrue(storage_gc.is_referenced('videos/f/v/poster.jpg', {'videos/f/v/poster.jpg'}, prefixes))
+
+    def test_gc_deletes_only_old_unreferenced_objects(self):
+        before = self._remaining()
+
+        call_command('gc_storage', stdout=StringIO())
+
+        deleted = set(before) - set(self._remaining())
+        self.assertEqual(deleted, {'avatars/f/replaced.jpg', 'videos/f/old-deleted.mp4'})
+
+    def test_dry_run_deletes_nothing(self):
+        before = self._remaining()
+        out = StringIO()
+
+        call_command('gc_storage', '--dry-run', stdout=out)
+
+        self.assertEqual(self._remaining(), before)
+        self.assertIn('Would delete avatars/f/replaced.jpg', out.getvalue())
+        self.assertIn('Would delete videos/f/old-deleted.mp4', out.getvalue())
+        self.assertNotIn('just-uploaded', out.getvalue())
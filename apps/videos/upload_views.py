@@ -0,0 +1,318 @@
+import math
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from .models import Video, VideoUpload
+from .serializers import VideoSerializer
+from . import processing
+from .uploads import (
+    LocalMultipartBackend, UploadError, get_backend, multipart_etag, object_key,
+    part_count, part_length, part_size_for, verify_parts,
+)
+
+# Part URLs returned per response; clients fetch the rest from /parts/
+MAX_PART_URLS = 100
+
+
+def _video_fields(data, upload):
+    """Validated Video fields from the /complete/ body; raises UploadError"""
+    title = data.get('title', upload.filename)
+    thumbnail_url = data.get('thumbnail_url', '')
+    duration = data.get('duration')
+
+    if not isinstance(title, str) or len(title) > 255:
+        raise UploadError('title must be a string of at most 255 characters')
+    if not isinstance(thumbnail_url, str) or len(thumbnail_url) > 500:
+        raise UploadError('thumbnail_url must be a string of at most 500 characters')
+    if duration in (None, ''):
+        duration = None
+    else:
+        try:
+            duration = float(duration)
+        except (TypeError, ValueError):
+            raise UploadError('duration must be a number')
+        if not math.isfinite(duration) or duration < 0:
+            raise UploadError('duration must be a non-negative number')
+
+    return {'title': title, 'thumbnail_url': thumbnail_url, 'duration': duration}
+
+
+def _serialize_upload(upload):
+    return {
+        'id': str(upload.id),
+        'key': upload.key,
+        'filename': upload.filename,
+        'size': upload.size,
+        'part_size': upload.part_size,
+        'part_count': part_count(upload.size, upload.part_size),
+        'status': upload.status,
+        'video_id': str(upload.video_id) if upload.video_id else None,
+        'created_at': upload.created_at.isoformat(),
+    }
+
+
+def _part_urls(request, backend, upload, part_numbers):
+    urls = []
+    for number in part_numbers:
+        length = part_length(upload.size, upload.part_size, number)
+        url = backend.part_url(upload.key, upload.upload_id, number, length, settings.VIDEO_UPLOAD_URL_EXPIRY)
+        urls.append({
+            'part_number': number,
+            'size': length,
+            'url': request.build_absolute_uri(url),
+        })
+    return urls
+
+
+def _get_upload(request, upload_id):
+    try:
+        return VideoUpload.objects.get(id=upload_id, founder=request.user)
+    except VideoUpload.DoesNotExist:
+        return None
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def initiate_upload_view(request):
+    """
+    Start a multipart upload (founders only). Returns the upload plus
+    presigned URLs for the first parts; each part is PUT straight to
+    storage and its ETag response header kept for /complete/.
+    """
+    if request.user.role != 'founder':
+        return Response({'message': 'Only founders can upload videos'}, status=status.HTTP_403_FORBIDDEN)
+
+    filename = (request.data.get('filename') or '').strip()
+    content_type = request.data.get('content_type') or 'video/mp4'
+    try:
+        size = int(request.data.get('size'))
+    except (TypeError, ValueError):
+        size = 0
+
+    if not filename:
+        return Response({'message': 'filename is required'}, status=status.HTTP_400_BAD_REQUEST)
+    if not content_type.startswith('video/'):
+        return Response({'message': 'content_type must be a video type'}, status=status.HTTP_400_BAD_REQUEST)
+    if size <= 0 or size > settings.VIDEO_UPLOAD_MAX_SIZE:
+        return Response(
+            {'message': f'size must be between 1 and {settings.VIDEO_UPLOAD_MAX_SIZE} bytes'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    backend = get_backend()
+    key = object_key(request.user.id, filename)
+    try:
+        upload_id = backend.create(key, content_type)
+    except Exception as e:
+        return Response(
+            {'message': f'Video upload failed: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+    upload = VideoUpload.objects.create(
+        founder=request.user,
+        key=key,
+        upload_id=upload_id,
+        filename=filename[:255],
+        content_type=content_type,
+        size=size,
+        part_size=part_size_for(size),
+    )
+
+    total = part_count(upload.size, upload.part_size)
+    data = _serialize_upload(upload)
+    data['parts'] = _part_urls(request, backend, upload, range(1, min(total, MAX_PART_URLS) + 1))
+    return Response(data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def upload_part_urls_view(request, upload_id):
+    """Fresh presigned URLs for {"part_numbers": [...]} - for resuming or the next batch"""
+    upload = _get_upload(request, upload_id)
+    if upload is None:
+        return Response({'message': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+    if upload.status != 'uploading':
+        return Response({'message': f'Upload is {upload.status}'}, status=status.HTTP_400_BAD_REQUEST)
+
+    total = part_count(upload.size, upload.part_size)
+    numbers = request.data.get('part_numbers')
+    if not isinstance(numbers, list) or not numbers or len(numbers) > MAX_PART_URLS:
+        return Response(
+            {'message': f'part_numbers must be a list of 1-{MAX_PART_URLS} part numbers'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        numbers = sorted({int(n) for n in numbers})
+    except (TypeError, ValueError):
+        return Response({'message': 'Invalid part number'}, status=status.HTTP_400_BAD_REQUEST)
+    if numbers[0] < 1 or numbers[-1] > total:
+        return Response({'message': f'Part numbers must be between 1 and {total}'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({'parts': _part_urls(request, get_backend(), upload, numbers)})
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def upload_detail_view(request, upload_id):
+    """
+    GET: upload state plus the parts storage already holds, so an
+    interrupted client only re-sends what's missing.
+    DELETE: abort the upload and discard its parts.
+    """
+    upload = _get_upload(request, upload_id)
+    if upload is None:
+        return Response({'message': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    backend = get_backend()
+
+    if request.method == 'DELETE':
+        if upload.status != 'uploading':
+            return Response({'message': f'Upload is {upload.status}'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            backend.abort(upload.key, upload.upload_id)
+        except Exception as e:
+            print(f"Failed to abort upload {upload.id}: {e}")
+        upload.status = 'aborted'
+        upload.save(update_fields=['status', 'updated_at'])
+        return Response({'message': 'Upload aborted'})
+
+    data = _serialize_upload(upload)
+    data['uploaded_parts'] = []
+    if upload.status == 'uploading':
+        try:
+            data['uploaded_parts'] = backend.list_parts(upload.key, upload.upload_id)
+        except Exception as e:
+            return Response(
+                {'message': f'Failed to list uploaded parts: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    return Response(data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def complete_upload_view(request, upload_id):
+    """
+    Finish a multipart upload and create the Video (automatically set as
+    current, status=processing).
+
+    Body: {"parts": [{"part_number": 1, "etag": "..."}, ...], "title": ...}
+    The parts storage holds must match the client's ETags and add up to
+    the declared size, and the assembled object's ETag must match the one
+    those parts imply, before a Video row points at it.
+    """
+    parts = request.data.get('parts')
+    try:
+        parts = [{'part_number': int(p['part_number']), 'etag': str(p['etag'])} for p in parts]
+    except (TypeError, KeyError, ValueError):
+        return Response(
+            {'message': 'parts must be a list of {part_number, etag}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    backend = get_backend()
+
+    with transaction.atomic():
+        # Lock so a retried /complete/ can't create a second Video
+        upload = VideoUpload.objects.select_for_update().filter(id=upload_id, founder=request.user).first()
+        if upload is None:
+            return Response({'message': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        if upload.status != 'uploading':
+            return Response({'message': f'Upload is {upload.status}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # Validate before complete(): once the parts are assembled the
+            # multipart upload is gone and the request can't be retried
+            fields = _video_fields(request.data, upload)
+            etags = verify_parts(upload, parts, backend.list_parts(upload.key, upload.upload_id))
+            key, etag = backend.complete(upload.key, upload.upload_id, etags)
+        except UploadError as e:
+            return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response(
+                {'message': f'Video upload failed: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        expected = multipart_etag(etags)
+        if expected and etag != expected:
+            # The store assembled something other than the parts we checked
+            try:
+                backend.delete(key)
+            except Exception:
+                pass
+            upload.status = 'aborted'
+            upload.save(update_fields=['status', 'updated_at'])
+            return Response(
+                {'message': f'Video upload failed: ETag mismatch (expected {expected}, storage has {etag})'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        try:
+            # Savepoint, so a failure here still lets us record the abort
+            with transaction.atomic():
+                video = Video.objects.create(
+                    founder=request.user,
+                    url=request.build_absolute_uri(default_storage.url(key)),
+                    status='processing',
+                    is_current=True,
+                    **fields
+                )
+                processing.enqueue(video)
+        except Exception as e:
+            # The object is assembled but nothing will point at it
+            try:
+                backend.delete(key)
+            except Exception:
+                pass
+            upload.status = 'aborted'
+            upload.save(update_fields=['status', 'updated_at'])
+            return Response(
+                {'message': f'Video upload failed: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        upload.key = key
+        upload.status = 'completed'
+        upload.video = video
+        upload.save(update_fields=['key', 'status', 'video', 'updated_at'])
+
+    video_data = VideoSerializer(video).data
+    video_data['likeCount'] = 0
+    video_data['viewCount'] = 0
+
+    return Response(video_data, status=status.HTTP_201_CREATED)
+
+
+@csrf_exempt
+@require_http_methods(['PUT'])
+def local_upload_part_view(request, upload_id, part_number):
+    """
+    Stand-in for a presigned storage URL when uploads go to the local
+    filesystem. Authorised by the signed token, not the session.
+    """
+    backend = get_backend()
+    if not isinstance(backend, LocalMultipartBackend):
+        raise Http404
+
+    try:
+        content_length = backend.check_token(request.GET.get('token', ''), upload_id, part_number)
+    except UploadError as e:
+        return JsonResponse({'message': str(e)}, status=403)
+
+    try:
+        etag = backend.write_part(upload_id, part_number, request, content_length)
+    except UploadError as e:
+        return JsonResponse({'message': str(e)}, status=400)
+
+    response = HttpResponse()
+    response['ETag'] = f'"{etag}"'
+    return response
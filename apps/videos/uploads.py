@@ -0,0 +1,293 @@
+"""
+Direct-to-storage multipart uploads for videos.
+
+Clients upload parts straight to the bucket with presigned URLs; Django
+only starts the multipart upload, signs part URLs and completes it. On
+completion the stored parts are checked against the declared size and the
+client's ETags before the object is assembled, and the ETag the store
+returns is checked against the one those parts imply.
+
+`S3MultipartBackend` talks to R2/S3 through the django-storages client.
+`LocalMultipartBackend` is a filesystem stand-in for development: its part
+URLs point at `local_upload_part_view`, which writes parts to a staging
+directory and assembles them into `default_storage` on completion.
+"""
+import hashlib
+import math
+import shutil
+import time
+import uuid
+from pathlib import Path
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils.text import get_valid_filename
+from config.storage import get_store, metrics
+
+MAX_PARTS = 10000  # S3 limit
+MIN_PART_SIZE = 5 * 1024 * 1024  # S3 limit for every part but the last
+
+_PART_SIGNING_SALT = 'videos.uploads.part'
+
+
+class UploadError(Exception):
+    """The upload can't be completed as described by the client"""
+
+
+def object_key(user_id, filename):
+    name = get_valid_filename(Path(filename).name)[-100:] or 'video'
+    return f"videos/{user_id}/{uuid.uuid4().hex}-{name}"
+
+
+def part_size_for(size):
+    """Configured part size, grown if needed to stay within MAX_PARTS"""
+    part_size = max(settings.VIDEO_UPLOAD_PART_SIZE, MIN_PART_SIZE)
+    return max(part_size, math.ceil(size / MAX_PARTS))
+
+
+def part_count(size, part_size):
+    return max(1, math.ceil(size / part_size))
+
+
+def part_length(size, part_size, part_number):
+    """Exact byte length of a part (the last one is the remainder)"""
+    return min(part_size, size - (part_number - 1) * part_size)
+
+
+def normalize_etag(etag):
+    return (etag or '').strip().strip('"').lower()
+
+
+def multipart_etag(etags):
+    """
+    The ETag S3 assigns an assembled object: MD5 of the concatenated
+    binary part MD5s, suffixed with the part count. Returns None if any
+    part ETag isn't a plain MD5 (e.g. SSE-KMS), as it can't be predicted.
+    """
+    digests = []
+    for etag in etags:
+        etag = normalize_etag(etag)
+        try:
+            digest = bytes.fromhex(etag)
+        except ValueError:
+            return None
+        if len(digest) != 16:
+            return None
+        digests.append(digest)
+    return f"{hashlib.md5(b''.join(digests)).hexdigest()}-{len(digests)}"
+
+
+def verify_parts(upload, claimed, stored):
+    """
+    Check the client's [{'part_number', 'etag'}] against what the store
+    holds. Returns the ordered ETags or raises UploadError.
+    """
+    expected_count = part_count(upload.size, upload.part_size)
+    numbers = sorted(part['part_number'] for part in claimed)
+    if numbers != list(range(1, expected_count + 1)):
+        raise UploadError(f'Expected parts 1-{expected_count}')
+
+    stored = {part['part_number']: part for part in stored}
+    etags = []
+    total = 0
+    for part in sorted(claimed, key=lambda p: p['part_number']):
+        held = stored.get(part['part_number'])
+        if held is None:
+            raise UploadError(f"Part {part['part_number']} was not uploaded")
+        if normalize_etag(held['etag']) != normalize_etag(part['etag']):
+            raise UploadError(f"Part {part['part_number']} ETag mismatch")
+        total += held['size']
+        etags.append(normalize_etag(held['etag']))
+
+    if total != upload.size:
+        raise UploadError(f'Uploaded {total} bytes, expected {upload.size}')
+    return etags
+
+
+class S3MultipartBackend:
+    """Multipart uploads against the bucket behind S3Boto3Storage"""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    @property
+    def client(self):
+        # The shared, pooled client (same endpoint, credentials and R2-safe
+        # checksum config as django-storages)
+        return get_store().client
+
+    @property
+    def bucket(self):
+        return self.storage.bucket_name
+
+    def create(self, key, content_type):
+        params = dict(self.storage.get_object_parameters(key))
+        params['ContentType'] = content_type
+        if self.storage.default_acl:
+            params['ACL'] = self.storage.default_acl
+        with metrics.timed('multipart_create'):
+            response = self.client.create_multipart_upload(Bucket=self.bucket, Key=key, **params)
+        return response['UploadId']
+
+    def part_url(self, key, upload_id, part_number, content_length, expires):
+        # Signing the length means the store rejects a part of any other size
+        return self.client.generate_presigned_url(
+            'upload_part',
+            Params={
+                'Bucket': self.bucket,
+                'Key': key,
+                'UploadId': upload_id,
+                'PartNumber': part_number,
+                'ContentLength': content_length,
+            },
+            ExpiresIn=expires,
+        )
+
+    def list_parts(self, key, upload_id):
+        parts = []
+        kwargs = {'Bucket': self.bucket, 'Key': key, 'UploadId': upload_id}
+        while True:
+            with metrics.timed('multipart_list_parts'):
+                response = self.client.list_parts(**kwargs)
+            parts.extend(
+                {'part_number': part['PartNumber'], 'etag': normalize_etag(part['ETag']), 'size': part['Size']}
+                for part in response.get('Parts', [])
+            )
+            if not response.get('IsTruncated'):
+                return parts
+            kwargs['PartNumberMarker'] = response['NextPartNumberMarker']
+
+    def complete(self, key, upload_id, etags):
+        """Assemble the parts; returns (key, ETag reported by the store)"""
+        with metrics.timed('multipart_complete'):
+            response = self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': [
+                    {'PartNumber': number, 'ETag': f'"{etag}"'}
+                    for number, etag in enumerate(etags, start=1)
+                ]},
+            )
+        return key, normalize_etag(response.get('ETag'))
+
+    def abort(self, key, upload_id):
+        with metrics.timed('multipart_abort'):
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+
+    def delete(self, key):
+        get_store().delete(key)
+
+
+class LocalMultipartBackend:
+    """
+    Filesystem stand-in for development. Parts are staged under
+    VIDEO_UPLOAD_STAGING_DIR and assembled into `default_storage`.
+    """
+
+    def __init__(self, storage, staging_dir):
+        self.storage = storage
+        self.staging_dir = Path(staging_dir)
+
+    def _dir(self, upload_id):
+        # upload_id comes back through a signed URL, but never trust it as a path
+        if not upload_id.isalnum():
+            raise UploadError('Invalid upload id')
+        return self.staging_dir / upload_id
+
+    def create(self, key, content_type):
+        upload_id = uuid.uuid4().hex
+        self._dir(upload_id).mkdir(parents=True)
+        return upload_id
+
+    def part_url(self, key, upload_id, part_number, content_length, expires):
+        expires_at = int(time.time()) + expires
+        token = signing.dumps([upload_id, part_number, content_length, expires_at], salt=_PART_SIGNING_SALT)
+        url = reverse('video-upload-local-part', args=[upload_id, part_number])
+        return f'{url}?token={token}'
+
+    def check_token(self, token, upload_id, part_number):
+        """Returns the signed content length, or raises UploadError"""
+        try:
+            signed_id, signed_part, content_length, expires_at = signing.loads(token, salt=_PART_SIGNING_SALT)
+        except (signing.BadSignature, ValueError, TypeError):
+            raise UploadError('Invalid upload URL')
+        if signed_id != upload_id or signed_part != part_number:
+            raise UploadError('Invalid upload URL')
+        if time.time() > expires_at:
+            raise UploadError('Upload URL expired')
+        return content_length
+
+    def write_part(self, upload_id, part_number, stream, content_length):
+        """Stream a part body to disk; returns its MD5 ETag"""
+        directory = self._dir(upload_id)
+        if not directory.is_dir():
+            raise UploadError('Upload not found')
+
+        md5 = hashlib.md5()
+        written = 0
+        tmp_path = directory / f'{part_number:05d}.tmp'
+        with open(tmp_path, 'wb') as fh:
+            while True:
+                chunk = stream.read(64 * 1024)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > content_length:
+                    break
+                md5.update(chunk)
+                fh.write(chunk)
+
+        if written != content_length:
+            tmp_path.unlink()
+            raise UploadError(f'Expected {content_length} bytes')
+
+        etag = md5.hexdigest()
+        tmp_path.replace(directory / f'{part_number:05d}.part')
+        (directory / f'{part_number:05d}.etag').write_text(etag)
+        return etag
+
+    def list_parts(self, key, upload_id):
+        directory = self._dir(upload_id)
+        if not directory.is_dir():
+            return []
+        return [
+            {
+                'part_number': int(path.stem),
+                'etag': path.with_suffix('.etag').read_text(),
+                'size': path.stat().st_size,
+            }
+            for path in sorted(directory.glob('*.part'))
+        ]
+
+    def complete(self, key, upload_id, etags):
+        directory = self._dir(upload_id)
+        assembled = directory / 'assembled'
+        with open(assembled, 'wb') as out:
+            for number in range(1, len(etags) + 1):
+                with open(directory / f'{number:05d}.part', 'rb') as part:
+                    shutil.copyfileobj(part, out)
+
+        with open(assembled, 'rb') as fh:
+            name = self.storage.save(key, File(fh))
+        shutil.rmtree(directory, ignore_errors=True)
+        return name, multipart_etag(etags)
+
+    def abort(self, key, upload_id):
+        shutil.rmtree(self._dir(upload_id), ignore_errors=True)
+
+    def delete(self, key):
+        self.storage.delete(key)
+
+
+def get_backend():
+    try:
+        from storages.backends.s3boto3 import S3Boto3Storage
+    except ImportError:
+        S3Boto3Storage = None
+
+    if S3Boto3Storage is not None and isinstance(default_storage, S3Boto3Storage):
+        return S3MultipartBackend(default_storage)
+    return LocalMultipartBackend(default_storage, settings.VIDEO_UPLOAD_STAGING_DIR)
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views, search_views
+from . import views, search_views, upload_views
 
 urlpatterns = [
     path('feed/', views.video_feed_view, name='video-feed'),
@@ -11,7 +11,14 @@ urlpatterns = [
     path('<uuid:video_id>/delete/', views.delete_video_view, name='delete-video'),
     path('<uuid:video_id>/like/', views.like_video_view, name='like-video'),
     path('<uuid:video_id>/track-view/', views.track_video_view, name='track-video-view'),
-    
+
+    # Direct-to-storage (multipart) uploads
+    path('uploads/', upload_views.initiate_upload_view, name='video-upload-initiate'),
+    path('uploads/<uuid:upload_id>/', upload_views.upload_detail_view, name='video-upload-detail'),
+    path('uploads/<uuid:upload_id>/parts/', upload_views.upload_part_urls_view, name='video-upload-parts'),
+    path('uploads/<uuid:upload_id>/complete/', upload_views.complete_upload_view, name='video-upload-complete'),
+    path('uploads/local/<str:upload_id>/<int:part_number>/', upload_views.local_upload_part_view, name='video-upload-local-part'),
+
     # Search endpoints
     path('search/', search_views.search_view, name='search'),
     path('search/autocomplete/', search_views.autocomplete_suggestions_view, name='search-autocomplete'),
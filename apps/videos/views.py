@@ -8,6 +8,10 @@ from django.core.files.storage import default_storage
 from .models import Video, VideoLike, VideoView
 from .serializers import VideoSerializer, VideoWithFounderSerializer, VideoHistorySerializer
 from .feed_algorithm import get_smart_feed_for_investor
+from . import processing
+from .uploads import object_key
+from config.storage import get_store
+from apps.images import derivatives
 from apps.notifications.services import NotificationService
 
 
@@ -109,8 +113,10 @@ def create_video_view(request):
     """
     Create new video (founders only) - automatically sets as current, status=processing
     
-    NOTE: Video is saved as-is. Trim parameters are for reference only.
-    If you need actual trimming, install FFmpeg on your server.
+    NOTE: The upload is stored as-is and queued for processing, which
+    replaces the client's duration/thumbnail with probed values and
+    swaps `url` to the transcoded file. Trim parameters are for
+    reference only.
     """
     if request.user.role != 'founder':
         return Response({'message': 'Only founders can upload videos'}, status=status.HTTP_403_FORBIDDEN)
@@ -122,31 +128,15 @@ def create_video_view(request):
     
     file_path = None
     try:
-        expected_size = video_file.size
-
-        # Save video directly - no trimming
-        file_name = f"videos/{request.user.id}/{video_file.name}"
-        file_path = default_storage.save(file_name, video_file)
-
-        # IMPORTANT: don't trust a clean return from .save() alone.
-        # Newer boto3/botocore versions attach checksum headers that
-        # Cloudflare R2 doesn't fully support, which can cause uploads to
-        # be silently dropped or truncated without boto3 raising an
-        # exception. Explicitly verify the object exists in storage and
-        # is the expected size before creating a DB record that points
-        # to it, otherwise we end up with "successful" uploads that 404.
-        if not default_storage.exists(file_path):
-            raise IOError(
-                f"Upload verification failed: '{file_path}' not found in "
-                f"storage after save() reported success"
-            )
-
-        actual_size = default_storage.size(file_path)
-        if actual_size != expected_size:
-            raise IOError(
-                f"Upload verification failed: expected {expected_size} bytes, "
-                f"storage has {actual_size} bytes (upload was likely truncated)"
-            )
+        # A fresh key per upload: the store overwrites, it doesn't rename
+        stored = get_store().put_file(
+            object_key(request.user.id, video_file.name), video_file, video_file.content_type
+        )
+        # put_file has verified the upload from the PutObject response
+        # (Content-MD5 + ETag) - R2 with newer boto3 checksum headers has
+        # dropped/truncated uploads without raising, so a clean return
+        # alone isn't trusted
+        file_path = stored.key
 
         full_url = request.build_absolute_uri(default_storage.url(file_path))
         
@@ -160,6 +150,7 @@ def create_video_view(request):
             status='processing',
             is_current=True
         )
+        processing.enqueue(video)
         
         video_data = VideoSerializer(video).data
         video_data['likeCount'] = 0
@@ -173,8 +164,7 @@ def create_video_view(request):
         # up orphaned files under this founder's folder.
         if file_path:
             try:
-                if default_storage.exists(file_path):
-                    default_storage.delete(file_path)
+                get_store().delete(file_path)
             except Exception:
                 pass
         return Response(
@@ -273,9 +263,12 @@ def video_detail_and_update_view(request, video_id):
             allowed_fields = ['title', 'thumbnail_url']
             update_data = {k: v for k, v in request.data.items() if k in allowed_fields}
             
+            previous_thumbnail = video.thumbnail_url
             serializer = VideoSerializer(video, data=update_data, partial=True)
             if serializer.is_valid():
                 serializer.save()
+                if video.thumbnail_url != previous_thumbnail:
+                    derivatives.enqueue('thumbnail', video.id, video.thumbnail_url)
                 video_data = serializer.data
                 video_data['likeCount'] = video.likes.count()
                 video_data['viewCount'] = video.views.count()
@@ -11,12 +11,15 @@ django_asgi_app = get_asgi_application()
 # Import WebSocket routing after Django is initialized
 from apps.matches.routing import websocket_urlpatterns as match_websocket_urlpatterns
 from apps.notifications.routing import websocket_urlpatterns as notification_websocket_urlpatterns
+from apps.accounts.middleware import WebsocketRateLimitMiddleware
 
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
     "websocket": AllowedHostsOriginValidator(
-        URLRouter(
-            match_websocket_urlpatterns + notification_websocket_urlpatterns
+        WebsocketRateLimitMiddleware(
+            URLRouter(
+                match_websocket_urlpatterns + notification_websocket_urlpatterns
+            )
         )
     ),
 })
\ No newline at end of file
@@ -0,0 +1,9 @@
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+
+# Namespaced shared caches (see CACHES in settings). Proxies resolve the
+# per-thread cache instance on each access, same as django.core.cache.cache.
+auth_cache = ConnectionProxy(caches, 'auth')
+presence_cache = ConnectionProxy(caches, 'presence')
+ratelimit_cache = ConnectionProxy(caches, 'ratelimit')
+counter_cache = ConnectionProxy(caches, 'counters')
@@ -0,0 +1,179 @@
+"""
+Database-backed job queues (email outbox, video processing, image
+derivatives) and the worker loop that drains them.
+
+A queue is a model with status / attempts / last_error / next_attempt_at /
+locked_at columns. Workers claim due rows with SKIP LOCKED, so any number
+of them can run side by side. A row stuck 'running' for longer than
+<PREFIX>_LOCK_TIMEOUT belongs to a worker that died and is claimed again;
+the dead run counts as an attempt. Long jobs call heartbeat() between
+steps to keep their lock, and a worker only writes a job back while it
+still holds the lock it claimed, so a job is never finished twice.
+Failures are retried with exponential backoff
+(<PREFIX>_BACKOFF_SECONDS, capped by <PREFIX>_MAX_BACKOFF_SECONDS if set)
+until <PREFIX>_MAX_ATTEMPTS, or straight away for `permanent_errors`.
+"""
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+
+class JobLockLost(Exception):
+    """Another worker reclaimed the job; stop working on it"""
+
+
+class JobQueue:
+    def __init__(self, model, settings_prefix, permanent_errors=(), select_related=(),
+                 running_status='running', done_status='done', finished_field='finished_at'):
+        self.model = model
+        self.settings_prefix = settings_prefix
+        self.permanent_errors = permanent_errors
+        self.select_related = select_related
+        self.running_status = running_status
+        self.done_status = done_status
+        self.finished_field = finished_field
+
+    def _setting(self, name, default=None):
+        return getattr(settings, f'{self.settings_prefix}_{name}', default)
+
+    def claim(self, batch_size):
+        """Lock up to batch_size due jobs for this worker"""
+        now = timezone.now()
+        stale_lock = now - timedelta(seconds=self._setting('LOCK_TIMEOUT'))
+
+        with transaction.atomic():
+            jobs = list(
+                self.model.objects.select_for_update(skip_locked=True).filter(
+                    Q(status='pending', next_attempt_at__lte=now) |
+                    Q(status=self.running_status, locked_at__lt=stale_lock)  # worker died mid-job
+                ).select_related(*self.select_related).order_by('next_attempt_at')[:batch_size]
+            )
+
+            # The dead worker's run never got recorded; count it
+            reclaimed = [job for job in jobs if job.status == self.running_status]
+            for job in reclaimed:
+                job.attempts += 1
+            self.model.objects.filter(id__in=[job.id for job in reclaimed]).update(attempts=F('attempts') + 1)
+
+            abandoned = [job for job in reclaimed if job.attempts >= self._setting('MAX_ATTEMPTS')]
+            if abandoned:
+                self.model.objects.filter(id__in=[job.id for job in abandoned]).update(
+                    status='failed',
+                    last_error='Worker stopped before finishing',
+                    locked_at=None
+                )
+                jobs = [job for job in jobs if job not in abandoned]
+
+            self.model.objects.filter(id__in=[job.id for job in jobs]).update(
+                status=self.running_status,
+                locked_at=now
+            )
+            for job in jobs:
+                job.status, job.locked_at = self.running_status, now
+        return jobs
+
+    def _owned(self, job):
+        """The job's row, as long as this worker still holds its lock"""
+        return self.model.objects.filter(id=job.id, status=self.running_status, locked_at=job.locked_at)
+
+    def heartbeat(self, job):
+        """Refresh the job's lock; raises JobLockLost if it was reclaimed"""
+        now = timezone.now()
+        if not self._owned(job).update(locked_at=now):
+            raise JobLockLost(f'{self.model.__name__} {job.id} was reclaimed by another worker')
+        job.locked_at = now
+
+    def finish(self, job, status=None):
+        self._owned(job).update(**{
+            'status': status or self.done_status,
+            'attempts': job.attempts + 1,
+            'last_error': '',
+            'locked_at': None,
+            self.finished_field: timezone.now(),
+        })
+
+    def record_failure(self, job, error):
+        """Retry with exponential backoff, or give up after max attempts"""
+        attempts = job.attempts + 1
+        delay = self._setting('BACKOFF_SECONDS') * (2 ** (attempts - 1))
+        max_delay = self._setting('MAX_BACKOFF_SECONDS')
+        if max_delay is not None:
+            delay = min(delay, max_delay)
+        give_up = isinstance(error, self.permanent_errors) or attempts >= self._setting('MAX_ATTEMPTS')
+        self._owned(job).update(
+            status='failed' if give_up else 'pending',
+            attempts=attempts,
+            last_error=str(error)[:1000],
+            next_attempt_at=timezone.now() + timedelta(seconds=delay),
+            locked_at=None
+        )
+
+    def run_claimed(self, jobs, handler, failure_label=None):
+        """
+        Call handler(job) for each claimed job. The handler returns None when
+        the job is done, or a status to finish it with (e.g. 'skipped').
+        Exceptions are recorded as failures (and printed, prefixed with
+        failure_label(job), if given). Returns (done, failed) counts.
+        """
+        done = failed = 0
+        for job in jobs:
+            try:
+                status = handler(job)
+            except JobLockLost as e:
+                # The worker that reclaimed it records the outcome
+                print(e)
+                continue
+            except Exception as e:
+                if failure_label:
+                    print(f"{failure_label(job)}: {e}")
+                self.record_failure(job, e)
+                failed += 1
+                continue
+
+            self.finish(job, status)
+            if status is None:
+                done += 1
+        return done, failed
+
+    def process(self, batch_size, handler, failure_label=None):
+        """Run one batch of due jobs. Returns (done, failed) counts."""
+        return self.run_claimed(self.claim(batch_size), handler, failure_label)
+
+
+class WorkerCommand(BaseCommand):
+    """
+    `manage.py <worker>`: drain a queue in batches, then poll every
+    --interval seconds (or exit with --once). Subclasses implement
+    process_batch().
+    """
+    default_batch_size = None
+    default_interval = 2.0
+    progress_message = 'Processed {done}, failed {failed}'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process due jobs once and exit')
+        parser.add_argument('--batch-size', type=int, default=self.default_batch_size)
+        parser.add_argument('--interval', type=float, default=self.default_interval,
+                            help='Seconds to sleep when the queue is empty')
+
+    def process_batch(self, batch_size):
+        """Run one batch; returns (done, failed) counts"""
+        raise NotImplementedError
+
+    def handle(self, *args, **options):
+        while True:
+            done, failed = self.process_batch(options['batch_size'])
+
+            if done or failed:
+                self.stdout.write(self.progress_message.format(done=done, failed=failed))
+                # More may be waiting - go straight to the next batch
+                continue
+
+            if options['once']:
+                return
+
+            time.sleep(options['interval'])
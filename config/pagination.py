@@ -0,0 +1,64 @@
+"""
+Keyset (cursor) pagination on (created_at, id).
+
+List endpoints keep returning a plain JSON list; the cursor for the next
+page goes in the X-Next-Cursor response header and comes back as
+?cursor=. Unlike OFFSET, each page is an index range scan no matter how
+deep the client pages.
+"""
+import base64
+import uuid
+from datetime import datetime
+from django.db.models import Q
+
+
+def encode_cursor(obj):
+    value = f'{obj.created_at.isoformat()}|{obj.pk}'
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return (created_at, id) from a cursor, or None if it is malformed"""
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), uuid.UUID(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(queryset, request, default_limit=50, max_limit=100, ascending=False):
+    """
+    Return (rows, next_cursor) for the page selected by ?cursor= and ?limit=.
+    Newest first unless `ascending`. Raises ValueError on a bad limit/cursor.
+    """
+    try:
+        limit = max(1, min(int(request.GET.get('limit', default_limit)), max_limit))
+    except ValueError:
+        raise ValueError('Invalid limit')
+
+    if ascending:
+        queryset = queryset.order_by('created_at', 'id')
+    else:
+        queryset = queryset.order_by('-created_at', '-id')
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            raise ValueError('Invalid cursor')
+        created_at, pk = position
+        if ascending:
+            queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+        else:
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    # Fetch one extra row to know whether there is another page
+    rows = list(queryset[:limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def paginated_response(response, next_cursor):
+    if next_cursor:
+        response['X-Next-Cursor'] = next_cursor
+    return response
@@ -38,6 +38,8 @@ INSTALLED_APPS = [
     'apps.legal',
     'apps.reports',
     'apps.notifications',
+    'apps.analytics',
+    'apps.images',
 ]
 
 MIDDLEWARE = [
@@ -132,7 +134,7 @@ if DEBUG:
 else:
     # Cloudflare R2 / S3 in production
     STORAGES = {
-        'default': {'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage'},
+        'default': {'BACKEND': 'config.storage.MediaStorage'},
         'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
     }
     
@@ -165,9 +167,15 @@ else:
     # here (it passes this straight to boto3.client(config=...)) - a plain
     # dict will break client construction, so build it explicitly.
     from botocore.config import Config as _BotoConfig
+    # config.storage.get_store() shares one client across request threads,
+    # so its connection pool must cover them (botocore's default is 10)
+    AWS_S3_MAX_POOL_CONNECTIONS = config('AWS_S3_MAX_POOL_CONNECTIONS', default=50, cast=int)
     AWS_S3_CLIENT_CONFIG = _BotoConfig(
         request_checksum_calculation='when_required',
         response_checksum_validation='when_required',
+        max_pool_connections=AWS_S3_MAX_POOL_CONNECTIONS,
+        retries={'mode': 'standard', 'max_attempts': 3},
+        tcp_keepalive=True,
     )
 
 # Default primary key field type
@@ -221,6 +229,14 @@ CORS_ALLOW_HEADERS = [
     'x-requested-with',
     'range',  # Critical for video streaming
 ]
+CORS_EXPOSE_HEADERS = [
+    'x-next-cursor',  # Keyset pagination (notifications list)
+    'etag',  # Local stand-in for multipart part uploads
+    'ratelimit-limit',
+    'ratelimit-remaining',
+    'ratelimit-reset',
+    'retry-after',
+]
 
 # Session settings
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
@@ -261,11 +277,134 @@ else:
         },
     }
 
-# Rate limiting
+# Cache
+# Auth tokens, presence flags and rate-limit counters must be visible to
+# every gunicorn/daphne worker, so production uses a shared Redis cache.
+# Each namespace gets its own alias/key prefix so one can be flushed or
+# moved to a separate Redis without touching the others. Without a Redis
+# URL (local dev, tests) we fall back to per-process LocMem.
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default=config('REDIS_URL', default=''))
+CACHE_NAMESPACES = ['default', 'auth', 'presence', 'ratelimit', 'counters']
+
+if CACHE_REDIS_URL:
+    CACHES = {
+        namespace: {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+            'KEY_PREFIX': f'ikonetu:{namespace}',
+            'OPTIONS': {
+                # Passed to redis.ConnectionPool - one bounded pool per alias
+                'max_connections': config('CACHE_REDIS_MAX_CONNECTIONS', default=50, cast=int),
+                'socket_connect_timeout': 2,
+                'socket_timeout': 2,
+                'health_check_interval': 30,
+            },
+        }
+        for namespace in CACHE_NAMESPACES
+    }
+else:
+    CACHES = {
+        namespace: {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': f'ikonetu-{namespace}',
+        }
+        for namespace in CACHE_NAMESPACES
+    }
+
+# Realtime fanout (apps/notifications/dispatcher.py)
+REALTIME_DISPATCH_BATCH_SIZE = config('REALTIME_DISPATCH_BATCH_SIZE', default=100, cast=int)
+REALTIME_DISPATCH_QUEUE_SIZE = config('REALTIME_DISPATCH_QUEUE_SIZE', default=10000, cast=int)
+
+# Open chat sockets are tracked in the presence cache to suppress message
+# notifications; refreshed on every client ping
+CHAT_PRESENCE_TIMEOUT = 300
+
+# Direct-to-storage video uploads (apps/videos/uploads.py)
+VIDEO_UPLOAD_MAX_SIZE = config('VIDEO_UPLOAD_MAX_SIZE', default=500 * 1024 * 1024, cast=int)  # bytes
+VIDEO_UPLOAD_PART_SIZE = 10 * 1024 * 1024  # S3/R2 require >= 5 MB for all but the last part
+VIDEO_UPLOAD_URL_EXPIRY = 3600  # presigned part URLs, seconds
+VIDEO_UPLOAD_STAGING_DIR = BASE_DIR / 'tmp' / 'uploads'  # local stand-in only (DEBUG)
+
+# Video processing (apps/videos/processing.py, manage.py process_videos)
+FFMPEG_BINARY = config('FFMPEG_BINARY', default='')  # defaults to imageio-ffmpeg's bundled binary
+VIDEO_TRANSCODE_MAX_DIMENSION = 1280  # longest side of the playback file
+VIDEO_TRANSCODE_CRF = 26
+VIDEO_TRANSCODE_MAXRATE = '2500k'
+VIDEO_TRANSCODE_BUFSIZE = '5000k'
+VIDEO_POSTER_WIDTH = 720
+# HLS ladder: (short side, video bitrate, audio bitrate), lowest first; [] disables HLS
+VIDEO_HLS_LADDER = [
+    (240, '400k', '64k'),
+    (480, '1000k', '96k'),
+    (720, '2500k', '128k'),
+]
+VIDEO_HLS_SEGMENT_SECONDS = 4
+VIDEO_PROCESSING_TIMEOUT = 1800  # per ffmpeg call, seconds
+VIDEO_PROCESSING_MAX_ATTEMPTS = 3
+VIDEO_PROCESSING_BACKOFF_SECONDS = 60
+# Workers refresh the lock between steps, so this only has to outlast the
+# slowest single step (one ffmpeg call); then 'running' jobs are reclaimed
+VIDEO_PROCESSING_LOCK_TIMEOUT = 2 * VIDEO_PROCESSING_TIMEOUT
+
+# Avatar/thumbnail variants (apps/images/derivatives.py, manage.py process_image_derivatives)
+IMAGE_DERIVATIVE_SIZES = (64, 128, 400)  # longest side, px
+IMAGE_DERIVATIVE_MAX_ATTEMPTS = 3
+IMAGE_DERIVATIVE_BACKOFF_SECONDS = 30
+IMAGE_DERIVATIVE_LOCK_TIMEOUT = 600
+
+# Uploaded images above this many pixels are refused before decoding
+IMAGE_MAX_PIXELS = config('IMAGE_MAX_PIXELS', default=40_000_000, cast=int)
+
+# Process pool for in-request image work (apps/images/pool.py)
+IMAGE_POOL_WORKERS = config('IMAGE_POOL_WORKERS', default=2, cast=int)  # 0 = process on the request thread
+IMAGE_POOL_QUEUE = config('IMAGE_POOL_QUEUE', default=8, cast=int)  # waiting uploads before new ones get a 503
+IMAGE_POOL_WAIT = 5  # seconds to wait for a free slot
+IMAGE_POOL_TIMEOUT = 30  # seconds per call
+
+# Storage calls slower than this are logged (config/storage.py)
+STORAGE_SLOW_OPERATION_MS = config('STORAGE_SLOW_OPERATION_MS', default=2000, cast=int)
+
+# Orphaned media cleanup (manage.py gc_storage)
+STORAGE_GC_PREFIXES = ('videos/', 'avatars/', 'images/')
+STORAGE_GC_GRACE_DAYS = config('STORAGE_GC_GRACE_DAYS', default=7, cast=int)
+
+# Admin dashboard counters are cached this long (seconds)
+ADMIN_STATS_CACHE_TTL = 30
+
+# Notification retention (manage.py archive_notifications)
+NOTIFICATION_RETENTION_DAYS = config('NOTIFICATION_RETENTION_DAYS', default=90, cast=int)
+NOTIFICATION_MAX_PER_USER = config('NOTIFICATION_MAX_PER_USER', default=1000, cast=int)
+NOTIFICATION_ARCHIVE_BATCH_SIZE = 1000
+
+# Cached unread counters are recomputed at least this often (seconds), so
+# an adjustment lost to a racing rebuild can't leave a count wrong for good
+UNREAD_COUNTER_TTL = config('UNREAD_COUNTER_TTL', default=3600, cast=int)
+
+# Auth token cache (per-process LRU in front of the shared cache)
+AUTH_TOKEN_LRU_SIZE = config('AUTH_TOKEN_LRU_SIZE', default=1024, cast=int)
+AUTH_TOKEN_LRU_TTL = config('AUTH_TOKEN_LRU_TTL', default=30, cast=int)  # seconds
+
+# Rate limiting (sliding window per client IP, see apps/accounts/rate_limit.py)
 RATE_LIMIT_ENABLE = config('RATE_LIMIT_ENABLE', default=True, cast=bool)
 RATE_LIMIT_WINDOW = config('RATE_LIMIT_WINDOW', default=60, cast=int)
 RATE_LIMIT_MAX_REQUESTS = config('RATE_LIMIT_MAX_REQUESTS', default=5, cast=int)
 
+RATE_LIMIT_POLICIES = {
+    'auth': {'limit': RATE_LIMIT_MAX_REQUESTS, 'window': RATE_LIMIT_WINDOW},
+    'search': {'limit': config('RATE_LIMIT_SEARCH', default=60, cast=int), 'window': 60},
+    'track_view': {'limit': config('RATE_LIMIT_TRACK_VIEW', default=120, cast=int), 'window': 60},
+    'like': {'limit': config('RATE_LIMIT_LIKE', default=60, cast=int), 'window': 60},
+    'ws_connect': {'limit': config('RATE_LIMIT_WS_CONNECT', default=30, cast=int), 'window': 60},
+}
+
+# (path regex, policy) - first match wins. WebSocket connects always use 'ws_connect'.
+RATE_LIMIT_ROUTES = [
+    (r'^/api/auth/(register|login)$', 'auth'),
+    (r'^/api/videos/search/', 'search'),
+    (r'^/api/videos/[0-9a-f-]+/track-view/$', 'track_view'),
+    (r'^/api/videos/[0-9a-f-]+/like/$', 'like'),
+]
+
 # Security settings for production
 if not DEBUG:
     SECURE_SSL_REDIRECT = True
@@ -278,7 +417,11 @@ if not DEBUG:
     X_FRAME_OPTIONS = 'DENY'
 
 # Email Configuration (Brevo)
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Override with django.core.mail.backends.console.EmailBackend or
+# .filebased.EmailBackend (+ EMAIL_FILE_PATH) for local dev/tests
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
+EMAIL_FILE_PATH = config('EMAIL_FILE_PATH', default=str(BASE_DIR / 'sent_emails'))
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=30, cast=int)
 EMAIL_HOST = config('BREVO_SMTP_SERVER', default='smtp-relay.brevo.com')
 EMAIL_PORT = config('BREVO_SMTP_PORT', default=587, cast=int)
 EMAIL_USE_TLS = True
@@ -287,5 +430,12 @@ EMAIL_HOST_PASSWORD = config('BREVO_SMTP_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('FROM_EMAIL', default='info@ikonetu.com')
 FRONTEND_URL = config('FRONTEND_URL', default='http://localhost:5173')
 
+# Email outbox (delivered by `manage.py send_queued_emails`)
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=50, cast=int)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=6, cast=int)
+EMAIL_OUTBOX_BACKOFF_SECONDS = 30  # doubled after every failed attempt
+EMAIL_OUTBOX_MAX_BACKOFF_SECONDS = 3600
+EMAIL_OUTBOX_LOCK_TIMEOUT = 600  # reclaim 'sending' rows from crashed workers
+
 # OTP Settings
 OTP_EXPIRATION_MINUTES = 15
\ No newline at end of file
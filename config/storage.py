@@ -0,0 +1,354 @@
+"""
+Media storage helpers shared by the apps that write to default_storage.
+
+`get_store()` is the object-level API the upload paths and workers use
+instead of default_storage's save/exists/size dance:
+
+- On S3/R2 every thread shares one boto3 client, whose connection pool is
+  sized by AWS_S3_MAX_POOL_CONNECTIONS. django-storages builds a boto3
+  session and resource per thread.
+- Writes are verified from the PutObject response. The body goes up with
+  Content-MD5, so the store rejects a truncated or altered body, and the
+  returned ETag must equal that MD5. This replaces the HEAD (exists +
+  size) after every save.
+- Every call is timed into `metrics` (per process). Admins can read the
+  numbers at /api/admin/storage/metrics/.
+
+Locally (DEBUG) the same API is backed by FileSystemStorage.
+"""
+import base64
+import hashlib
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+from typing import NamedTuple
+from urllib.parse import unquote, urlparse
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+try:
+    from storages.backends.s3boto3 import S3Boto3Storage
+except ImportError:  # only needed in production
+    S3Boto3Storage = None
+
+# Objects under these prefixes are content-addressed: a key never changes
+# content, so clients and the CDN can cache them forever
+IMMUTABLE_PREFIXES = ('images/',)
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+DELETE_BATCH_SIZE = 1000  # DeleteObjects limit
+_CHUNK_SIZE = 1024 * 1024
+
+
+if S3Boto3Storage is not None:
+    class MediaStorage(S3Boto3Storage):
+        """S3Boto3Storage with long-lived caching for immutable objects"""
+
+        def get_object_parameters(self, name):
+            params = super().get_object_parameters(name)
+            if name.startswith(IMMUTABLE_PREFIXES):
+                params['CacheControl'] = IMMUTABLE_CACHE_CONTROL
+            return params
+
+
+def storage_key(url):
+    """
+    Storage name for one of our media URLs
+    ('https://cdn/avatars/x.jpg' -> 'avatars/x.jpg'), or None if the URL
+    points somewhere else.
+    """
+    if not url:
+        return None
+    parsed = urlparse(url)
+    media = urlparse(settings.MEDIA_URL)
+    if media.netloc and parsed.netloc != media.netloc:
+        return None
+
+    path = unquote(parsed.path)
+    if not path.startswith(media.path):
+        return None
+    return path[len(media.path):].lstrip('/') or None
+
+
+def absolute_url(key, reference_url):
+    """
+    default_storage.url() as an absolute URL. Local storage returns a path,
+    so borrow the scheme/host of a URL we already stored (e.g. the upload's).
+    """
+    url = default_storage.url(key)
+    if url.startswith('/'):
+        parsed = urlparse(reference_url)
+        url = f'{parsed.scheme}://{parsed.netloc}{url}'
+    return url
+
+
+class StorageMetrics:
+    """Per-operation call counts, errors and latency percentiles (this process)"""
+
+    def __init__(self, window):
+        self.window = window
+        self._lock = threading.Lock()
+        self._ops = {}
+
+    def record(self, op, seconds, ok=True):
+        with self._lock:
+            stats = self._ops.get(op)
+            if stats is None:
+                stats = self._ops[op] = {'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0,
+                                         'recent': deque(maxlen=self.window)}
+            stats['count'] += 1
+            stats['errors'] += 0 if ok else 1
+            stats['total'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+            stats['recent'].append(seconds)
+
+        if seconds * 1000 >= settings.STORAGE_SLOW_OPERATION_MS:
+            print(f"Slow storage {op}: {seconds * 1000:.0f} ms")
+
+    @contextmanager
+    def timed(self, op):
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(op, time.perf_counter() - start, ok)
+
+    def snapshot(self):
+        """{op: {count, errors, avg_ms, p50_ms, p99_ms, max_ms}}; percentiles over the last `window` calls"""
+        with self._lock:
+            ops = {op: dict(stats, recent=sorted(stats['recent'])) for op, stats in self._ops.items()}
+
+        result = {}
+        for op, stats in sorted(ops.items()):
+            recent = stats['recent']
+            result[op] = {
+                'count': stats['count'],
+                'errors': stats['errors'],
+                'avg_ms': round(stats['total'] / stats['count'] * 1000, 1),
+                'p50_ms': round(recent[len(recent) // 2] * 1000, 1),
+                'p99_ms': round(recent[min(len(recent) - 1, int(len(recent) * 0.99))] * 1000, 1),
+                'max_ms': round(stats['max'] * 1000, 1),
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._ops.clear()
+
+
+metrics = StorageMetrics(window=1000)
+
+
+class UploadVerificationError(IOError):
+    """The store didn't end up with the bytes we sent"""
+
+
+class StoredObject(NamedTuple):
+    key: str
+    size: int
+    etag: str  # MD5 hex of the content
+
+
+class ListedObject(NamedTuple):
+    key: str
+    size: int
+    last_modified: datetime
+
+
+def _digest(fh):
+    """(MD5, size) of a file object, leaving it rewound"""
+    md5 = hashlib.md5()
+    size = 0
+    for chunk in iter(lambda: fh.read(_CHUNK_SIZE), b''):
+        md5.update(chunk)
+        size += len(chunk)
+    fh.seek(0)
+    return md5, size
+
+
+class S3ObjectStore:
+    """Objects in the bucket behind S3Boto3Storage, through one shared client"""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.bucket = storage.bucket_name
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        # boto3 clients (unlike resources) are thread-safe, so one client
+        # and its connection pool serve every request thread
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    storage = self.storage
+                    self._client = storage._create_session().client(
+                        's3',
+                        region_name=storage.region_name,
+                        use_ssl=storage.use_ssl,
+                        endpoint_url=storage.endpoint_url,
+                        config=storage.client_config,
+                        verify=storage.verify,
+                    )
+        return self._client
+
+    def put_file(self, key, fh, content_type=None):
+        """Upload a file object and verify the store's ETag against its MD5"""
+        md5, size = _digest(fh)
+        params = self.storage._get_write_parameters(key)
+        if content_type:
+            params['ContentType'] = content_type
+
+        with metrics.timed('put'):
+            response = self.client.put_object(
+                Bucket=self.bucket,
+                Key=key,
+                Body=fh,
+                ContentLength=size,
+                ContentMD5=base64.b64encode(md5.digest()).decode(),
+                **params
+            )
+
+        etag = (response.get('ETag') or '').strip('"').lower()
+        # Encrypted-at-rest objects get non-MD5 ETags; Content-MD5 already
+        # made the store check the body, so only compare plain MD5 ETags
+        if len(etag) == 32 and etag != md5.hexdigest():
+            self.delete(key)
+            raise UploadVerificationError(
+                f"Upload verification failed: storage has ETag {etag} for '{key}', "
+                f"expected {md5.hexdigest()}"
+            )
+        return StoredObject(key, size, md5.hexdigest())
+
+    def put_bytes(self, key, data, content_type=None):
+        return self.put_file(key, ContentFile(data), content_type)
+
+    def read(self, key):
+        with metrics.timed('get'):
+            return self.client.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+
+    def download(self, key, path):
+        with metrics.timed('get'):
+            body = self.client.get_object(Bucket=self.bucket, Key=key)['Body']
+            with open(path, 'wb') as out:
+                for chunk in body.iter_chunks(_CHUNK_SIZE):
+                    out.write(chunk)
+
+    def delete(self, key):
+        with metrics.timed('delete'):
+            self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def delete_many(self, keys):
+        """DeleteObjects in batches of 1000. Returns the keys that failed."""
+        keys = list(keys)
+        failed = []
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            batch = keys[start:start + DELETE_BATCH_SIZE]
+            with metrics.timed('delete_many'):
+                response = self.client.delete_objects(
+                    Bucket=self.bucket,
+                    Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True},
+                )
+            failed.extend(error['Key'] for error in response.get('Errors', []))
+        return failed
+
+    def list(self, prefix):
+        """Yield pages (lists of ListedObject) of everything under prefix"""
+        kwargs = {'Bucket': self.bucket, 'Prefix': prefix, 'MaxKeys': 1000}
+        while True:
+            with metrics.timed('list'):
+                response = self.client.list_objects_v2(**kwargs)
+            yield [
+                ListedObject(item['Key'], item['Size'], item['LastModified'])
+                for item in response.get('Contents', [])
+            ]
+            if not response.get('IsTruncated'):
+                return
+            kwargs['ContinuationToken'] = response['NextContinuationToken']
+
+
+class LocalObjectStore:
+    """The same API over FileSystemStorage (development)"""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def put_file(self, key, fh, content_type=None):
+        md5, size = _digest(fh)
+        with metrics.timed('put'):
+            # Object stores overwrite; FileSystemStorage would pick a new name
+            self.storage.delete(key)
+            saved = self.storage.save(key, fh if hasattr(fh, 'chunks') else File(fh))
+        if saved != key:
+            raise UploadVerificationError(f"Storage renamed '{key}' to '{saved}'")
+        return StoredObject(key, size, md5.hexdigest())
+
+    def put_bytes(self, key, data, content_type=None):
+        return self.put_file(key, ContentFile(data), content_type)
+
+    def read(self, key):
+        with metrics.timed('get'):
+            with self.storage.open(key, 'rb') as fh:
+                return fh.read()
+
+    def download(self, key, path):
+        with metrics.timed('get'):
+            with self.storage.open(key, 'rb') as src, open(path, 'wb') as out:
+                shutil.copyfileobj(src, out, _CHUNK_SIZE)
+
+    def delete(self, key):
+        with metrics.timed('delete'):
+            self.storage.delete(key)
+
+    def delete_many(self, keys):
+        failed = []
+        with metrics.timed('delete_many'):
+            for key in keys:
+                try:
+                    self.storage.delete(key)
+                except OSError:
+                    failed.append(key)
+        return failed
+
+    def list(self, prefix, page_size=1000):
+        root = self.storage.path('')
+        base = self.storage.path(prefix)
+        page = []
+        for directory, _, files in os.walk(base):
+            for name in sorted(files):
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                page.append(ListedObject(
+                    os.path.relpath(path, root).replace(os.sep, '/'),
+                    stat.st_size,
+                    datetime.fromtimestamp(stat.st_mtime, tz=dt_timezone.utc),
+                ))
+                if len(page) >= page_size:
+                    yield page
+                    page = []
+        yield page
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if S3Boto3Storage is not None and isinstance(default_storage, S3Boto3Storage):
+                    _store = S3ObjectStore(default_storage)
+                else:
+                    _store = LocalObjectStore(default_storage)
+    return _store
@@ -0,0 +1,161 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import BytesIO
+from botocore.config import Config
+from botocore.stub import ANY, Stubber
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from storages.backends.s3 import S3Storage
+from apps.images.models import ImageDerivativeJob
+from .jobs import JobLockLost, JobQueue
+from .storage import LocalObjectStore, S3ObjectStore, UploadVerificationError
+
+
+class LocalObjectStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='store-tests-')
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.store = LocalObjectStore(FileSystemStorage(location=self.root))
+
+    def test_put_file_overwrites_and_reports_md5(self):
+        self.store.put_bytes('avatars/u/a.jpg', b'old')
+        stored = self.store.put_file('avatars/u/a.jpg', BytesIO(b'new bytes'))
+
+        self.assertEqual(stored.key, 'avatars/u/a.jpg')
+        self.assertEqual(stored.size, 9)
+        self.assertEqual(stored.etag, hashlib.md5(b'new bytes').hexdigest())
+        self.assertEqual(self.store.read('avatars/u/a.jpg'), b'new bytes')
+
+    def test_list_pages_through_a_prefix(self):
+        for name in ('videos/u/1.mp4', 'videos/u/v/hls/master.m3u8', 'avatars/u/a.jpg'):
+            self.store.put_bytes(name, b'x')
+
+        pages = list(self.store.list('videos/', page_size=1))
+        keys = sorted(obj.key for page in pages for obj in page)
+
+        self.assertEqual(keys, ['videos/u/1.mp4', 'videos/u/v/hls/master.m3u8'])
+        self.assertTrue(all(len(page) <= 1 for page in pages))
+        self.assertTrue(all(obj.size == 1 for page in pages for obj in page))
+
+    def test_list_of_a_missing_prefix_is_empty(self):
+        self.assertEqual([obj for page in self.store.list('images/') for obj in page], [])
+
+    def test_delete_many(self):
+        self.store.put_bytes('images/a/64.webp', b'x')
+        self.store.put_bytes('images/a/128.webp', b'x')
+
+        self.assertEqual(self.store.delete_many(['images/a/64.webp', 'images/a/128.webp', 'images/gone']), [])
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'images', 'a', '64.webp')))
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'images', 'a', '128.webp')))
+
+
+class S3ObjectStoreTests(SimpleTestCase):
+    def setUp(self):
+        storage = S3Storage(
+            bucket_name='media',
+            access_key='test',
+            secret_key='test',
+            endpoint_url='https://storage.example.com',
+            region_name='auto',
+            client_config=Config(max_pool_connections=50, request_checksum_calculation='when_required'),
+        )
+        self.store = S3ObjectStore(storage)
+        self.stubber = Stubber(self.store.client)
+        self.stubber.activate()
+        self.addCleanup(self.stubber.deactivate)
+
+    def test_client_is_shared_and_pooled(self):
+        self.assertIs(self.store.client, self.store.client)
+        self.assertEqual(self.store.client.meta.config.max_pool_connections, 50)
+
+    def test_put_verifies_etag_from_the_response(self):
+        md5 = hashlib.md5(b'hello').hexdigest()
+        self.stubber.add_response('put_object', {'ETag': f'"{md5}"'}, {
+            'Bucket': 'media', 'Key': 'a.txt', 'Body': ANY, 'ContentLength': 5,
+            'ContentMD5': ANY, 'ContentType': 'text/plain',
+        })
+
+        stored = self.store.put_bytes('a.txt', b'hello', 'text/plain')
+
+        self.assertEqual((stored.size, stored.etag), (5, md5))
+        self.stubber.assert_no_pending_responses()
+
+    def test_etag_mismatch_deletes_the_object(self):
+        self.stubber.add_response('put_object', {'ETag': '"%s"' % ('0' * 32)})
+        self.stubber.add_response('delete_object', {}, {'Bucket': 'media', 'Key': 'a.txt'})
+
+        with self.assertRaises(UploadVerificationError):
+            self.store.put_bytes('a.txt', b'hello')
+        self.stubber.assert_no_pending_responses()
+
+    def test_delete_many_batches_and_reports_failures(self):
+        self.stubber.add_response('delete_objects', {'Errors': [{'Key': 'k7'}]})
+        self.stubber.add_response('delete_objects', {})
+
+        self.assertEqual(self.store.delete_many(f'k{i}' for i in range(1500)), ['k7'])
+        self.stubber.assert_no_pending_responses()
+
+    def test_list_follows_continuation_tokens(self):
+        modified = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        self.stubber.add_response('list_objects_v2', {
+            'Contents': [{'Key': 'videos/a', 'Size': 3, 'LastModified': modified}],
+            'IsTruncated': True,
+            'NextContinuationToken': 'next',
+        })
+        self.stubber.add_response('list_objects_v2', {
+            'Contents': [{'Key': 'videos/b', 'Size': 4, 'LastModified': modified}],
+            'IsTruncated': False,
+        }, {'Bucket': 'media', 'Prefix': 'videos/', 'MaxKeys': 1000, 'ContinuationToken': 'next'})
+
+        pages = list(self.store.list('videos/'))
+
+        self.assertEqual([[obj.key for obj in page] for page in pages], [['videos/a'], ['videos/b']])
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.queue = JobQueue(ImageDerivativeJob, 'IMAGE_DERIVATIVE')
+        self.job = ImageDerivativeJob.objects.create(kind='avatar', object_id=uuid.uuid4(), source_url='x')
+
+    def _crash(self, job):
+        """Make the job look like its worker died an hour ago"""
+        ImageDerivativeJob.objects.filter(id=job.id).update(locked_at=timezone.now() - timedelta(hours=1))
+
+    def test_heartbeat_keeps_the_job_from_being_reclaimed(self):
+        [job] = self.queue.claim(10)
+        self.queue.heartbeat(job)
+
+        self.assertEqual(self.queue.claim(10), [])
+
+    def test_reclaim_counts_the_dead_run_and_locks_out_the_old_worker(self):
+        [first] = self.queue.claim(10)
+        self._crash(first)
+
+        [second] = self.queue.claim(10)
+        self.assertEqual(second.attempts, 1)
+
+        with self.assertRaises(JobLockLost):
+            self.queue.heartbeat(first)
+        # The first worker's outcome is dropped; only the owner's lands
+        self.queue.finish(first)
+        self.assertEqual(ImageDerivativeJob.objects.get(id=self.job.id).status, 'running')
+
+        self.queue.finish(second)
+        stored = ImageDerivativeJob.objects.get(id=self.job.id)
+        self.assertEqual((stored.status, stored.attempts), ('done', 2))
+
+    def test_job_whose_workers_keep_dying_fails(self):
+        for _ in range(2):
+            self.queue.claim(10)
+            self._crash(self.job)
+
+        with self.settings(IMAGE_DERIVATIVE_MAX_ATTEMPTS=2):
+            self.assertEqual(self.queue.claim(10), [])
+
+        stored = ImageDerivativeJob.objects.get(id=self.job.id)
+        self.assertEqual((stored.status, stored.attempts), ('failed', 2))
@@ -17,6 +17,7 @@ urlpatterns = [
     path('api/admin/', include('apps.reports.admin_urls')),
     path('api/dashboard/', include('apps.accounts.dashboard_urls')),
     path('api/notifications/', include('apps.notifications.urls')),
+    path('api/analytics/', include('apps.analytics.urls')),
 ]
 
 # Serve media files in development